@@ -1,18 +1,35 @@
 # Importar biblioteca completa - padrão
-import io
+import time
 import unicodedata
 
 # Importar biblioteca completa - terceiro
-import joblib
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import requests
-import shap
 import streamlit as st
 
+# Importar biblioteca completa - projeto
+from obesidade.aquecimento import iniciar_aquecimento
+from obesidade.auditoria import obter_auditoria, principais_fatores
+from obesidade.cache import normalizar_chave, obter_cache
+from obesidade.cenarios import VARIAVEIS_CENARIO, pontuar_cenarios, rotulo_valor, valores_variavel
+from obesidade.config import EXPLICACAO_INTERVALO_S, EXPLICACAO_TIMEOUT_S
+from obesidade.drift import obter_monitor, observar
+from obesidade.features import calcular_imc
+from obesidade.instrumentacao import etapa, finalizar_rastreamento, iniciar_rastreamento
+from obesidade.motor import prever
+from obesidade.plots import especificacao_cenarios, especificacao_waterfall, grafico_waterfall_matplotlib
+from obesidade.populacao import IndicePopulacao
+from obesidade.recarga import GerenciadorVersoes, VersaoModelo
+from obesidade.tarefas import GerenciadorTarefas
+from obesidade.vizinhos import ROTULOS_NIVEL, atualizar_indice
+
 # Variavies 
 validar_shap = 'n'
+usar_motor_compilado = 's'
+modo_grafico_shap = 'vega' # 'vega' (leve, sem figura do matplotlib) ou 'matplotlib' (waterfall original do SHAP)
+registrar_metricas = 's' # Tempo por etapa gravado em reports/metricas/requisicoes.jsonl
+explicacao_assincrona = 's' # SHAP calculado em segundo plano (a probabilidade é exibida antes da explicação)
+registrar_auditoria = 's' # Predições gravadas em reports/auditoria/predicoes.sqlite3 (fila gravada em segundo plano)
 
 # CONFIGURAÇÃO DA PÁGINA
 st.set_page_config(
@@ -37,122 +54,155 @@ def ordenar_opcoes(lista):
     
     return sorted(lista, key=normalizar)
 
-# Traduzir os nomes do SHAPE
-def traduzir_nomes_features(lista_nomes_tecnicos):
+# Iniciar o aquecimento do processo
+@st.cache_resource
+
+def _get_aquecimento():
 
     """
-    Traduz os nomes técnicos do Pipeline para Português legível e profissional.
+    Inicia, uma única vez por processo, o carregamento em segundo plano das bibliotecas pesadas,
+    do modelo, do explicador do SHAP, dos metadados e do motor (obesidade.aquecimento).
     """
 
-    # Dicionário atualizado com o estilo preferido
-    mapa_nomes = {
-        # --- Numéricas ---
-        'num__imc': 'Índice de Massa Corporal (IMC)',
-        'num__idade': 'Idade',
-        
-        # --- Binárias ---
-        'bin__genero': 'Gênero',
-        'bin__b_historico_familiar': 'Histórico Familiar',
-        'bin__b_fuma': 'Hábito de Fumar',
-        'bin__b_come_alimentos_caloricos': 'Consumo de Calóricos',
-        'bin__b_monitora_calorias': 'Monitoramento de Calorias',
-        
-        # --- Categorias: Comer entre Refeições ---
-        'cat__freq_come_fora_refeicao_no': 'Comer entre refeições (Nunca)',
-        'cat__freq_come_fora_refeicao_Sometimes': 'Comer entre refeições (Às vezes)',
-        'cat__freq_come_fora_refeicao_Frequently': 'Comer entre refeições (Frequentemente)',
-        'cat__freq_come_fora_refeicao_Always': 'Comer entre refeições (Sempre)',
-        
-        # --- Categorias: Atividade Física ---
-        'cat__qtd_atv_fisicas_Sedentario': 'Sedentarismo',
-        'cat__qtd_atv_fisicas_Baixa_frequencia': 'Baixa Atividade Física',
-        'cat__qtd_atv_fisicas_Moderada_frequencia': 'Atividade Física Moderada',
-        'cat__qtd_atv_fisicas_Alta_frequencia': 'Alta Atividade Física',
-        
-        # --- Categorias: Água ---
-        'cat__qtd_agua_Baixo_consumo': 'Baixo consumo de água',
-        'cat__qtd_agua_Consumo_adequado': 'Consumo de água (Adequado)',
-        'cat__qtd_agua_Alto_consumo': 'Alto consumo de água',
-        
-        # --- Categorias: Transporte ---
-        'cat__meio_de_transporte_Automobile': 'Uso de Carro',
-        'cat__meio_de_transporte_Public_Transportation': 'Transporte Público',
-        'cat__meio_de_transporte_Motorbike': 'Uso de Moto',
-        'cat__meio_de_transporte_Bike': 'Uso de Bicicleta',
-        'cat__meio_de_transporte_Walking': 'Caminhada',
-
-        # --- Categorias: Refeições (Complementado no mesmo estilo) ---
-        'cat__qtd_refeicao_Tres_refeicoes_principais_por_dia': '3 Refeições principais/dia',
-        'cat__qtd_refeicao_Duas_refeicoes_principais_por_dia': '2 Refeições principais/dia',
-        'cat__qtd_refeicao_Uma_refeicao_principal_por_dia': '1 Refeição principal/dia',
-        'cat__qtd_refeicao_Quatro_ou_mais_refeicoes_principais_por_dia': '4+ Refeições principais/dia',
-        
-        # --- Categorias: Vegetais ---
-        'cat__qtd_vegetais_Sempre': 'Consumo de Vegetais (Sempre)',
-        'cat__qtd_vegetais_As_vezes': 'Consumo de Vegetais (Às vezes)',
-        'cat__qtd_vegetais_Raramente': 'Consumo de Vegetais (Raramente)',
-        
-        # --- Categorias: Telas/Internet ---
-        'cat__qtd_tmp_na_internet_Uso_baixo': 'Tempo em Telas (Baixo)',
-        'cat__qtd_tmp_na_internet_Uso_moderado': 'Tempo em Telas (Moderado)',
-        'cat__qtd_tmp_na_internet_Uso_intenso': 'Tempo em Telas (Intenso)',
-        
-        # --- Categorias: Álcool ---
-        'cat__freq_alcool_no': 'Consumo de Álcool (Não)',
-        'cat__freq_alcool_Sometimes': 'Consumo de Álcool (Às vezes)',
-        'cat__freq_alcool_Frequently': 'Consumo de Álcool (Frequentemente)',
-        'cat__freq_alcool_Always': 'Consumo de Álcool (Sempre)'
-    }
-    
-    nomes_traduzidos = []
-    for nome in lista_nomes_tecnicos:
-        if nome in mapa_nomes:
-            nomes_traduzidos.append(mapa_nomes[nome])
-        else:
-            # Fallback de segurança: Se aparecer algo novo, limpa o nome técnico
-            limpo = nome.replace('num__', '').replace('cat__', '').replace('bin__', '').replace('_', ' ').title()
-            nomes_traduzidos.append(limpo)
-            
-    return nomes_traduzidos
-        
-# Salvar o modelo em cache
-@st.cache_resource 
+    return iniciar_aquecimento()
+
+# Criar o gerenciador de versões do modelo
+@st.cache_resource
+
+def _get_versoes():
+
+    """
+    Cria, uma única vez por processo, o gerenciador de versões: a versão inicial vem do aquecimento e a
+    observação da pasta models/ carrega e troca novas versões sem reiniciar o app (obesidade.recarga).
+    """
+
+    aquecimento = _get_aquecimento()
+    versoes = GerenciadorVersoes()
+
+    modelo = aquecimento.obter('modelo')
+    if modelo is not None:
+        versoes.publicar(VersaoModelo(
+            modelo, aquecimento.obter('explicador'), aquecimento.obter('metadados'), aquecimento.obter('motor'),
+            origem='aquecimento', vizinhos=aquecimento.obter('vizinhos')
+        ))
+
+    return versoes.observar()
 
 # Carregar o modelo
 def load_model():
 
     """
-    Carrega o modelo treinado (.joblib) localmente ou via GitHub
+    Retorna a versão ativa do modelo (aguarda o aquecimento, se ainda em andamento).
+    A versão é trocada em segundo plano quando um novo .joblib é publicado em models/; a execução guarda
+    a versão obtida aqui, e os recursos dela continuam acessíveis pelo modelo até o fim da execução.
     """
 
-    # Tentativa Local
-    try:
-        return joblib.load('modelo_risco_obesidade_random_forest.joblib')
-    except FileNotFoundError:
-        pass
+    return _get_versoes().ativa
+
+# Obter a versão de um modelo
+def _get_versao(model):
+    versao = _get_versoes().versao_de(model)
+    if versao is None:
+        raise ValueError("O modelo informado não pertence a nenhuma versão carregada")
+
+    return versao
+
+# Obter o explicador do SHAP
+def _get_shap_explainer(model):
+
+    """
+    Explicador do SHAP da versão do modelo (criado em segundo plano, no aquecimento ou na recarga).
+    O SHAP só é importado aqui se o explicador não tiver sido criado; ele passa então a fazer parte da versão.
+    """
+
+    versao = _get_versao(model)
+    if versao.explicador is None:
+        import shap
+
+        versao.explicador = shap.TreeExplainer(model.named_steps['clf'])
+
+    return versao.explicador
+
+# Obter o motor de inferência
+def _get_motor_compilado(model):
+
+    """
+    Motor memory-mapped do cache de artefatos ou Pipeline compilado em vetores NumPy
+    para inferência rápida (None se não for suportado), preparado junto com a versão do modelo.
+    """
+
+    return _get_versao(model).motor
+
+# Obter os metadados do modelo
+def _get_metadados(model):
+
+    """
+    Nomes das features, rótulos em Português, importâncias ordenadas e valor esperado do SHAP,
+    calculados uma única vez por versão do modelo.
+    """
+
+    versao = _get_versao(model)
+    if versao.metadados is None:
+        from obesidade.modelo import carregar_metadados
+
+        versao.metadados = carregar_metadados(model, _get_shap_explainer(model), versao.sha256)
+
+    return versao.metadados
+
+# Carregar o índice populacional de SHAP
+@st.cache_resource
+
+def _get_indice_populacao(_model, sha256):
+
+    """
+    Carrega o índice offline (python -m obesidade.populacao), uma vez por versão do modelo.
+    Retorna None se o arquivo não existir ou tiver sido gerado para outro modelo.
+    """
 
-    # Tentativa Remota (GitHub)
-    url_modelo = "https://github.com/RicardViana/fiap-data-viz-and-production-models-tc/raw/refs/heads/main/models/modelo_risco_obesidade_random_forest.joblib"
-    
     try:
-        response = requests.get(url_modelo)
-        if response.status_code == 200:
-            return joblib.load(io.BytesIO(response.content))
-    except Exception:
-        pass
-    
-    return None
+        indice = IndicePopulacao.carregar()
+    except (OSError, KeyError, ValueError):
+        return None
+
+    if indice.modelo_sha256 and sha256 and indice.modelo_sha256 != sha256:
+        return None
+
+    return indice
+
+# Obter o índice de casos semelhantes
+def _get_indice_vizinhos(model):
+
+    """
+    Índice de vizinhos da versão do modelo (models/cache/<sha256>/vizinhos/), carregado ou construído em
+    segundo plano (aquecimento ou recarga) e relido quando o manifesto muda (casos adicionados pela CLI).
+    Retorna None se o índice não estiver disponível.
+    """
+
+    versao = _get_versao(model)
+    versao.vizinhos = atualizar_indice(versao.vizinhos, versao.sha256)
 
-# Criar e cachear o SHAPE
+    return versao.vizinhos
+
+# Obter o cache de resultados (compartilhado entre sessões)
+def _get_cache_resultados():
+
+    """
+    Cache de predições e explicações SHAP, único para o processo (obesidade.cache), também acessível
+    ao teste de carga, que o limpa ou desliga a cada estágio.
+    """
+
+    return obter_cache()
+
+# Criar o pool de explicações em segundo plano (compartilhado entre sessões)
 @st.cache_resource
 
-def _get_shap_explainer(_classifier):
+def _get_tarefas():
 
     """
-    Cria e cacheia o explicador do SHAP (que é pesado de inicializar).
+    Cria o gerenciador de tarefas do SHAP, único para o processo (pool limitado e deduplicação por chave).
     """
 
-    return shap.TreeExplainer(_classifier)
+    return GerenciadorTarefas()
 
 # Configurar o barre lateral
 def configurar_sidebar():
@@ -195,48 +245,84 @@ def configurar_sidebar():
         st.markdown("Acesse o repositório completo do projeto:")
         st.link_button("🔗 Ver no GitHub", "https://github.com/RicardViana/fiap-data-viz-and-production-models-tc")
 
-# Gerar SHAP
-def gerar_explicacao_shap(model, input_df):
+# Calcular SHAP
+def calcular_explicacao_shap(model, input_df):
 
     """
-    Processa os dados e gera o gráfico SHAP Waterfall.
+    Calcula os valores SHAP da classe positiva para a linha informada (sem gerar o gráfico).
     """
 
-    # 1. Recupera os passos do Pipeline
-    preprocessor = model.named_steps['preprocess']
-    classifier = model.named_steps['clf']
-
-    # 2. Transforma os dados de entrada (Texto -> Números)
+    # 1. Transforma os dados de entrada (Texto -> Números)
     # O SHAP precisa receber os dados exatamente como o modelo recebe
-    input_transformed = preprocessor.transform(input_df)
+    input_transformed = transformar_entrada_shap(model, input_df)
 
-    # 3. Recupera os nomes técnicos das colunas e traduz
-    feature_names_raw = preprocessor.get_feature_names_out()
-    feature_names_pt = traduzir_nomes_features(feature_names_raw)
+    # 2. Recupera o explicador do classificador
+    with etapa('shap_explainer'):
+        explainer = _get_shap_explainer(model)
 
-    df_mapeamento = pd.DataFrame({
-        'Nome Técnico (Raw)': feature_names_raw,
-        'Nome Traduzido': feature_names_pt,  
-        'Valor Inputado': input_transformed[0]
-    })
+    # 3. Calcula os valores SHAP
+    with etapa('shap_calculo'):
+        return calcular_valores_shap(explainer, input_transformed)
+
+# Transformar a entrada para o SHAP
+def transformar_entrada_shap(model, input_df):
+    with etapa('shap_preprocessamento'):
+        return model.named_steps['preprocess'].transform(input_df)
 
-    # 4. Calcula os valores SHAP
-    explainer = _get_shap_explainer(classifier)
+# Calcular os valores SHAP da entrada transformada
+def calcular_valores_shap(explainer, input_transformed):
+
+    """
+    Executa o TreeExplainer. Não chama o Streamlit, então pode rodar no pool de segundo plano.
+    """
 
     # [:, :, 1] foca na classe positiva (Risco de Obesidade = 1)
-    shap_values = explainer(input_transformed)
+    shap_values = explainer(input_transformed)[0, :, 1]
+
+    return {
+        'valores': np.asarray(shap_values.values),
+        'dados': np.asarray(input_transformed[0])
+    }
 
-    # 5. Aplica os nomes traduzidos ao objeto SHAP
-    shap_values.feature_names = feature_names_pt
+# Mapear nomes técnicos, traduções e valores da entrada
+def mapear_variaveis(model, dados):
+    metadados = _get_metadados(model)
 
-    # 6. Gera o gráfico
-    # Ajustamos o tamanho da figura para ficar bem no layout wide
-    fig, ax = plt.subplots(figsize=(10, 6))
+    return pd.DataFrame({
+        'Nome Técnico (Raw)': metadados.nomes_tecnicos,
+        'Nome Traduzido': metadados.rotulos,
+        'Valor Inputado': dados
+    })
 
-    # max_display=10 mostra apenas os 10 fatores mais importantes para não poluir
-    shap.plots.waterfall(shap_values[0, :, 1], show=False, max_display=10)
-    
-    return plt.gcf(), df_mapeamento
+# Gerar SHAP
+def gerar_explicacao_shap(model, input_df, explicacao=None):
+
+    """
+    Processa os dados e gera o gráfico SHAP Waterfall.
+    Quando a explicação já foi calculada (cache), apenas o gráfico é gerado.
+    Retorna uma especificação Vega-Lite ou uma figura do matplotlib, conforme modo_grafico_shap.
+    """
+
+    # 1. Calcula os valores SHAP, se ainda não vieram do cache
+    if explicacao is None:
+        explicacao = calcular_explicacao_shap(model, input_df)
+
+    # 2. Recupera as traduções das colunas e o valor esperado do SHAP (metadados calculados na carga do modelo)
+    metadados = _get_metadados(model)
+    feature_names_pt = metadados.rotulos
+    valor_base = metadados.valor_esperado
+    df_mapeamento = mapear_variaveis(model, explicacao['dados'])
+
+    # 3. Gera o gráfico (max_display=10 mostra apenas os 10 fatores mais importantes para não poluir)
+    with etapa('grafico_montagem'):
+        if modo_grafico_shap.lower() == 'matplotlib':
+            grafico = grafico_waterfall_matplotlib(
+                explicacao['valores'], valor_base, feature_names_pt, explicacao['dados'], max_display=10
+            )
+        else:
+            grafico = especificacao_waterfall(explicacao['valores'], valor_base, feature_names_pt, max_display=10)
+
+    return grafico, df_mapeamento
 
 # Coletar os dados do questionario
 def get_user_input_features():
@@ -253,14 +339,14 @@ def get_user_input_features():
     
     with col1:
         idade = st.number_input("Idade", min_value=10, max_value=100, value=25)
-        altura = st.number_input("Altura (m)", min_value=1.0, max_value=2.5, value=1.70)
+        altura = st.number_input("Altura (m)", min_value=1.0, max_value=2.5, value=1.70, key='altura')
     
     with col2:
         genero_label = st.selectbox("Gênero", ordenar_opcoes(["Masculino", "Feminino"]))
-        peso = st.number_input("Peso (kg)", min_value=30.0, max_value=200.0, value=70.0)
+        peso = st.number_input("Peso (kg)", min_value=30.0, max_value=200.0, value=70.0, key='peso')
 
     # Cálculo de IMC e Gênero
-    imc = int(np.ceil(peso / (altura ** 2)))
+    imc = int(calcular_imc(peso, altura))
     genero = 1 if genero_label == "Feminino" else 0
     
     if imc < 18.5:
@@ -422,70 +508,227 @@ def exibir_importancia_variaveis(model):
     Extrai, formata e exibe as 3 variáveis mais importantes para o modelo.
     """
 
-    # Acessar os passos do Pipeline
-    # 'preprocess' é o nome do ColumnTransformer e 'clf' é o classificador
-    preprocessor = model.named_steps['preprocess']
-    classifier = model.named_steps['clf']
-
-    # Obter os nomes das features transformadas (OneHot + Numéricas)
-    feature_names = preprocessor.get_feature_names_out()
-    
-    # Obter os valores de importância
-    importances = classifier.feature_importances_
-
-    # Criar um DataFrame para organizar
-    df_imp = pd.DataFrame({'feature': feature_names, 'importance': importances})
-    df_imp = df_imp.sort_values('importance', ascending=False).head(3)
-
-    # Dicionário para traduzir os nomes técnicos ("feature names") para Português legível
-    dicionario_traducao = {
-        'num__imc': 'Índice de Massa Corporal (IMC)',
-        'num__idade': 'Idade',
-        'bin__b_historico_familiar': 'Histórico Familiar',
-        'bin__genero': 'Gênero',
-        'bin__b_come_alimentos_caloricos': 'Consumo de Calóricos',
-        'bin__b_fuma': 'Hábito de Fumar',
-        'bin__b_monitora_calorias': 'Monitoramento de Calorias',
-        'cat__freq_come_fora_refeicao_Frequently': 'Comer entre refeições (Frequentemente)',
-        'cat__freq_come_fora_refeicao_Sometimes': 'Comer entre refeições (Às vezes)',
-        'cat__freq_come_fora_refeicao_Always': 'Comer entre refeições (Sempre)',
-        'cat__qtd_atv_fisicas_Sedentario': 'Sedentarismo',
-        'cat__qtd_atv_fisicas_Baixa_frequencia': 'Baixa Atividade Física',
-        'cat__qtd_atv_fisicas_Moderada_frequencia': 'Atividade Física Moderada',
-        'cat__qtd_agua_Baixo_consumo': 'Baixo consumo de água',
-        'cat__meio_de_transporte_Automobile': 'Uso de Carro',
-        'cat__meio_de_transporte_Public_Transportation': 'Transporte Público'
-    }
-
-    # Função para limpar o nome
-    def limpar_nome(nome_tecnico):
-        if nome_tecnico in dicionario_traducao:
-            return dicionario_traducao[nome_tecnico]
-        
-        nome_limpo = nome_tecnico.replace('num__', '').replace('cat__', '').replace('bin__', '')
-        return nome_limpo.replace('_', ' ').title()
-
-    # Aplicar a tradução
-    df_imp['nome_exibicao'] = df_imp['feature'].apply(limpar_nome)
+    # As 3 maiores importâncias globais já vêm ordenadas e traduzidas nos metadados do modelo
+    principais = _get_metadados(model).principais_importancias(3)
 
     # Exibição no Streamlit
     st.markdown("### 📊 Fatores de Maior Peso")
     st.markdown("As 3 principais variáveis que o modelo considerou para esta análise global:")
 
-    for i, row in df_imp.iterrows():
-        st.write(f"**{row['nome_exibicao']}**")
-        st.progress(int(row['importance'] * 100))
-        st.caption(f"Impacto no modelo: {row['importance']*100:.1f}%")
+    for _, nome_exibicao, importancia in principais:
+        st.write(f"**{nome_exibicao}**")
+        st.progress(int(importancia * 100))
+        st.caption(f"Impacto no modelo: {importancia*100:.1f}%")
 
-# Função princial
-def main():
-    # 1. Configura a Barra Lateral
-    configurar_sidebar()
+# Exibir a explicação SHAP
+def exibir_explicacao(model, input_df, explicacao, probabilidade):
 
-    # 2. Carrega o Modelo
-    model = load_model()
+    """
+    Renderiza o gráfico de fatores de influência, a legenda e a comparação com a população
+    """
+
+    grafico_shap, _ = gerar_explicacao_shap(model, input_df, explicacao)
+
+    with etapa('grafico_renderizacao'):
+        if modo_grafico_shap.lower() == 'matplotlib':
+            st.pyplot(grafico_shap)
+        else:
+            st.vega_lite_chart(spec=grafico_shap, width='stretch')
+
+    st.markdown("""
+    **Legenda do Gráfico:**  
+    - **Eixo X:** Probabilidade de Risco.  
+    - **Barras Vermelhas:** Fatores que "empurram" o risco para cima.  
+    - **Barras Azuis:** Fatores que "seguram" o risco para baixo.  
+    """)
+
+    # Contexto populacional (índice offline de SHAP)
+    indice = _get_indice_populacao(model, _get_metadados(model).sha256)
+    if indice is not None:
+        with etapa('contexto_populacional'):
+            exibir_contexto_populacional(indice, probabilidade, explicacao['valores'], _get_metadados(model))
+
+# Acompanhar a explicação calculada em segundo plano
+@st.fragment(run_every=EXPLICACAO_INTERVALO_S)
+
+def acompanhar_explicacao(tarefa, chave, inicio, id_requisicao=None):
+
+    """
+    Consulta a tarefa do pool de explicações sem esperar por ela: o navegador reexecuta apenas este trecho
+    a cada EXPLICACAO_INTERVALO_S. Quando a tarefa termina (ou a espera passa de EXPLICACAO_TIMEOUT_S), o desfecho
+    é guardado na sessão e a página é reexecutada para exibir o resultado completo, o que encerra a consulta.
+    """
+
+    if not tarefa.pronta():
+        if time.perf_counter() - inicio <= EXPLICACAO_TIMEOUT_S:
+            st.caption("Calculando impactos detalhados...")
+            return
+
+        # A tarefa só é cancelada se ainda estiver na fila e nenhuma outra sessão aguardar o mesmo cálculo;
+        # em execução, ela termina em segundo plano e o resultado fica no cache
+        if _get_tarefas().abandonar(tarefa):
+            desfecho = {'aviso': "⏱️ A explicação demorou mais que o esperado e foi cancelada antes de começar. Realize a predição novamente para tentar outra vez."}
+        else:
+            desfecho = {'aviso': "⏱️ A explicação está demorando mais que o esperado e deixou de ser aguardada nesta página, mas o cálculo continua em segundo plano. Realize a predição novamente em instantes para vê-la."}
+
+    else:
+        try:
+            desfecho = {'shap': tarefa.resultado()}
+        except Exception as e:
+            desfecho = {'erro': f"Não foi possível calcular a explicação: {e}"}
+
+        # Métricas da explicação em um registro próprio, ligado à requisição principal pelo identificador
+        rastreamento = iniciar_rastreamento(ativo=registrar_metricas.lower() == 's', tipo='explicacao', requisicao=id_requisicao)
+        if rastreamento is not None:
+            for nome, duracao in tarefa.tempos_ms().items():
+                rastreamento.registrar(f'shap_{nome}', duracao)
+        finalizar_rastreamento(rastreamento)
+
+    st.session_state['explicacao_concluida'] = {'chave': chave, **desfecho}
+    st.rerun()
+
+# Comparar o paciente com a população
+def exibir_contexto_populacional(indice, probabilidade, valores_shap, metadados, top_n=5):
+
+    """
+    Mostra o percentil do risco e das principais contribuições SHAP do paciente na população de referência
+    (busca binária no índice calculado offline, sem novo cálculo de SHAP)
+    """
+
+    percentil = indice.percentil_risco(probabilidade)
+    percentis = indice.percentis_contribuicoes(valores_shap)
+    principais = np.argsort(-np.abs(valores_shap))[:top_n]
+
+    st.subheader("📍 Comparação com a População")
+    st.metric(label="Percentil do risco na população de referência", value=f"{percentil:.0f}º")
+    st.write(f"O risco deste paciente é maior ou igual ao de **{percentil:.0f}%** das {indice.linhas} pessoas da base de referência.")
+
+    st.dataframe(
+        pd.DataFrame({
+            'Fator': [metadados.rotulos[i] for i in principais],
+            'Contribuição': [f"{valores_shap[i]:+.3f}" for i in principais],
+            'Mediana na população': [f"{indice.medianas[i]:+.3f}" for i in principais],
+            'Percentil': [f"{percentis[i]:.0f}º" for i in principais]
+        }),
+        width='stretch',
+        hide_index=True
+    )
+
+# Mostrar os casos históricos mais parecidos
+def exibir_casos_semelhantes(indice, dados_transformados, k=5):
+
+    """
+    Lista os k casos da base mais próximos do paciente no espaço de features do modelo e o nível de obesidade de cada um
+    """
+
+    casos = indice.consultar_transformado(dados_transformados, k)
+
+    st.subheader("👥 Casos Semelhantes")
+    st.write(f"Os {len(casos)} pacientes da base de referência ({indice.linhas} casos) com respostas mais parecidas:")
+
+    st.dataframe(
+        pd.DataFrame({
+            'Idade': casos['idade'],
+            'Gênero': np.where(casos['genero'] == 1, 'Feminino', 'Masculino'),
+            'IMC': casos['imc'],
+            'Nível de obesidade': casos['nivel_de_obesidade'].map(ROTULOS_NIVEL).fillna(casos['nivel_de_obesidade']),
+            'Distância': casos['distancia'].round(3)
+        }),
+        width='stretch',
+        hide_index=True
+    )
+
+# Simular cenários (e se...?)
+@st.fragment
+
+def exibir_simulacao(model, motor, input_df):
+
+    """
+    Mostra como o risco mudaria variando uma ou duas respostas do formulário (demais respostas mantidas).
+    Toda a grade de cenários é pontuada em uma única chamada ao modelo.
+    """
+
+    st.header("5. Simulação de Cenários")
+
+    if not st.toggle("Simular alterações nas respostas (e se...?)"):
+        return
+
+    opcoes = list(VARIAVEIS_CENARIO.keys())
+
+    col_s1, col_s2 = st.columns(2)
+
+    with col_s1:
+        eixo_x = st.selectbox("Variável simulada", options=opcoes, format_func=VARIAVEIS_CENARIO.get)
+
+    with col_s2:
+        eixo_cor = st.selectbox(
+            "Comparar com (opcional)",
+            options=['nenhuma'] + [opcao for opcao in opcoes if opcao != eixo_x],
+            format_func=lambda opcao: VARIAVEIS_CENARIO.get(opcao, 'Nenhuma')
+        )
+
+    # Valores atuais do formulário (o peso não faz parte do DataFrame do modelo)
+    valores_atuais = {**input_df.iloc[0].to_dict(), 'peso': st.session_state['peso']}
+
+    eixos = {eixo_x: valores_variavel(eixo_x, valores_atuais[eixo_x])}
+    if eixo_cor != 'nenhuma':
+        eixos[eixo_cor] = valores_variavel(eixo_cor, valores_atuais[eixo_cor])
+
+    inicio = time.perf_counter()
+    grade = pontuar_cenarios(model, input_df, eixos, altura=st.session_state['altura'], motor=motor)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
 
-    # 3. Corpo Principal
+    # Rótulos em Português para o gráfico
+    for variavel in eixos:
+        grade[variavel] = [rotulo_valor(variavel, valor) for valor in grade[variavel]]
+
+    ordem_x = None if eixo_x in ('peso', 'idade') else [rotulo_valor(eixo_x, valor) for valor in eixos[eixo_x]]
+
+    especificacao = especificacao_cenarios(
+        grade[list(eixos) + ['probabilidade_risco']],
+        campo_x=eixo_x,
+        titulo_x=VARIAVEIS_CENARIO[eixo_x],
+        campo_cor=eixo_cor if eixo_cor != 'nenhuma' else None,
+        titulo_cor=VARIAVEIS_CENARIO.get(eixo_cor),
+        ordem_x=ordem_x,
+        valor_atual=valores_atuais[eixo_x] if ordem_x is None else None
+    )
+
+    st.vega_lite_chart(spec=especificacao, width='stretch')
+    st.caption(f"{len(grade)} cenários calculados em {duracao_ms:.1f} ms (linha tracejada: limiar de 50%).")
+
+# Exibir as versões do modelo
+def exibir_versoes(versoes):
+
+    """
+    Versão ativa, candidata e comparação sombra, com a promoção ou o descarte manual da candidata
+    """
+
+    st.markdown("---")
+    with st.expander("Versões do modelo (recarga e comparação sombra)"):
+        st.json(versoes.estado())
+
+        if versoes.candidata is not None:
+            col1, col2 = st.columns(2)
+            if col1.button("⬆️ Promover candidata", use_container_width=True):
+                versoes.promover()
+                st.rerun()
+            if col2.button("🗑️ Descartar candidata", use_container_width=True):
+                versoes.descartar_candidata()
+                st.rerun()
+
+# Exibir a página
+def exibir_pagina(rastreamento):
+
+    """
+    Monta a página completa (formulário, predição, simulação e versões) de uma execução do script
+    """
+
+    # 1. Inicia o aquecimento em segundo plano (bibliotecas pesadas, modelo, SHAP e motor) e configura a Barra Lateral
+    _get_aquecimento()
+    configurar_sidebar()
+
+    # 2. Corpo Principal (exibido enquanto o modelo ainda carrega na primeira execução)
     st.title("🩺 Análise de Risco de Obesidade")
     st.markdown("""
     Preencha o formulário abaixo com os dados do paciente.
@@ -493,17 +736,80 @@ def main():
     """)
     st.markdown("---")
 
-    # 4. Formulário
-    input_df = get_user_input_features()
+    # 3. Formulário
+    with etapa('montar_entrada'):
+        input_df = get_user_input_features()
+
+    # 4. Carrega o Modelo (aguarda o aquecimento apenas se ainda estiver em andamento)
+    with etapa('carregar_modelo'):
+        versao = load_model()
+        model = versao.modelo if versao is not None else None
+        motor = _get_motor_compilado(model) if model is not None and usar_motor_compilado.lower() == 's' else None
+        if model is not None:
+            _get_metadados(model)
 
     # 5. Botão e Predição
     st.markdown("###")
-    
-    if st.button("🔍 Realizar Predição", type="primary", use_container_width=True):
+
+    clicou = st.button("🔍 Realizar Predição", type="primary", use_container_width=True)
+    if rastreamento is not None:
+        rastreamento.atributos['predicao'] = clicou
+
+    # Desfecho da explicação em segundo plano: a página é reexecutada uma vez para exibir o resultado completo
+    # (apenas se as respostas e a versão do modelo ainda forem as mesmas da predição)
+    concluida = st.session_state.pop('explicacao_concluida', None)
+    reexibicao = (
+        not clicou and concluida is not None and model is not None
+        and concluida['chave'] == (_get_metadados(model).sha256, normalizar_chave(input_df))
+    )
+
+    if clicou or reexibicao:
         if model is not None:
             try:
-                prediction = model.predict(input_df)
-                probability = model.predict_proba(input_df)
+                # Reaproveita predição e SHAP de respostas idênticas (cache do processo, por versão do modelo)
+                cache = _get_cache_resultados()
+                chave = (_get_metadados(model).sha256, normalizar_chave(input_df))
+                resultado = cache.obter(chave)
+                acompanhamento = None
+
+                if resultado is None:
+                    with etapa('inferencia'):
+                        inicio_inferencia = time.perf_counter()
+                        prediction, probability = prever(model, input_df, motor)
+                        latencia_inferencia = (time.perf_counter() - inicio_inferencia) * 1000
+                    with etapa('sombra'):
+                        _get_versoes().sombrear(input_df, prediction[0], probability[0][1], latencia_inferencia)
+                    resultado = {'classe': np.asarray(prediction), 'probabilidade': np.asarray(probability)}
+                    cache.guardar(chave, resultado)
+
+                # Monitor de drift: toda predição conta, inclusive as servidas pelo cache de resultados
+                # (a reexibição não é uma nova predição)
+                if not reexibicao:
+                    with etapa('drift'):
+                        observar(input_df)
+
+                if rastreamento is not None:
+                    rastreamento.atributos['cache_predicao'] = 'falha' if 'inferencia' in dict(rastreamento.etapas) else 'acerto'
+                    rastreamento.atributos['reexibicao'] = reexibicao
+
+                if reexibicao and 'shap' in concluida:
+                    resultado = {**resultado, 'shap': concluida['shap']}
+
+                prediction, probability = resultado['classe'], resultado['probabilidade']
+
+                # Auditoria: a predição entra na fila de gravação (os fatores SHAP entram quando calculados).
+                # Na reexibição, a predição e a explicação já foram registradas.
+                id_auditoria = None
+                if registrar_auditoria.lower() == 's' and not reexibicao:
+                    with etapa('auditoria'):
+                        metadados = _get_metadados(model)
+                        id_auditoria = obter_auditoria().registrar_predicao(
+                            dict(zip(input_df.columns, input_df.to_numpy(dtype=object)[0])),
+                            prediction[0],
+                            probability[0][1],
+                            metadados.sha256,
+                            principais_fatores(resultado['shap']['valores'], metadados) if 'shap' in resultado else None
+                        )
 
                 st.markdown("---")
                 st.header("Resultado da Análise")
@@ -522,16 +828,62 @@ def main():
                 st.header("Fatores de Influência (Explicabilidade)")
                 st.write("Entenda quais fatores específicos deste paciente **aumentaram (Vermelho)** ou **diminuíram (Azul)** o risco.")
                 
-                with st.spinner("Calculando impactos detalhados..."):
-                    fig_shap, df_map = gerar_explicacao_shap(model, input_df)
-                    st.pyplot(fig_shap)
-                    
-                    st.markdown("""
-                    **Legenda do Gráfico:**  
-                    - **Eixo X:** Probabilidade de Risco.  
-                    - **Barras Vermelhas:** Fatores que "empurram" o risco para cima.  
-                    - **Barras Azuis:** Fatores que "seguram" o risco para baixo.  
-                    """)
+                if 'shap' in resultado:
+                    # Explicação já calculada (cache)
+                    dados_transformados = resultado['shap']['dados']
+                    exibir_explicacao(model, input_df, resultado['shap'], probability[0][1])
+
+                elif reexibicao:
+                    # Explicação não mais aguardada (tempo limite) ou com erro
+                    if 'aviso' in concluida:
+                        st.warning(concluida['aviso'])
+                    else:
+                        st.error(concluida['erro'])
+                    dados_transformados = np.asarray(transformar_entrada_shap(model, input_df)[0])
+
+                elif explicacao_assincrona.lower() == 's':
+                    # Explicação no pool de segundo plano; a página segue sem esperar o SHAP (consulta periódica)
+                    input_transformed = transformar_entrada_shap(model, input_df)
+                    dados_transformados = np.asarray(input_transformed[0])
+
+                    tarefa = _get_tarefas().submeter(
+                        chave,
+                        calcular_valores_shap,
+                        _get_shap_explainer(model),
+                        input_transformed,
+                        ao_concluir=lambda explicacao, resultado=resultado: cache.guardar(chave, {**resultado, 'shap': explicacao})
+                    )
+
+                    if tarefa is None:
+                        st.warning("⏳ Muitas explicações em andamento no momento. Realize a predição novamente em alguns segundos.")
+                    else:
+                        # A consulta é iniciada por último (ao concluir, ela reexecuta a página), nesta posição
+                        area_explicacao = st.container()
+                        acompanhamento = (tarefa, chave, time.perf_counter(), getattr(rastreamento, 'id', None))
+
+                        if id_auditoria is not None:
+                            tarefa.ao_concluir(
+                                lambda explicacao, id_auditoria=id_auditoria, metadados=metadados: obter_auditoria().registrar_explicacao(
+                                    id_auditoria, principais_fatores(explicacao['valores'], metadados)
+                                )
+                            )
+
+                else:
+                    with st.spinner("Calculando impactos detalhados..."):
+                        resultado = {**resultado, 'shap': calcular_explicacao_shap(model, input_df)}
+                        cache.guardar(chave, resultado)
+
+                    if id_auditoria is not None:
+                        obter_auditoria().registrar_explicacao(id_auditoria, principais_fatores(resultado['shap']['valores'], metadados))
+
+                    dados_transformados = resultado['shap']['dados']
+                    exibir_explicacao(model, input_df, resultado['shap'], probability[0][1])
+
+                # Casos semelhantes (índice de vizinhos da versão do modelo)
+                indice_vizinhos = _get_indice_vizinhos(model)
+                if indice_vizinhos is not None:
+                    with etapa('casos_semelhantes'):
+                        exibir_casos_semelhantes(indice_vizinhos, dados_transformados)
 
                 # Validar SHAP
                 if validar_shap.lower() == 's':
@@ -542,19 +894,79 @@ def main():
 
                     with st.expander("Clique aqui para ver"):
                         st.dataframe(
-                            df_map.sort_values(by='Nome Técnico (Raw)'), 
+                            mapear_variaveis(model, dados_transformados).sort_values(by='Nome Técnico (Raw)'), 
                             width='stretch',
                             hide_index=True
                         )
 
+                    with st.expander("Estatísticas do cache de resultados"):
+                        st.json(cache.estatisticas())
+
+                    with st.expander("Estatísticas do pool de explicações"):
+                        st.json(_get_tarefas().estatisticas())
+
+                    with st.expander("Tempo de inicialização (aquecimento)"):
+                        st.json(_get_aquecimento().estado())
+
+                    with st.expander("Estatísticas da auditoria"):
+                        st.json(obter_auditoria().estatisticas())
+
+                    with st.expander("Drift das entradas (desde o início do processo)"):
+                        st.dataframe(obter_monitor().relatorio(), width='stretch', hide_index=True)
+
+                    if rastreamento is not None:
+                        with st.expander("Tempo por etapa desta predição"):
+                            st.dataframe(
+                                pd.DataFrame(rastreamento.etapas, columns=['Etapa', 'Tempo (ms)']),
+                                width='stretch',
+                                hide_index=True
+                            )
+                            st.caption(f"Total: {rastreamento.total_ms():.1f} ms")
+
+                # Consulta periódica da explicação em segundo plano
+                if acompanhamento is not None:
+                    with area_explicacao:
+                        acompanhar_explicacao(*acompanhamento)
+
                 # Exibição as principiais variaveis
                 #st.markdown("---")
                 #exibir_importancia_variaveis(model)
             
             except Exception as e:
+                if rastreamento is not None:
+                    rastreamento.atributos['erro'] = type(e).__name__
                 st.error(f"Ocorreu um erro técnico ao realizar a predição: {e}")
         else:
             st.error("⚠️ O modelo de Inteligência Artificial não foi carregado corretamente. Verifique os arquivos.")
+
+    # 6. Simulação de cenários (reexecuta apenas este trecho ao trocar as variáveis simuladas)
+    if model is not None:
+        st.markdown("---")
+        exibir_simulacao(model, motor, input_df)
+
+    # 7. Versões do modelo (recarga sem reinício e comparação da candidata)
+    if validar_shap.lower() == 's':
+        exibir_versoes(_get_versoes())
+
+# Função princial
+def main():
+
+    """
+    Executa a página e grava as métricas da execução no arquivo rotativo, com ou sem predição e mesmo
+    quando ela falha (atributo 'erro')
+    """
+
+    # 0. Inicia a medição de tempo das etapas desta execução
+    rastreamento = iniciar_rastreamento(ativo=registrar_metricas.lower() == 's', motor=usar_motor_compilado, grafico=modo_grafico_shap)
+
+    try:
+        exibir_pagina(rastreamento)
+    except Exception as e:
+        if rastreamento is not None:
+            rastreamento.atributos['erro'] = type(e).__name__
+        raise
+    finally:
+        finalizar_rastreamento(rastreamento)
             
 if __name__ == "__main__":
     main()
\ No newline at end of file
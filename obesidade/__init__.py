@@ -0,0 +1,3 @@
+"""
+Módulos de suporte ao modelo de risco de obesidade (pontuação em lote, utilitários de features e carga do modelo).
+"""
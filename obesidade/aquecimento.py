@@ -0,0 +1,295 @@
+"""
+Aquecimento em segundo plano e perfil de inicialização (cold start).
+
+O app não importa o SHAP nem carrega o modelo no topo do script: na primeira execução, uma thread
+do processo carrega, em ordem, as bibliotecas pesadas, o modelo, o explicador do SHAP, os metadados,
+o motor compilado, o índice de casos semelhantes e o perfil de referência do monitor de drift. As sessões obtêm cada recurso com
+obter(nome), esperando apenas o que ainda não estiver pronto, enquanto o formulário já é exibido. O tempo de cada etapa é gravado no arquivo de
+métricas (tipo 'aquecimento'), para acompanhar regressões de inicialização.
+
+O modo de perfil mede, em um processo novo, o tempo de importação de cada módulo do app
+(python -X importtime) e, em seguida, o tempo de cada etapa do aquecimento.
+
+Uso:
+    python -m obesidade.aquecimento --perfil
+    python -m obesidade.aquecimento --perfil --top 30 --saida reports/perfil_inicio.json
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import importlib
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# Importar biblioteca completa - projeto
+from obesidade.config import PROJ_ROOT
+from obesidade.instrumentacao import etapa, finalizar_rastreamento, iniciar_rastreamento
+
+# Bibliotecas pesadas carregadas antes do modelo (na ordem de uso)
+MODULOS_PESADOS = ['joblib', 'sklearn.ensemble', 'imblearn.pipeline', 'shap']
+
+# Importar as bibliotecas pesadas
+def _importar(_recursos):
+    tempos = {}
+    for nome in MODULOS_PESADOS:
+        inicio = time.perf_counter()
+        importlib.import_module(nome)
+        tempos[nome] = (time.perf_counter() - inicio) * 1000
+
+    return tempos
+
+# Carregar o modelo
+def _modelo(_recursos):
+    from obesidade.modelo import carregar_modelo
+
+    return carregar_modelo()
+
+# Criar o explicador do SHAP
+def _explicador(recursos):
+    import shap
+
+    modelo = recursos['modelo']
+    return shap.TreeExplainer(modelo.named_steps['clf']) if modelo is not None else None
+
+# Carregar os metadados do modelo
+def _metadados(recursos):
+    from obesidade.modelo import carregar_metadados, sha256_modelo
+
+    # O hash identifica a versão também quando o modelo não veio do cache (ex.: leitura direta do .joblib)
+    modelo = recursos['modelo']
+    return carregar_metadados(modelo, recursos['explicador'], sha256_modelo(modelo)) if modelo is not None else None
+
+# Carregar ou compilar o motor
+def _motor(recursos):
+    from obesidade.modelo import carregar_motor
+    from obesidade.motor import MotorCompilado
+
+    modelo = recursos['modelo']
+    if modelo is None:
+        return None
+
+    motor = carregar_motor(modelo)
+    if motor is None:
+        try:
+            motor = MotorCompilado.compilar(modelo)
+        except Exception:
+            return None
+
+    # Primeira travessia: importa o numba e compila (ou lê do cache) a função de travessia
+    motor.aquecer()
+
+    return motor
+
+# Carregar ou construir o índice de casos semelhantes
+def _vizinhos(recursos):
+    from obesidade.vizinhos import carregar_indice
+
+    modelo = recursos['modelo']
+    if modelo is None:
+        return None
+
+    metadados = recursos['metadados']
+    return carregar_indice(modelo, metadados.sha256 if metadados is not None else None)
+
+# Carregar o perfil de referência do monitor de drift
+def _drift(_recursos):
+    from obesidade.drift import obter_monitor
+
+    return obter_monitor()
+
+# Etapas do aquecimento (cada uma recebe os recursos já prontos)
+ETAPAS = [
+    ('importacoes', _importar),
+    ('modelo', _modelo),
+    ('explicador', _explicador),
+    ('metadados', _metadados),
+    ('motor', _motor),
+    ('vizinhos', _vizinhos),
+    ('drift', _drift)
+]
+
+class Aquecimento:
+
+    """
+    Executa as etapas em uma thread de fundo; cada recurso fica disponível assim que a sua etapa termina
+    """
+
+    def __init__(self, etapas=ETAPAS, registrar=True):
+        self.etapas = list(etapas)
+        self.registrar = registrar
+
+        self.recursos = {}
+        self.erros = {}
+        self.tempos_ms = {}
+
+        self._prontos = {nome: threading.Event() for nome, _ in self.etapas}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+
+        """
+        Inicia a thread de aquecimento (apenas uma vez)
+        """
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.executar, name='aquecimento', daemon=True)
+                self._thread.start()
+
+        return self
+
+    def executar(self):
+
+        """
+        Executa as etapas em ordem na thread atual, registrando o tempo de cada uma
+        """
+
+        rastreamento = iniciar_rastreamento(ativo=self.registrar, tipo='aquecimento')
+
+        for nome, funcao in self.etapas:
+            inicio = time.perf_counter()
+            try:
+                with etapa(nome):
+                    self.recursos[nome] = funcao(self.recursos)
+            except Exception as e:
+                self.recursos[nome] = None
+                self.erros[nome] = repr(e)
+            finally:
+                self.tempos_ms[nome] = (time.perf_counter() - inicio) * 1000
+                self._prontos[nome].set()
+
+        finalizar_rastreamento(rastreamento)
+
+    def obter(self, nome, timeout=None):
+
+        """
+        Retorna o recurso, esperando a sua etapa (inicia o aquecimento se necessário)
+        """
+
+        self.iniciar()
+        if not self._prontos[nome].wait(timeout):
+            raise TimeoutError(f"O recurso '{nome}' não ficou pronto em {timeout} s")
+
+        return self.recursos[nome]
+
+    def pronto(self, nome):
+        return self._prontos[nome].is_set()
+
+    def estado(self):
+        return {
+            nome: {
+                'pronto': self.pronto(nome),
+                'tempo_ms': round(self.tempos_ms[nome], 1) if nome in self.tempos_ms else None,
+                'erro': self.erros.get(nome)
+            }
+            for nome, _ in self.etapas
+        }
+
+# AQUECIMENTO DO PROCESSO
+_aquecimento = None
+_lock_aquecimento = threading.Lock()
+
+# Iniciar o aquecimento do processo
+def iniciar_aquecimento():
+
+    """
+    Cria (uma única vez por processo) e inicia o aquecimento em segundo plano
+    """
+
+    global _aquecimento
+
+    with _lock_aquecimento:
+        if _aquecimento is None:
+            _aquecimento = Aquecimento()
+
+    return _aquecimento.iniciar()
+
+# Medir o tempo de importação por módulo
+def perfil_importacao(modulo='app', top=20):
+
+    """
+    Importa o módulo em um processo novo com -X importtime e retorna o tempo acumulado de cada import
+    feito diretamente por ele (incluindo as dependências carregadas pela primeira vez nesse import),
+    em ordem decrescente: [(módulo, ms)].
+    """
+
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=PROJ_ROOT, capture_output=True, text=True
+    )
+
+    tempos = Counter()
+    for linha in processo.stderr.splitlines():
+        encontrado = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', linha)
+        if encontrado is None:
+            continue
+
+        acumulado, recuo, nome = int(encontrado.group(1)), len(encontrado.group(2)), encontrado.group(3)
+
+        # Recuo 1: o próprio módulo (total); recuo 3: imports feitos diretamente por ele
+        if recuo == 3:
+            tempos[nome] += acumulado / 1000
+        elif recuo == 1 and nome == modulo:
+            tempos[f'{modulo} (total)'] = acumulado / 1000
+
+    return tempos.most_common(top)
+
+# Medir o tempo de cada etapa do aquecimento
+def perfil_aquecimento():
+
+    """
+    Executa o aquecimento na thread atual (bibliotecas pesadas ainda não importadas neste processo)
+    e retorna o estado das etapas e o tempo de importação de cada biblioteca
+    """
+
+    aquecimento = Aquecimento(registrar=False)
+    aquecimento.executar()
+
+    return aquecimento.estado(), aquecimento.recursos.get('importacoes') or {}
+
+# Função principal
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de inicialização do app (importações e aquecimento)")
+    parser.add_argument('--perfil', action='store_true', help="Mede importações e etapas do aquecimento")
+    parser.add_argument('--modulo', default='app', help="Módulo importado na medição (padrão: app)")
+    parser.add_argument('--top', type=int, default=20, help="Quantidade de módulos listados")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON com o perfil")
+    args = parser.parse_args(argv)
+
+    if not args.perfil:
+        parser.print_help()
+        return
+
+    importacoes = perfil_importacao(args.modulo, args.top)
+    print(f"Importação de '{args.modulo}' (processo novo, tempo acumulado por módulo):")
+    for nome, duracao in importacoes:
+        print(f"  {nome:<40} {duracao:>9.1f} ms")
+
+    etapas, bibliotecas = perfil_aquecimento()
+    print("\nAquecimento (após a importação):")
+    for nome, estado in etapas.items():
+        erro = f"  ERRO: {estado['erro']}" if estado['erro'] else ''
+        print(f"  {nome:<40} {estado['tempo_ms']:>9.1f} ms{erro}")
+    for nome, duracao in bibliotecas.items():
+        print(f"    import {nome:<33} {duracao:>9.1f} ms")
+
+    if args.saida:
+        saida = Path(args.saida)
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        saida.write_text(json.dumps({
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'importacao_ms': dict(importacoes),
+            'aquecimento': etapas,
+            'bibliotecas_ms': bibliotecas
+        }, indent=2), encoding='utf-8')
+        print(f"\nPerfil salvo em: {saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Cache local de artefatos do modelo, endereçado pelo conteúdo (SHA-256), em models/cache/.
+
+Cada versão do modelo fica em models/cache/<sha256>/ com:
+    - modelo.joblib  : Pipeline sem compressão (pode ser aberto com mmap_mode='r')
+    - motor.joblib   : vetores do MotorCompilado sem compressão (memory-mapped e compartilhados entre processos)
+    - metadados.json : nomes das features, rótulos, importâncias e valor esperado do SHAP (MetadadosModelo)
+    - manifesto.json : origem e hashes dos arquivos, verificados a cada carga
+"""
+
+# Importar biblioteca completa - padrão
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - projeto
+from obesidade.config import MODEL_CACHE_DIR, MODEL_FILENAME, MODEL_PATH, MODEL_SHA256, MODEL_URL
+
+# Calcular o hash de um arquivo
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+
+    """
+    Calcula o SHA-256 de um arquivo em blocos
+    """
+
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha.update(bloco)
+
+    return sha.hexdigest()
+
+# Diretório de uma versão no cache
+def diretorio_versao(sha256, raiz=MODEL_CACHE_DIR):
+
+    """
+    Retorna o diretório do cache correspondente ao hash do artefato de origem
+    """
+
+    return Path(raiz) / sha256
+
+# Verificar a integridade de uma versão
+def verificar_versao(diretorio):
+
+    """
+    Confere os hashes registrados no manifesto; retorna o manifesto ou None se a versão estiver incompleta/corrompida
+    """
+
+    caminho_manifesto = Path(diretorio) / 'manifesto.json'
+    if not caminho_manifesto.exists():
+        return None
+
+    manifesto = json.loads(caminho_manifesto.read_text(encoding='utf-8'))
+    for nome, sha256 in manifesto['arquivos'].items():
+        caminho = Path(diretorio) / nome
+        if not caminho.exists() or hash_arquivo(caminho) != sha256:
+            return None
+
+    return manifesto
+
+# Registrar um artefato no cache
+def registrar_artefato(caminho_origem, origem=None, raiz=MODEL_CACHE_DIR):
+
+    """
+    Copia o artefato para o cache (sem compressão), compila o motor e grava o manifesto.
+    Retorna o diretório da versão.
+    """
+
+    import joblib
+
+    from obesidade.metadados import MetadadosModelo
+    from obesidade.motor import MotorCompilado
+
+    sha256 = hash_arquivo(caminho_origem)
+    destino = diretorio_versao(sha256, raiz)
+
+    if verificar_versao(destino) is not None:
+        return destino
+
+    # Monta a versão em um diretório temporário e publica com rename atômico
+    Path(raiz).mkdir(parents=True, exist_ok=True)
+    temporario = Path(tempfile.mkdtemp(prefix='.tmp-', dir=raiz))
+    os.chmod(temporario, 0o755)
+
+    try:
+        model = joblib.load(caminho_origem)
+        joblib.dump(model, temporario / 'modelo.joblib', compress=0)
+
+        arquivos = {'modelo.joblib': hash_arquivo(temporario / 'modelo.joblib')}
+
+        try:
+            joblib.dump(MotorCompilado.compilar(model), temporario / 'motor.joblib', compress=0)
+            arquivos['motor.joblib'] = hash_arquivo(temporario / 'motor.joblib')
+        except ValueError:
+            pass
+
+        try:
+            MetadadosModelo.construir(model, sha256=sha256).salvar(temporario / 'metadados.json')
+            arquivos['metadados.json'] = hash_arquivo(temporario / 'metadados.json')
+        except (ImportError, KeyError, AttributeError):
+            pass
+
+        manifesto = {
+            'sha256_origem': sha256,
+            'origem': str(origem or caminho_origem),
+            'criado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'arquivos': arquivos
+        }
+        (temporario / 'manifesto.json').write_text(json.dumps(manifesto, indent=2), encoding='utf-8')
+
+        if destino.exists():
+            shutil.rmtree(destino, ignore_errors=True)
+
+        try:
+            os.replace(temporario, destino)
+        except OSError:
+            # Outro processo publicou a mesma versão ao mesmo tempo
+            if verificar_versao(destino) is None:
+                raise
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+    return destino
+
+# Baixar o artefato remoto
+def baixar_artefato(url=MODEL_URL, sha256_esperado=MODEL_SHA256, timeout=30, raiz=MODEL_CACHE_DIR):
+
+    """
+    Baixa o artefato do GitHub (com timeout), valida o hash esperado e registra no cache
+    """
+
+    import requests
+
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+
+    sha256 = hashlib.sha256(response.content).hexdigest()
+    if sha256_esperado and sha256 != sha256_esperado:
+        raise ValueError(f"Hash do artefato baixado ({sha256}) difere do esperado ({sha256_esperado})")
+
+    with tempfile.NamedTemporaryFile(suffix='.joblib', delete=False) as arquivo:
+        arquivo.write(response.content)
+
+    try:
+        return registrar_artefato(arquivo.name, origem=url, raiz=raiz)
+    finally:
+        os.unlink(arquivo.name)
+
+# Resolver a versão do modelo
+def resolver_versao(raiz=MODEL_CACHE_DIR, permitir_download=True):
+
+    """
+    Retorna o diretório do cache com o modelo atual, na ordem:
+    artefato local (diretório atual ou models/) -> versão fixada já em cache -> download do GitHub
+    """
+
+    # 1. Artefato local
+    for caminho in (Path(MODEL_FILENAME), MODEL_PATH):
+        if caminho.exists():
+            return registrar_artefato(caminho, raiz=raiz)
+
+    # 2. Versão fixada já presente no cache (sem rede)
+    if MODEL_SHA256:
+        destino = diretorio_versao(MODEL_SHA256, raiz)
+        if verificar_versao(destino) is not None:
+            return destino
+
+    # 3. Download
+    if permitir_download:
+        return baixar_artefato(raiz=raiz)
+
+    return None
+
+# Carregar o modelo a partir do cache
+def carregar_modelo_cache(diretorio, mmap=True):
+
+    """
+    Carrega o Pipeline de uma versão do cache
+    """
+
+    import joblib
+
+    return joblib.load(Path(diretorio) / 'modelo.joblib', mmap_mode='r' if mmap else None)
+
+# Carregar o motor a partir do cache
+def carregar_motor_cache(diretorio, mmap=True):
+
+    """
+    Carrega o MotorCompilado com os vetores memory-mapped (páginas compartilhadas entre processos).
+    Retorna None se a versão não possuir motor.
+    """
+
+    import joblib
+
+    caminho = Path(diretorio) / 'motor.joblib'
+    if not caminho.exists():
+        return None
+
+    return joblib.load(caminho, mmap_mode='r' if mmap else None)
+
+# Carregar os metadados a partir do cache
+def carregar_metadados_cache(diretorio, model=None):
+
+    """
+    Carrega os metadados de uma versão do cache. Em versões gravadas antes dos metadados,
+    eles são calculados a partir do modelo informado e gravados na mesma pasta (se houver permissão).
+    Retorna None se não houver arquivo nem modelo.
+    """
+
+    from obesidade.metadados import MetadadosModelo
+
+    caminho = Path(diretorio) / 'metadados.json'
+    if caminho.exists():
+        return MetadadosModelo.carregar(caminho)
+
+    if model is None:
+        return None
+
+    metadados = MetadadosModelo.construir(model, sha256=Path(diretorio).name)
+    try:
+        metadados.salvar(caminho)
+    except OSError:
+        pass
+
+    return metadados
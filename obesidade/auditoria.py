@@ -0,0 +1,376 @@
+"""
+Registro de auditoria das predições (somente inclusão), gravado sem bloquear a requisição.
+
+Cada predição (entrada, probabilidade, classe, versão do modelo, instante e principais fatores SHAP)
+é colocada em uma fila do processo e retorna imediatamente; uma thread de fundo grava os registros em
+lotes (uma transação por lote) em um SQLite em modo WAL (reports/auditoria/predicoes.sqlite3):
+    - predicoes   : um registro por predição (fatores SHAP, quando já conhecidos)
+    - explicacoes : fatores SHAP calculados depois da predição (explicação em segundo plano no app)
+    - auditoria   : visão que une as duas tabelas pelo identificador da predição
+Gatilhos recusam UPDATE e DELETE nas tabelas.
+
+Contrapressão: a fila aceita até AUDITORIA_MAX_PENDENTES registros; com a fila cheia, o registro espera
+até AUDITORIA_ESPERA_S por uma vaga e então é descartado (contado nas estatísticas). Ao encerrar o
+processo (atexit), os registros pendentes são gravados antes da saída.
+
+Uso:
+    python -m obesidade.auditoria --ultimos 20
+    python -m obesidade.auditoria --exportar reports/auditoria/predicoes.csv
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import (
+    AUDITORIA_ESPERA_S, AUDITORIA_INTERVALO_S, AUDITORIA_LOTE, AUDITORIA_MAX_PENDENTES, AUDITORIA_PATH
+)
+
+# Estrutura do banco (idempotente)
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS predicoes (
+    id TEXT PRIMARY KEY,
+    instante TEXT NOT NULL,
+    origem TEXT NOT NULL,
+    modelo_sha256 TEXT,
+    classe INTEGER NOT NULL,
+    probabilidade REAL NOT NULL,
+    entrada TEXT NOT NULL,
+    fatores TEXT
+);
+CREATE TABLE IF NOT EXISTS explicacoes (
+    id TEXT NOT NULL,
+    instante TEXT NOT NULL,
+    fatores TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predicoes_instante ON predicoes (instante);
+CREATE INDEX IF NOT EXISTS explicacoes_id ON explicacoes (id);
+
+CREATE TRIGGER IF NOT EXISTS predicoes_sem_alteracao BEFORE UPDATE ON predicoes
+BEGIN SELECT RAISE(ABORT, 'auditoria: registros não podem ser alterados'); END;
+CREATE TRIGGER IF NOT EXISTS predicoes_sem_exclusao BEFORE DELETE ON predicoes
+BEGIN SELECT RAISE(ABORT, 'auditoria: registros não podem ser excluídos'); END;
+CREATE TRIGGER IF NOT EXISTS explicacoes_sem_alteracao BEFORE UPDATE ON explicacoes
+BEGIN SELECT RAISE(ABORT, 'auditoria: registros não podem ser alterados'); END;
+CREATE TRIGGER IF NOT EXISTS explicacoes_sem_exclusao BEFORE DELETE ON explicacoes
+BEGIN SELECT RAISE(ABORT, 'auditoria: registros não podem ser excluídos'); END;
+
+CREATE VIEW IF NOT EXISTS auditoria AS
+SELECT p.id, p.instante, p.origem, p.modelo_sha256, p.classe, p.probabilidade, p.entrada,
+       COALESCE(p.fatores, e.fatores) AS fatores
+FROM predicoes p
+LEFT JOIN explicacoes e ON e.id = p.id;
+"""
+
+_INSERIR_PREDICAO = 'INSERT INTO predicoes VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+_INSERIR_EXPLICACAO = 'INSERT INTO explicacoes VALUES (?, ?, ?)'
+
+# Sinal de encerramento da thread de gravação
+_FIM = object()
+
+# Instante atual (UTC, com milissegundos)
+def instante_atual():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+
+# Selecionar os principais fatores SHAP
+def principais_fatores(valores, metadados, top_n=5):
+
+    """
+    Retorna as top_n contribuições SHAP em valor absoluto: [{'variavel', 'rotulo', 'shap'}]
+    """
+
+    valores = np.asarray(valores, dtype=np.float64).ravel()
+    principais = np.argsort(-np.abs(valores), kind='stable')[:top_n]
+
+    return [
+        {'variavel': metadados.nomes_tecnicos[i], 'rotulo': metadados.rotulos[i], 'shap': round(float(valores[i]), 6)}
+        for i in principais
+    ]
+
+# Converter valores NumPy para JSON
+def _serializar(valor):
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+class Auditoria:
+
+    """
+    Fila limitada de registros gravados em lotes por uma thread de fundo (uma conexão SQLite dedicada)
+    """
+
+    def __init__(self, caminho=AUDITORIA_PATH, max_pendentes=AUDITORIA_MAX_PENDENTES, espera=AUDITORIA_ESPERA_S,
+                 lote=AUDITORIA_LOTE, intervalo=AUDITORIA_INTERVALO_S):
+        self.caminho = Path(caminho)
+        self.max_pendentes = max(1, int(max_pendentes))
+        self.espera = max(0.0, float(espera))
+        self.lote = max(1, int(lote))
+        self.intervalo = float(intervalo)
+
+        self._fila = queue.Queue(maxsize=self.max_pendentes)
+        self._thread = None
+        self._encerrada = False
+        self._lock_envio = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.enfileirados = 0
+        self.descartados = 0
+        self.gravados = 0
+        self.lotes = 0
+        self.erros = 0
+        self.ultimo_erro = None
+
+    def iniciar(self):
+
+        """
+        Inicia a thread de gravação (apenas uma vez)
+        """
+
+        with self._lock_envio:
+            if self._thread is None and not self._encerrada:
+                self._thread = threading.Thread(target=self._laco, name='auditoria', daemon=True)
+                self._thread.start()
+
+        return self
+
+    def registrar_predicao(self, entrada, classe, probabilidade, modelo_sha256=None, fatores=None, origem='app',
+                           identificador=None):
+
+        """
+        Enfileira uma predição e retorna o seu identificador (ou None, se o registro foi descartado).
+        A serialização (JSON) é feita na thread de gravação.
+        """
+
+        identificador = identificador or uuid.uuid4().hex
+        registro = (
+            'predicao',
+            (identificador, instante_atual(), origem, modelo_sha256, int(classe), float(probabilidade), dict(entrada), fatores)
+        )
+
+        return identificador if self._enfileirar(registro) else None
+
+    def registrar_explicacao(self, identificador, fatores):
+
+        """
+        Enfileira os fatores SHAP de uma predição já registrada (explicação concluída depois dela)
+        """
+
+        return self._enfileirar(('explicacao', (identificador, instante_atual(), fatores)))
+
+    def encerrar(self, timeout=30):
+
+        """
+        Recusa novos registros, grava os pendentes e encerra a thread de gravação
+        """
+
+        with self._lock_envio:
+            self._encerrada = True
+            thread = self._thread
+
+        if thread is not None and thread.is_alive():
+            self._fila.put(_FIM)
+            thread.join(timeout)
+
+        return self.estatisticas()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'pendentes': self._fila.qsize(),
+                'enfileirados': self.enfileirados,
+                'gravados': self.gravados,
+                'descartados': self.descartados,
+                'lotes': self.lotes,
+                'erros': self.erros,
+                'ultimo_erro': self.ultimo_erro,
+                'max_pendentes': self.max_pendentes,
+                'caminho': str(self.caminho)
+            }
+
+    def _enfileirar(self, registro):
+        if self._thread is None:
+            self.iniciar()
+
+        # O envio é serializado com o encerramento: nenhum registro entra na fila depois do sinal de fim
+        with self._lock_envio:
+            if self._encerrada:
+                aceito = False
+            else:
+                try:
+                    self._fila.put(registro, block=self.espera > 0, timeout=self.espera or None)
+                    aceito = True
+                except queue.Full:
+                    aceito = False
+
+        with self._lock:
+            if aceito:
+                self.enfileirados += 1
+            else:
+                self.descartados += 1
+
+        return aceito
+
+    def _laco(self):
+        conexao = None
+        fim = False
+
+        while not fim:
+            registro = self._fila.get()
+            if registro is _FIM:
+                break
+
+            # Completa o lote com o que chegar até o intervalo máximo
+            lote = [registro]
+            limite = time.perf_counter() + self.intervalo
+            while len(lote) < self.lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    registro = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if registro is _FIM:
+                    fim = True
+                    break
+                lote.append(registro)
+
+            try:
+                conexao = conexao or conectar(self.caminho)
+                self._gravar(conexao, lote)
+            except (OSError, sqlite3.Error) as erro:
+                with self._lock:
+                    self.erros += len(lote)
+                    self.ultimo_erro = repr(erro)
+
+        if conexao is not None:
+            conexao.close()
+
+    def _gravar(self, conexao, lote):
+        predicoes, explicacoes = [], []
+
+        for tipo, campos in lote:
+            if tipo == 'predicao':
+                *inicio, entrada, fatores = campos
+                predicoes.append((
+                    *inicio,
+                    json.dumps(entrada, ensure_ascii=False, default=_serializar),
+                    json.dumps(fatores, ensure_ascii=False) if fatores is not None else None
+                ))
+            else:
+                identificador, instante, fatores = campos
+                explicacoes.append((identificador, instante, json.dumps(fatores, ensure_ascii=False)))
+
+        # Uma transação por lote
+        with conexao:
+            if predicoes:
+                conexao.executemany(_INSERIR_PREDICAO, predicoes)
+            if explicacoes:
+                conexao.executemany(_INSERIR_EXPLICACAO, explicacoes)
+
+        with self._lock:
+            self.gravados += len(lote)
+            self.lotes += 1
+
+# Abrir o banco de auditoria
+def conectar(caminho=AUDITORIA_PATH):
+
+    """
+    Abre (e cria, se necessário) o banco em modo WAL: leituras não bloqueiam a gravação
+    """
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    conexao = sqlite3.connect(caminho, timeout=30)
+    conexao.execute('PRAGMA journal_mode=WAL')
+    conexao.execute('PRAGMA synchronous=NORMAL')
+    conexao.executescript(ESQUEMA)
+
+    return conexao
+
+# AUDITORIA DO PROCESSO
+_auditoria = None
+_lock_auditoria = threading.Lock()
+
+# Obter a auditoria do processo
+def obter_auditoria(caminho=AUDITORIA_PATH):
+
+    """
+    Cria (uma única vez por processo) a fila de auditoria; os pendentes são gravados na saída do processo
+    """
+
+    global _auditoria
+
+    with _lock_auditoria:
+        if _auditoria is None:
+            _auditoria = Auditoria(caminho)
+            atexit.register(_auditoria.encerrar)
+
+    return _auditoria
+
+# Ler os registros de auditoria
+def ler_auditoria(caminho=AUDITORIA_PATH, limite=None):
+
+    """
+    Retorna a visão de auditoria (predições com os fatores SHAP), da mais recente para a mais antiga
+    """
+
+    conexao = conectar(caminho)
+    try:
+        consulta = 'SELECT * FROM auditoria ORDER BY instante DESC'
+        if limite:
+            consulta += f' LIMIT {int(limite)}'
+        return pd.read_sql_query(consulta, conexao)
+    finally:
+        conexao.close()
+
+# Função principal
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta e exportação do registro de auditoria das predições")
+    parser.add_argument('--banco', default=str(AUDITORIA_PATH), help="Arquivo SQLite da auditoria")
+    parser.add_argument('--ultimos', type=int, default=10, help="Quantidade de registros exibidos")
+    parser.add_argument('--exportar', default=None, help="Arquivo de saída (.csv ou .parquet) com todos os registros")
+    args = parser.parse_args(argv)
+
+    if not Path(args.banco).exists():
+        raise SystemExit(f"ERRO: banco de auditoria não encontrado: {args.banco}")
+
+    registros = ler_auditoria(args.banco)
+    print(f"Registros de auditoria: {len(registros)}")
+    if registros.empty:
+        return
+
+    for origem, quantidade in registros['origem'].value_counts().items():
+        print(f"  {origem:<12} {quantidade}")
+    print(f"  sem fatores SHAP: {int(registros['fatores'].isna().sum())}")
+
+    ultimos = registros.head(args.ultimos).assign(
+        modelo_sha256=lambda df: df['modelo_sha256'].str.slice(0, 12),
+        fatores=lambda df: df['fatores'].str.slice(0, 60)
+    )
+    colunas = ['instante', 'origem', 'modelo_sha256', 'classe', 'probabilidade', 'fatores']
+    print(ultimos[colunas].to_string(index=False))
+
+    if args.exportar:
+        saida = Path(args.exportar)
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        if saida.suffix.lower() == '.parquet':
+            registros.to_parquet(saida, index=False)
+        else:
+            registros.to_csv(saida, index=False)
+        print(f"Auditoria exportada para: {saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Pontuação em lote (modo headless) do modelo de risco de obesidade.
+
+Uso:
+    python -m obesidade.batch data/processed/base_limpa.csv reports/base_pontuada.csv --top-k 3
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.drift import obter_monitor, observar
+from obesidade.execucao import executar_em_blocos
+from obesidade.features import preparar_entrada
+from obesidade.modelo import carregar_modelo
+
+# Ler arquivo de entrada
+def ler_arquivo(caminho):
+
+    """
+    Lê um arquivo CSV, Parquet ou Arrow IPC (.arrow/.feather, com memory-mapping) no schema da base_limpa.csv
+    """
+
+    caminho = Path(caminho)
+
+    if caminho.suffix.lower() == '.parquet':
+        return pd.read_parquet(caminho)
+
+    if caminho.suffix.lower() in ('.arrow', '.feather'):
+        from obesidade.dataset import ler_base_colunar
+        return ler_base_colunar(caminho)
+
+    return pd.read_csv(caminho)
+
+# Salvar arquivo de saída
+def salvar_arquivo(df, caminho):
+
+    """
+    Salva o resultado em CSV ou Parquet conforme a extensão do arquivo
+    """
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    if caminho.suffix.lower() == '.parquet':
+        df.to_parquet(caminho, index=False)
+    else:
+        df.to_csv(caminho, index=False)
+
+# Criar o explicador do SHAP
+def criar_explicador(model):
+
+    """
+    Cria o TreeExplainer do SHAP para o classificador do Pipeline
+    """
+
+    import shap
+
+    return shap.TreeExplainer(model.named_steps['clf'])
+
+# Pontuar um bloco
+def pontuar_bloco(model, df, explainer=None, top_k=0):
+
+    """
+    Pontua um bloco de linhas e retorna um DataFrame com probabilidade, classe e (opcional) top-k SHAP.
+    O resultado é idêntico ao caminho do formulário (model.predict / model.predict_proba).
+    """
+
+    # 1. Recupera os passos do Pipeline (o SMOTE só atua no treino)
+    preprocessor = model.named_steps['preprocess']
+    classifier = model.named_steps['clf']
+
+    # 2. Transforma uma única vez e calcula probabilidade e classe na mesma passada
+    X = preparar_entrada(df)
+    input_transformed = preprocessor.transform(X)
+    probabilidades = executar_em_blocos(classifier.predict_proba, input_transformed)
+    classes = classifier.classes_.take(np.argmax(probabilidades, axis=1))
+
+    # Monitor de drift das entradas (contagens do processo)
+    observar(X)
+
+    resultado = pd.DataFrame({
+        'probabilidade_risco': probabilidades[:, 1],
+        'risco_previsto': classes
+    }, index=df.index)
+
+    # 3. Contribuições SHAP (classe positiva) das k variáveis de maior impacto
+    if top_k > 0 and explainer is not None:
+        feature_names = preprocessor.get_feature_names_out()
+        shap_values = explainer(input_transformed).values[:, :, 1]
+
+        ordem = np.argsort(-np.abs(shap_values), axis=1)[:, :top_k]
+        for k in range(ordem.shape[1]):
+            indices = ordem[:, k]
+            resultado[f'shap_top{k + 1}_variavel'] = feature_names[indices]
+            resultado[f'shap_top{k + 1}_valor'] = shap_values[np.arange(len(indices)), indices]
+
+    return resultado
+
+# Pontuar um DataFrame completo
+def pontuar_lote(model, df, tamanho_bloco=50000, top_k=0):
+
+    """
+    Pontua um DataFrame em blocos vetorizados e retorna (resultado, estatísticas)
+    """
+
+    explainer = criar_explicador(model) if top_k > 0 else None
+
+    inicio = time.perf_counter()
+    blocos = []
+    for posicao in range(0, len(df), tamanho_bloco):
+        bloco = df.iloc[posicao:posicao + tamanho_bloco]
+        blocos.append(pontuar_bloco(model, bloco, explainer, top_k))
+    duracao = time.perf_counter() - inicio
+
+    pontuacoes = pd.concat(blocos) if blocos else pd.DataFrame(index=df.index)
+    resultado = pd.concat([df, pontuacoes], axis=1)
+
+    estatisticas = {
+        'linhas': len(df),
+        'segundos': duracao,
+        'linhas_por_segundo': len(df) / duracao if duracao > 0 else float('inf')
+    }
+
+    return resultado, estatisticas
+
+# Função principal
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação em lote do modelo de risco de obesidade")
+    parser.add_argument('entrada', help="Arquivo CSV/Parquet/Arrow no schema da base_limpa.csv")
+    parser.add_argument('saida', help="Arquivo CSV/Parquet de saída")
+    parser.add_argument('--tamanho-bloco', type=int, default=50000, help="Linhas por bloco vetorizado")
+    parser.add_argument('--top-k', type=int, default=0, help="Quantidade de contribuições SHAP por linha (0 = desligado)")
+    args = parser.parse_args(argv)
+
+    model = carregar_modelo()
+    if model is None:
+        raise SystemExit("ERRO: o modelo não foi carregado. Verifique a pasta models/")
+
+    df = ler_arquivo(args.entrada)
+    resultado, estatisticas = pontuar_lote(model, df, args.tamanho_bloco, args.top_k)
+    salvar_arquivo(resultado, args.saida)
+
+    print(f"Linhas pontuadas: {estatisticas['linhas']}")
+    print(f"Tempo total: {estatisticas['segundos']:.2f} s")
+    print(f"Vazão: {estatisticas['linhas_por_segundo']:.0f} linhas/s")
+    print(f"Arquivo salvo em: {args.saida}")
+
+    # Drift das entradas pontuadas em relação à base de treino
+    relatorio = obter_monitor().relatorio()
+    alertas = relatorio[relatorio['drift'].isin(['moderado', 'significativo'])]
+    if alertas.empty:
+        print("Drift das entradas: nenhuma variável acima do limiar de PSI")
+    else:
+        print("Drift das entradas (PSI):")
+        for _, linha in alertas.iterrows():
+            print(f"  {linha['variavel']}: {linha['psi']:.3f} ({linha['drift']})")
+
+if __name__ == "__main__":
+    main()
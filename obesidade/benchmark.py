@@ -0,0 +1,316 @@
+"""
+Benchmark por etapa do caminho de predição e explicação.
+
+Reexecuta linhas da base_limpa.csv por cada etapa do app (montagem do DataFrame, preprocess.transform,
+predict, predict_proba, get_feature_names_out, criação do TreeExplainer, cálculo SHAP e gráfico),
+em modo linha única e em lote, e registra distribuição de latência, vazão e pico de memória.
+Os resultados são salvos em JSON (reports/benchmarks/) para comparação entre versões do modelo e das bibliotecas.
+
+Uso:
+    python -m obesidade.benchmark --linhas 100 --tamanho-lote 500
+    python -m obesidade.benchmark --comparar reports/benchmarks/anterior.json
+    python -m obesidade.benchmark --concorrencia 8 --requisicoes-por-sessao 50
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import FEATURES, REPORTS_DIR
+
+BENCHMARKS_DIR = REPORTS_DIR / 'benchmarks'
+
+# Etapas que não dependem das linhas de entrada (medidas apenas no modo linha única)
+ETAPAS_FIXAS = {'get_feature_names_out', 'criar_tree_explainer'}
+
+# Versões das bibliotecas envolvidas
+def coletar_metadados(model_sha256=None):
+
+    """
+    Registra versões do Python e das bibliotecas, máquina e hash do modelo
+    """
+
+    from importlib.metadata import PackageNotFoundError, version
+
+    versoes = {}
+    for pacote in ('numpy', 'pandas', 'scikit-learn', 'imbalanced-learn', 'shap', 'matplotlib', 'numba', 'streamlit'):
+        try:
+            versoes[pacote] = version(pacote)
+        except PackageNotFoundError:
+            versoes[pacote] = None
+
+    return {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'modelo_sha256': model_sha256,
+        'bibliotecas': versoes
+    }
+
+# Definir as etapas medidas
+def definir_etapas(model, explainer_cache):
+
+    """
+    Retorna a lista de etapas: (nome, preparar(lote) -> entrada, executar(entrada)).
+    'preparar' não entra na medição; apenas 'executar' é cronometrado.
+    """
+
+    import shap
+
+    from obesidade.motor import MotorCompilado
+    from obesidade.plots import especificacao_waterfall, grafico_waterfall_matplotlib
+
+    preprocessor = model.named_steps['preprocess']
+    classifier = model.named_steps['clf']
+    nomes = list(preprocessor.get_feature_names_out())
+    motor = MotorCompilado.compilar(model)
+
+    def registros(lote):
+        return lote[FEATURES].to_dict(orient='records')
+
+    def transformado(lote):
+        return preprocessor.transform(lote[FEATURES])
+
+    def valores_shap(lote):
+        resultado = explainer_cache(transformado(lote))
+        return resultado.values[:, :, 1], resultado.base_values[:, 1]
+
+    def graficos(funcao):
+        def executar(entrada):
+            valores, bases = entrada
+            for linha, base in zip(valores, bases):
+                funcao(linha, float(base), nomes)
+        return executar
+
+    return [
+        ('montar_dataframe', registros, lambda entrada: pd.DataFrame(entrada)),
+        ('preprocess_transform', lambda lote: lote[FEATURES], preprocessor.transform),
+        ('predict', lambda lote: lote[FEATURES], model.predict),
+        ('predict_proba', lambda lote: lote[FEATURES], model.predict_proba),
+        ('motor_compilado', lambda lote: lote[FEATURES], motor.prever),
+        ('get_feature_names_out', lambda lote: None, lambda entrada: preprocessor.get_feature_names_out()),
+        ('criar_tree_explainer', lambda lote: None, lambda entrada: shap.TreeExplainer(classifier)),
+        ('calcular_shap', transformado, explainer_cache),
+        ('waterfall_matplotlib', valores_shap, graficos(grafico_waterfall_matplotlib)),
+        ('waterfall_vega', valores_shap, graficos(especificacao_waterfall))
+    ]
+
+# Medir uma etapa
+def medir_etapa(executar, entradas, linhas_por_entrada):
+
+    """
+    Cronometra a etapa para cada entrada e mede o pico de memória (tracemalloc) de uma execução extra
+    """
+
+    tempos = []
+    for entrada in entradas:
+        inicio = time.perf_counter()
+        executar(entrada)
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    executar(entradas[0])
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tempos_ms = np.array(tempos) * 1000
+
+    return {
+        'execucoes': len(tempos),
+        'linhas_por_execucao': linhas_por_entrada,
+        'media_ms': float(tempos_ms.mean()),
+        'p50_ms': float(np.percentile(tempos_ms, 50)),
+        'p90_ms': float(np.percentile(tempos_ms, 90)),
+        'p99_ms': float(np.percentile(tempos_ms, 99)),
+        'max_ms': float(tempos_ms.max()),
+        'linhas_por_segundo': float(linhas_por_entrada * len(tempos) / sum(tempos)),
+        'pico_memoria_mb': pico / 1024 ** 2
+    }
+
+# Executar o benchmark completo
+def executar_benchmark(model, base, linhas=100, tamanho_lote=500, repeticoes=5, etapas=None, semente=0):
+
+    """
+    Executa todas as etapas em modo linha única e em lote e retorna a lista de resultados
+    """
+
+    import shap
+
+    explainer = shap.TreeExplainer(model.named_steps['clf'])
+    amostra = base.sample(n=min(linhas, len(base)), random_state=semente).reset_index(drop=True)
+    lote = base.sample(n=min(tamanho_lote, len(base)), random_state=semente).reset_index(drop=True)
+
+    # Aquecimento (caches internos, compilação do numba, importações)
+    for _, preparar, executar in definir_etapas(model, explainer):
+        executar(preparar(amostra.iloc[[0]]))
+
+    resultados = []
+    for nome, preparar, executar in definir_etapas(model, explainer):
+        if etapas and nome not in etapas:
+            continue
+
+        entradas_unicas = [preparar(amostra.iloc[[i]]) for i in range(len(amostra))]
+        resultado = medir_etapa(executar, entradas_unicas, 1)
+        resultados.append({'etapa': nome, 'modo': 'linha_unica', **resultado})
+
+        if nome in ETAPAS_FIXAS:
+            continue
+
+        entradas_lote = [preparar(lote)] * repeticoes
+        resultado = medir_etapa(executar, entradas_lote, len(lote))
+        resultados.append({'etapa': nome, 'modo': 'lote', **resultado})
+
+    return resultados
+
+# Medir latência sob sessões concorrentes
+def medir_concorrencia(model, base, sessoes=8, requisicoes=50, n_jobs_original=-1, semente=0):
+
+    """
+    Simula sessões simultâneas fazendo predições de uma linha e compara o caminho original
+    (n_jobs do treino, predict + predict_proba) com a política de execução (série, uma única passada)
+    """
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from obesidade.motor import prever
+
+    classifier = model.named_steps['clf']
+    n_jobs_politica = classifier.n_jobs
+    linhas = base[FEATURES].sample(n=sessoes * requisicoes, replace=True, random_state=semente).reset_index(drop=True)
+
+    cenarios = [
+        ('antes', n_jobs_original, lambda linha: (model.predict(linha), model.predict_proba(linha))),
+        ('depois', n_jobs_politica, lambda linha: prever(model, linha))
+    ]
+
+    resultados = []
+    try:
+        for nome, n_jobs, funcao in cenarios:
+            classifier.set_params(n_jobs=n_jobs)
+            funcao(linhas.iloc[[0]])
+
+            def sessao(indice):
+                tempos = []
+                for i in range(indice * requisicoes, (indice + 1) * requisicoes):
+                    inicio = time.perf_counter()
+                    funcao(linhas.iloc[[i]])
+                    tempos.append(time.perf_counter() - inicio)
+                return tempos
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=sessoes) as pool:
+                tempos = [tempo for lista in pool.map(sessao, range(sessoes)) for tempo in lista]
+            duracao = time.perf_counter() - inicio
+
+            tempos_ms = np.array(tempos) * 1000
+            resultados.append({
+                'cenario': nome,
+                'n_jobs': n_jobs,
+                'sessoes': sessoes,
+                'requisicoes': len(tempos),
+                'p50_ms': float(np.percentile(tempos_ms, 50)),
+                'p99_ms': float(np.percentile(tempos_ms, 99)),
+                'requisicoes_por_segundo': len(tempos) / duracao
+            })
+    finally:
+        classifier.set_params(n_jobs=n_jobs_politica)
+
+    return resultados
+
+# Comparar com uma execução anterior
+def comparar_resultados(atual, anterior, tolerancia=0.10):
+
+    """
+    Compara p50 e vazão por (etapa, modo) e marca regressões acima da tolerância
+    """
+
+    df_atual = pd.DataFrame(atual['resultados']).set_index(['etapa', 'modo'])
+    df_anterior = pd.DataFrame(anterior['resultados']).set_index(['etapa', 'modo'])
+
+    comparacao = df_atual[['p50_ms', 'p99_ms', 'linhas_por_segundo']].join(
+        df_anterior[['p50_ms', 'p99_ms', 'linhas_por_segundo']], rsuffix='_anterior', how='inner'
+    )
+    comparacao['variacao_p50'] = comparacao['p50_ms'] / comparacao['p50_ms_anterior'] - 1
+    comparacao['variacao_vazao'] = comparacao['linhas_por_segundo'] / comparacao['linhas_por_segundo_anterior'] - 1
+    comparacao['regressao'] = comparacao['variacao_p50'] > tolerancia
+
+    return comparacao.reset_index()
+
+# Função principal
+def main(argv=None):
+    from obesidade.artefatos import hash_arquivo
+    from obesidade.batch import ler_arquivo
+    from obesidade.config import MODEL_PATH
+    from obesidade.dataset import carregar_base
+    from obesidade.modelo import carregar_modelo
+
+    parser = argparse.ArgumentParser(description="Benchmark por etapa do caminho de predição e explicação")
+    parser.add_argument('--entrada', default=None, help="Base no schema da base_limpa.csv (padrão: base limpa colunar)")
+    parser.add_argument('--linhas', type=int, default=100, help="Linhas reexecutadas no modo linha única")
+    parser.add_argument('--tamanho-lote', type=int, default=500, help="Linhas por execução no modo lote")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Execuções do modo lote")
+    parser.add_argument('--etapas', nargs='*', help="Restringe às etapas informadas")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de resultados (padrão: reports/benchmarks/<data>.json)")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--concorrencia', type=int, default=None, help="Mede apenas p50/p99 com N sessões simultâneas (antes/depois da política de threads)")
+    parser.add_argument('--requisicoes-por-sessao', type=int, default=50, help="Predições de uma linha por sessão no modo --concorrencia")
+    args = parser.parse_args(argv)
+
+    model = carregar_modelo()
+    if model is None:
+        raise SystemExit("ERRO: o modelo não foi carregado. Verifique a pasta models/")
+
+    base = ler_arquivo(args.entrada) if args.entrada else carregar_base()
+
+    if args.concorrencia:
+        resultados = medir_concorrencia(model, base, args.concorrencia, args.requisicoes_por_sessao)
+        relatorio = {
+            'metadados': coletar_metadados(hash_arquivo(MODEL_PATH) if MODEL_PATH.exists() else None),
+            'parametros': {'sessoes': args.concorrencia, 'requisicoes_por_sessao': args.requisicoes_por_sessao},
+            'concorrencia': resultados
+        }
+
+        saida = Path(args.saida) if args.saida else BENCHMARKS_DIR / f"concorrencia_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        saida.write_text(json.dumps(relatorio, indent=2), encoding='utf-8')
+
+        print(pd.DataFrame(resultados).to_string(index=False, float_format=lambda valor: f"{valor:.3f}"))
+        print(f"\nResultados salvos em: {saida}")
+        return
+
+    resultados = executar_benchmark(model, base, args.linhas, args.tamanho_lote, args.repeticoes, args.etapas)
+
+    relatorio = {
+        'metadados': coletar_metadados(hash_arquivo(MODEL_PATH) if MODEL_PATH.exists() else None),
+        'parametros': {'linhas': args.linhas, 'tamanho_lote': args.tamanho_lote, 'repeticoes': args.repeticoes},
+        'resultados': resultados
+    }
+
+    saida = Path(args.saida) if args.saida else BENCHMARKS_DIR / f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=2), encoding='utf-8')
+
+    colunas = ['etapa', 'modo', 'p50_ms', 'p99_ms', 'linhas_por_segundo', 'pico_memoria_mb']
+    print(pd.DataFrame(resultados)[colunas].to_string(index=False, float_format=lambda valor: f"{valor:.3f}"))
+    print(f"\nResultados salvos em: {saida}")
+
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding='utf-8'))
+        comparacao = comparar_resultados(relatorio, anterior)
+        print("\nComparação com a execução anterior:")
+        print(comparacao[['etapa', 'modo', 'p50_ms_anterior', 'p50_ms', 'variacao_p50', 'variacao_vazao', 'regressao']].to_string(
+            index=False, float_format=lambda valor: f"{valor:.3f}"
+        ))
+
+if __name__ == "__main__":
+    main()
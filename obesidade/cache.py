@@ -0,0 +1,170 @@
+"""
+Cache de resultados (predição + explicação SHAP) compartilhado pelo processo, com política LRU/TTL.
+
+A chave é a linha do questionário normalizada (as 15 features de get_user_input_features()),
+de forma que respostas idênticas reaproveitam probabilidade, classe e vetor SHAP sem acionar o modelo.
+"""
+
+# Importar biblioteca completa - padrão
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+
+# Importar biblioteca completa - projeto
+from obesidade.config import CACHE_MAX_BYTES, CACHE_MAX_ITENS, CACHE_TTL_SEGUNDOS, FEATURES
+from obesidade.features import COLUNAS_INTEIRAS
+
+# Normalizar a linha do questionário
+def normalizar_chave(input_df):
+
+    """
+    Converte a primeira linha do DataFrame do formulário em uma tupla canônica (ordem de FEATURES)
+    """
+
+    linha = input_df.iloc[0]
+
+    return tuple(
+        int(linha[coluna]) if coluna in COLUNAS_INTEIRAS else str(linha[coluna])
+        for coluna in FEATURES
+    )
+
+# Estimar o tamanho de um valor em memória
+def estimar_bytes(valor):
+
+    """
+    Estimativa do tamanho em bytes de um resultado (dicionários, arrays NumPy e escalares)
+    """
+
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes + sys.getsizeof(valor)
+
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimar_bytes(k) + estimar_bytes(v) for k, v in valor.items())
+
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(estimar_bytes(item) for item in valor)
+
+    return sys.getsizeof(valor)
+
+class CacheResultados:
+
+    """
+    Cache LRU com expiração (TTL), limite de itens e de memória, seguro para múltiplas sessões (threads)
+    """
+
+    def __init__(self, max_itens=CACHE_MAX_ITENS, ttl_segundos=CACHE_TTL_SEGUNDOS, max_bytes=CACHE_MAX_BYTES):
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self.max_bytes = max_bytes
+
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.expiracoes = 0
+
+    def obter(self, chave):
+
+        """
+        Retorna o valor armazenado (e o marca como recém-usado) ou None
+        """
+
+        with self._lock:
+            item = self._itens.get(chave)
+
+            if item is None:
+                self.falhas += 1
+                return None
+
+            valor, tamanho, criado_em = item
+            if self.ttl_segundos is not None and time.monotonic() - criado_em > self.ttl_segundos:
+                self._remover(chave)
+                self.expiracoes += 1
+                self.falhas += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor):
+
+        """
+        Armazena o valor, removendo os itens menos usados até respeitar os limites
+        """
+
+        tamanho = estimar_bytes(chave) + estimar_bytes(valor)
+        if self.max_bytes is not None and tamanho > self.max_bytes:
+            return
+
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+
+            self._itens[chave] = (valor, tamanho, time.monotonic())
+            self._bytes += tamanho
+
+            while self._itens and (
+                len(self._itens) > self.max_itens
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remover(next(iter(self._itens)))
+                self.remocoes += 1
+
+    def limpar(self):
+
+        """
+        Remove todos os itens (os contadores são mantidos)
+        """
+
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+
+        """
+        Retorna os contadores de uso do cache
+        """
+
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+                'remocoes': self.remocoes,
+                'expiracoes': self.expiracoes
+            }
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+# CACHE DO PROCESSO
+_cache = None
+_lock_cache = threading.Lock()
+
+# Obter o cache do processo
+def obter_cache():
+
+    """
+    Cria (uma única vez por processo) o cache de resultados compartilhado pelas sessões
+    """
+
+    global _cache
+
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheResultados()
+
+    return _cache
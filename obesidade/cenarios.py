@@ -0,0 +1,110 @@
+"""
+Simulação de cenários ("e se...?") a partir da linha atual do formulário.
+
+A linha do questionário é replicada em uma grade de variantes ao longo de uma ou duas variáveis
+(ex.: peso x atividade física). Para o peso, o IMC é recalculado com a altura informada. A grade
+inteira é pontuada em uma única chamada vetorizada (motor compilado ou predict_proba do Pipeline),
+com custo próximo ao de uma predição avulsa.
+"""
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.dataset import CATEGORIAS
+from obesidade.features import preparar_entrada
+from obesidade.metadados import traduzir_nome
+from obesidade.motor import prever
+
+# Variáveis disponíveis para simulação e seus rótulos
+VARIAVEIS_CENARIO = {
+    'peso': 'Peso (kg)',
+    'idade': 'Idade',
+    'qtd_atv_fisicas': 'Atividade física',
+    'qtd_agua': 'Consumo de água',
+    'qtd_vegetais': 'Consumo de vegetais',
+    'qtd_refeicao': 'Refeições principais por dia',
+    'qtd_tmp_na_internet': 'Tempo em telas',
+    'freq_come_fora_refeicao': 'Comer entre refeições',
+    'freq_alcool': 'Consumo de álcool',
+    'meio_de_transporte': 'Meio de transporte',
+    'b_come_alimentos_caloricos': 'Consumo de calóricos',
+    'b_monitora_calorias': 'Monitoramento de calorias',
+    'b_fuma': 'Hábito de fumar'
+}
+
+# Faixas numéricas: (mínimo do formulário, máximo do formulário, amplitude em torno do valor atual, passo)
+FAIXAS_NUMERICAS = {
+    'peso': (30.0, 200.0, 30.0, 1.0),
+    'idade': (10, 100, 20, 1)
+}
+
+# Valores simulados de uma variável
+def valores_variavel(variavel, valor_atual=None):
+
+    """
+    Faixa em torno do valor atual (peso e idade) ou todas as respostas possíveis (categorias e Sim/Não)
+    """
+
+    if variavel in FAIXAS_NUMERICAS:
+        minimo, maximo, amplitude, passo = FAIXAS_NUMERICAS[variavel]
+        inicio = max(minimo, valor_atual - amplitude)
+        fim = min(maximo, valor_atual + amplitude)
+        return np.arange(inicio, fim + passo / 2, passo)
+
+    if variavel in CATEGORIAS:
+        return list(CATEGORIAS[variavel])
+
+    return [0, 1]
+
+# Rótulo de um valor simulado
+def rotulo_valor(variavel, valor):
+
+    """
+    Texto exibido no gráfico para um valor simulado
+    """
+
+    if variavel in CATEGORIAS:
+        return traduzir_nome(f'cat__{variavel}_{valor}')
+
+    if variavel.startswith('b_'):
+        return 'Sim' if int(valor) == 1 else 'Não'
+
+    # Escalares NumPy viram tipos nativos (serializáveis em JSON na especificação do gráfico)
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+# Gerar a grade de cenários
+def gerar_grade(input_df, eixos, altura=None):
+
+    """
+    Replica a primeira linha do formulário para cada combinação dos valores informados em eixos
+    ({variável: valores}). Com o peso entre os eixos, a altura é anexada para o recálculo do IMC.
+    """
+
+    combinacoes = pd.MultiIndex.from_product(list(eixos.values()), names=list(eixos)).to_frame(index=False)
+
+    linha = input_df.iloc[[0]]
+    grade = linha.loc[linha.index.repeat(len(combinacoes))].reset_index(drop=True)
+    for variavel in combinacoes.columns:
+        grade[variavel] = combinacoes[variavel].to_numpy()
+
+    if 'peso' in eixos:
+        if altura is None:
+            raise ValueError("A altura é obrigatória para simular o peso (recálculo do IMC)")
+        grade['altura'] = altura
+
+    return grade
+
+# Pontuar os cenários
+def pontuar_cenarios(model, input_df, eixos, altura=None, motor=None):
+
+    """
+    Gera a grade e a pontua em uma única chamada vetorizada. Retorna a grade com probabilidade_risco.
+    """
+
+    grade = gerar_grade(input_df, eixos, altura)
+    _, probabilidades = prever(model, preparar_entrada(grade), motor)
+    grade['probabilidade_risco'] = probabilidades[:, 1]
+
+    return grade
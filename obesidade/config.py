@@ -0,0 +1,107 @@
+"""
+Configurações compartilhadas do projeto (caminhos, nomes de arquivos e contrato de features).
+"""
+
+# Importar biblioteca completa - padrão
+import os
+from pathlib import Path
+
+# CAMINHOS DO PROJETO
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+
+DATA_DIR = PROJ_ROOT / 'data'
+RAW_DATA_DIR = DATA_DIR / 'raw'
+INTERIM_DATA_DIR = DATA_DIR / 'interim'
+PROCESSED_DATA_DIR = DATA_DIR / 'processed'
+
+# Base limpa em texto (versionada) e cópia colunar tipada (Arrow IPC, regenerada pelo hash do Obesity.csv)
+BASE_LIMPA_PATH = PROCESSED_DATA_DIR / 'base_limpa.csv'
+BASE_COLUNAR_PATH = PROCESSED_DATA_DIR / 'base_limpa.arrow'
+
+MODELS_DIR = PROJ_ROOT / 'models'
+REPORTS_DIR = PROJ_ROOT / 'reports'
+
+# MODELO
+MODEL_FILENAME = 'modelo_risco_obesidade_random_forest.joblib'
+MODEL_PATH = MODELS_DIR / MODEL_FILENAME
+MODEL_URL = "https://github.com/RicardViana/fiap-data-viz-and-production-models-tc/raw/refs/heads/main/models/modelo_risco_obesidade_random_forest.joblib"
+
+# CONTRATO DE FEATURES
+# Mesma ordem das colunas montadas em get_user_input_features() no app.py
+FEATURES = [
+    'idade',
+    'genero',
+    'qtd_refeicao',
+    'qtd_vegetais',
+    'qtd_agua',
+    'qtd_atv_fisicas',
+    'qtd_tmp_na_internet',
+    'b_fuma',
+    'b_come_alimentos_caloricos',
+    'b_monitora_calorias',
+    'b_historico_familiar',
+    'freq_come_fora_refeicao',
+    'freq_alcool',
+    'meio_de_transporte',
+    'imc'
+]
+
+# CACHE DE RESULTADOS (predição + SHAP; sobrescrito pelas variáveis de ambiente, 0 itens desliga o cache)
+CACHE_MAX_ITENS = int(os.environ.get('OBESIDADE_CACHE_MAX_ITENS', 5000))
+CACHE_TTL_SEGUNDOS = float(os.environ.get('OBESIDADE_CACHE_TTL', 6 * 60 * 60))
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# CACHE DE ARTEFATOS (endereçado pelo SHA-256 do .joblib)
+MODEL_CACHE_DIR = MODELS_DIR / 'cache'
+
+# Hash do artefato publicado no GitHub (validado no download). Atualizar a cada novo modelo exportado.
+MODEL_SHA256 = '76441eb67e805644d00076c7216a865a41d24b69ba8bb6fb7644156b3304b650'
+
+# MÉTRICAS POR REQUISIÇÃO (arquivo rotativo)
+METRICAS_PATH = REPORTS_DIR / 'metricas' / 'requisicoes.jsonl'
+METRICAS_MAX_BYTES = 5 * 1024 * 1024
+METRICAS_BACKUPS = 3
+
+# POLÍTICA DE EXECUÇÃO DA INFERÊNCIA (por processo; sobrescrita pelas variáveis de ambiente)
+# Lotes abaixo do limiar percorrem as árvores em série; lotes maiores usam um pool de threads limitado
+INFERENCIA_LIMIAR_LOTE = int(os.environ.get('OBESIDADE_LIMIAR_LOTE', 1000))
+INFERENCIA_MAX_THREADS = int(os.environ.get('OBESIDADE_MAX_THREADS', min(4, os.cpu_count() or 1)))
+
+# Lotes a partir deste tamanho vão para o Pipeline: o motor compilado vence em latência (linha única e
+# lotes pequenos), mas a travessia por árvore do sklearn tem vazão maior em lotes grandes
+MOTOR_LIMIAR_LOTE = int(os.environ.get('OBESIDADE_MOTOR_LIMIAR_LOTE', 500))
+
+# ÍNDICE POPULACIONAL DE SHAP (gerado offline por python -m obesidade.populacao)
+SHAP_POPULACAO_PATH = MODELS_DIR / 'shap_populacao.npz'
+
+# EXPLICAÇÕES EM SEGUNDO PLANO (pool compartilhado pelas sessões do app)
+# Acima do limite de pendentes novas explicações são recusadas; após o tempo limite a espera é abandonada.
+# A sessão não espera a tarefa: o navegador consulta o andamento a cada EXPLICACAO_INTERVALO_S.
+EXPLICACAO_MAX_WORKERS = int(os.environ.get('OBESIDADE_EXPLICACAO_WORKERS', min(2, os.cpu_count() or 1)))
+EXPLICACAO_MAX_PENDENTES = int(os.environ.get('OBESIDADE_EXPLICACAO_PENDENTES', 32))
+EXPLICACAO_TIMEOUT_S = float(os.environ.get('OBESIDADE_EXPLICACAO_TIMEOUT', 20))
+EXPLICACAO_INTERVALO_S = float(os.environ.get('OBESIDADE_EXPLICACAO_INTERVALO', 0.5))
+
+# MONITOR DE DRIFT DAS ENTRADAS (perfil de referência gerado por python -m obesidade.drift --construir)
+DRIFT_REFERENCIA_PATH = MODELS_DIR / 'perfil_referencia.json'
+DRIFT_BINS_NUMERICOS = 20
+DRIFT_LIMIAR_MODERADO = 0.1  # PSI
+DRIFT_LIMIAR_SIGNIFICATIVO = 0.25  # PSI
+DRIFT_MIN_LINHAS = 100  # abaixo disso o drift não é classificado
+
+# AUDITORIA DAS PREDIÇÕES (SQLite em modo WAL, gravado em lotes por uma thread de fundo)
+# Com a fila cheia, o registro espera até AUDITORIA_ESPERA_S por uma vaga e então é descartado (e contado)
+AUDITORIA_PATH = REPORTS_DIR / 'auditoria' / 'predicoes.sqlite3'
+AUDITORIA_MAX_PENDENTES = int(os.environ.get('OBESIDADE_AUDITORIA_PENDENTES', 10000))
+AUDITORIA_ESPERA_S = float(os.environ.get('OBESIDADE_AUDITORIA_ESPERA', 0.0))
+AUDITORIA_LOTE = 500  # registros por transação
+AUDITORIA_INTERVALO_S = 0.5  # espera máxima antes de gravar um lote incompleto
+
+# RECARGA DO MODELO SEM REINÍCIO (observa o .joblib em models/ e troca a versão em segundo plano)
+# 'imediata': a nova versão é promovida assim que estiver pronta;
+# 'sombra': a nova versão fica como candidata, pontuada em paralelo às requisições, até ser promovida
+# manualmente (modo debug do app). Intervalo 0 desativa a observação.
+RECARGA_INTERVALO_S = float(os.environ.get('OBESIDADE_RECARGA_INTERVALO', 5))
+RECARGA_MODO = os.environ.get('OBESIDADE_RECARGA_MODO', 'imediata')
+RECARGA_SOMBRA_MAX_PENDENTES = 64
+RECARGA_SOMBRA_JANELA = 1000  # latências mantidas para os percentis da comparação
@@ -0,0 +1,319 @@
+"""
+Limpeza vetorizada da base bruta (Obesity.csv) e derivação da variável alvo (risco_obesidade).
+
+Reproduz as etapas do notebook tech_challenge_codigo.ipynb (renomeação, conversões binárias, mapeamento
+das respostas ordinais, limpeza de idade/altura/peso, IMC e risco) com operações por coluna do pandas,
+sem apply linha a linha. O resultado tem o mesmo schema da data/processed/base_limpa.csv.
+
+Além do CSV, a base limpa é gravada em formato colunar tipado (Arrow IPC, data/processed/base_limpa.arrow):
+respostas categóricas com dicionário (categorias fixas do questionário) e inteiros compactos. O arquivo guarda
+o SHA-256 do Obesity.csv de origem, é regenerado apenas quando a base bruta muda e é lido com memory-mapping.
+
+Uso:
+    python -m obesidade.dataset
+    python -m obesidade.dataset --entrada data/raw/Obesity.csv --saida data/processed/base_limpa.csv
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import BASE_COLUNAR_PATH, BASE_LIMPA_PATH, RAW_DATA_DIR
+
+# Renomeação das colunas da base original para Português
+COLUNAS_RENOMEADAS = {
+    'Gender': 'genero',
+    'Age': 'idade',
+    'Height': 'altura',
+    'Weight': 'peso',
+    'family_history': 'b_historico_familiar',
+    'FAVC': 'b_come_alimentos_caloricos',
+    'FCVC': 'qtd_vegetais',
+    'NCP': 'qtd_refeicao',
+    'CAEC': 'freq_come_fora_refeicao',
+    'SMOKE': 'b_fuma',
+    'CH2O': 'qtd_agua',
+    'SCC': 'b_monitora_calorias',
+    'FAF': 'qtd_atv_fisicas',
+    'TUE': 'qtd_tmp_na_internet',
+    'CALC': 'freq_alcool',
+    'MTRANS': 'meio_de_transporte',
+    'Obesity': 'nivel_de_obesidade'
+}
+
+# Ordem das colunas da base limpa (antes das colunas derivadas imc e risco_obesidade)
+COLUNAS_BASE = [
+    'idade', 'altura', 'peso', 'genero',
+    'qtd_refeicao', 'qtd_vegetais', 'qtd_agua', 'qtd_atv_fisicas', 'qtd_tmp_na_internet',
+    'b_fuma', 'b_come_alimentos_caloricos', 'b_monitora_calorias', 'b_historico_familiar',
+    'freq_come_fora_refeicao', 'freq_alcool',
+    'meio_de_transporte', 'nivel_de_obesidade'
+]
+
+# Respostas ordinais: coluna -> (mapa de significados, intervalo do clip ou None)
+MAPAS_ORDINAIS = {
+    'qtd_vegetais': ({1: 'Raramente', 2: 'As_vezes', 3: 'Sempre'}, None),
+    'qtd_refeicao': ({
+        1: 'Uma_refeicao_principal_por_dia',
+        2: 'Duas_refeicoes_principais_por_dia',
+        3: 'Tres_refeicoes_principais_por_dia',
+        4: 'Quatro_ou_mais_refeicoes_principais_por_dia'
+    }, (1, 4)),
+    'qtd_tmp_na_internet': ({0: 'Uso_baixo', 1: 'Uso_moderado', 2: 'Uso_intenso'}, (0, 2)),
+    'qtd_agua': ({1: 'Baixo_consumo', 2: 'Consumo_adequado', 3: 'Alto_consumo'}, (1, 3)),
+    'qtd_atv_fisicas': ({0: 'Sedentario', 1: 'Baixa_frequencia', 2: 'Moderada_frequencia', 3: 'Alta_frequencia'}, (0, 3))
+}
+
+# Respostas binárias: coluna -> mapa para 1/0
+MAPAS_BINARIOS = {
+    'genero': {'Female': 1, 'Male': 0},
+    'b_fuma': {'yes': 1, 'no': 0},
+    'b_monitora_calorias': {'yes': 1, 'no': 0},
+    'b_historico_familiar': {'yes': 1, 'no': 0},
+    'b_come_alimentos_caloricos': {'yes': 1, 'no': 0}
+}
+
+# Níveis de obesidade que, somados a um hábito de risco, definem o alvo
+NIVEIS_SOBREPESO = ['Overweight_Level_I', 'Overweight_Level_II', 'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']
+
+# Respostas de texto do questionário e seus valores possíveis (mesmos de get_user_input_features() no app.py)
+CATEGORIAS = {
+    **{coluna: list(mapa.values()) for coluna, (mapa, _) in MAPAS_ORDINAIS.items()},
+    'freq_come_fora_refeicao': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'freq_alcool': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'meio_de_transporte': ['Automobile', 'Bike', 'Motorbike', 'Public_Transportation', 'Walking'],
+    'nivel_de_obesidade': [
+        'Insufficient_Weight', 'Normal_Weight', 'Overweight_Level_I', 'Overweight_Level_II',
+        'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III'
+    ]
+}
+
+# Tipos compactos das colunas numéricas da base limpa
+TIPOS_NUMERICOS = {
+    'idade': 'int16',
+    'altura': 'float64',
+    'peso': 'float64',
+    'imc': 'int16',
+    'risco_obesidade': 'int8',
+    **{coluna: 'int8' for coluna in MAPAS_BINARIOS}
+}
+
+# Ler a base bruta
+def ler_base_bruta(caminho=RAW_DATA_DIR / 'Obesity.csv'):
+
+    """
+    Lê o Obesity.csv com as mesmas opções do notebook
+    """
+
+    return pd.read_csv(caminho, sep=',', decimal=',', encoding='utf-8')
+
+# Limpar números em texto
+def limpar_numero(serie, inteiro=False):
+
+    """
+    Versão vetorizada de limpar_numero_float/limpar_numero_int do notebook: mantém apenas dígitos e pontos,
+    preserva só o último ponto como separador decimal e converte (texto vazio/ausente vira NaN)
+    """
+
+    texto = serie.astype('string').str.strip()
+    texto = texto.str.replace(r'[^0-9.]', '', regex=True)
+    texto = texto.str.replace(r'\.(?=.*\.)', '', regex=True)
+
+    numeros = pd.to_numeric(texto.mask(texto == ''), errors='coerce').astype('float64')
+
+    # int(float(valor)) trunca em direção ao zero
+    return np.trunc(numeros) if inteiro else numeros
+
+# Mapear resposta ordinal
+def mapear_ordinal(serie, mapa, intervalo=None):
+
+    """
+    Converte para número, arredonda, limita ao intervalo e aplica o dicionário de significados
+    """
+
+    numeros = pd.to_numeric(serie, errors='coerce').round()
+    if intervalo is not None:
+        numeros = numeros.clip(*intervalo)
+
+    return numeros.astype('Int64').map(mapa)
+
+# Calcular o alvo
+def calcular_risco(base):
+
+    """
+    Versão vetorizada de calcular_risco: sobrepeso/obesidade combinado a pelo menos um hábito de risco
+    """
+
+    sobrepeso = base['nivel_de_obesidade'].isin(NIVEIS_SOBREPESO)
+    habito_de_risco = (
+        base['qtd_atv_fisicas'].isin(['Sedentario', 'Baixa_frequencia'])
+        | (base['qtd_agua'] == 'Baixo_consumo')
+        | (base['freq_come_fora_refeicao'] == 'Always')
+        | (base['b_historico_familiar'] == 1)
+    )
+
+    return (sobrepeso & habito_de_risco).astype(int)
+
+# Limpar a base
+def limpar_base(base):
+
+    """
+    Aplica a limpeza completa e retorna a base limpa (schema da base_limpa.csv)
+    """
+
+    base_limpa = base.rename(columns=COLUNAS_RENOMEADAS)[COLUNAS_BASE].copy()
+
+    # 1. Respostas binárias (valores fora do mapa são mantidos, como no replace do notebook)
+    for coluna, mapa in MAPAS_BINARIOS.items():
+        base_limpa[coluna] = base_limpa[coluna].map(mapa).fillna(base_limpa[coluna]).infer_objects()
+
+    # 2. Respostas ordinais
+    for coluna, (mapa, intervalo) in MAPAS_ORDINAIS.items():
+        base_limpa[coluna] = mapear_ordinal(base_limpa[coluna], mapa, intervalo)
+
+    # 3. Idade, altura e peso, removendo valores impossíveis
+    base_limpa['idade'] = limpar_numero(base_limpa['idade'], inteiro=True)
+    base_limpa['altura'] = limpar_numero(base_limpa['altura'])
+    base_limpa['peso'] = limpar_numero(base_limpa['peso'])
+
+    base_limpa = base_limpa[(base_limpa['idade'] > 0) & (base_limpa['altura'] > 0) & (base_limpa['peso'] > 0)].copy()
+    base_limpa['idade'] = base_limpa['idade'].astype(int)
+
+    # 4. Colunas derivadas
+    base_limpa['imc'] = np.ceil(base_limpa['peso'] / (base_limpa['altura'] ** 2)).astype(int)
+    base_limpa['risco_obesidade'] = calcular_risco(base_limpa)
+
+    return base_limpa
+
+# Tipar a base limpa
+def tipar_base(base_limpa):
+
+    """
+    Converte as respostas de texto em categóricas (categorias fixas) e os inteiros em tipos compactos
+    """
+
+    tipada = base_limpa.copy()
+
+    for coluna, categorias in CATEGORIAS.items():
+        if coluna in tipada:
+            tipada[coluna] = pd.Categorical(tipada[coluna], categories=categorias)
+
+    for coluna, tipo in TIPOS_NUMERICOS.items():
+        if coluna in tipada:
+            tipada[coluna] = tipada[coluna].astype(tipo)
+
+    return tipada
+
+# Ler o hash gravado na base colunar
+def hash_origem_colunar(caminho=BASE_COLUNAR_PATH):
+
+    """
+    Retorna o SHA-256 do Obesity.csv que gerou a base colunar (None se o arquivo não existir ou for inválido)
+    """
+
+    import pyarrow as pa
+
+    try:
+        metadados = pa.ipc.open_file(pa.memory_map(str(caminho), 'r')).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    valor = metadados.get(b'sha256_origem')
+
+    return valor.decode('utf-8') if valor else None
+
+# Gravar a base colunar
+def salvar_base_colunar(base_limpa, sha256_origem, caminho=BASE_COLUNAR_PATH):
+
+    """
+    Grava a base tipada em Arrow IPC sem compressão (legível com memory-mapping), com escrita atômica
+    """
+
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(tipar_base(base_limpa), preserve_index=False)
+    tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), b'sha256_origem': sha256_origem.encode('utf-8')})
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(prefix='.tmp-', suffix='.arrow', dir=caminho.parent)
+    os.close(descritor)
+
+    try:
+        with pa.OSFile(temporario, 'wb') as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.unlink(temporario)
+
+    return caminho
+
+# Ler a base colunar
+def ler_base_colunar(caminho=BASE_COLUNAR_PATH, colunas=None):
+
+    """
+    Lê a base colunar com memory-mapping (as páginas do arquivo são compartilhadas, sem parse de texto)
+    """
+
+    import pyarrow as pa
+
+    tabela = pa.ipc.open_file(pa.memory_map(str(caminho), 'r')).read_all()
+    if colunas is not None:
+        tabela = tabela.select(colunas)
+
+    return tabela.to_pandas()
+
+# Carregar a base limpa
+def carregar_base(caminho_bruto=RAW_DATA_DIR / 'Obesity.csv', caminho_colunar=BASE_COLUNAR_PATH, colunas=None):
+
+    """
+    Retorna a base limpa tipada. A base colunar é regenerada apenas quando o Obesity.csv muda (hash do conteúdo).
+    Sem a base bruta, usa a base colunar existente ou, em último caso, a base_limpa.csv.
+    """
+
+    from obesidade.artefatos import hash_arquivo
+
+    caminho_bruto = Path(caminho_bruto)
+    if not caminho_bruto.exists():
+        if Path(caminho_colunar).exists():
+            return ler_base_colunar(caminho_colunar, colunas)
+        base = tipar_base(pd.read_csv(BASE_LIMPA_PATH))
+        return base[colunas] if colunas is not None else base
+
+    sha256 = hash_arquivo(caminho_bruto)
+    if hash_origem_colunar(caminho_colunar) != sha256:
+        salvar_base_colunar(limpar_base(ler_base_bruta(caminho_bruto)), sha256, caminho_colunar)
+
+    return ler_base_colunar(caminho_colunar, colunas)
+
+# Função principal
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera a base limpa a partir do Obesity.csv")
+    parser.add_argument('--entrada', default=str(RAW_DATA_DIR / 'Obesity.csv'), help="Base bruta (Obesity.csv)")
+    parser.add_argument('--saida', default=str(BASE_LIMPA_PATH), help="Arquivo da base limpa")
+    parser.add_argument('--saida-colunar', default=str(BASE_COLUNAR_PATH), help="Arquivo Arrow IPC da base limpa tipada")
+    args = parser.parse_args(argv)
+
+    from obesidade.artefatos import hash_arquivo
+
+    inicio = time.perf_counter()
+    base_limpa = limpar_base(ler_base_bruta(args.entrada))
+    base_limpa.to_csv(args.saida, index=False)
+    salvar_base_colunar(base_limpa, hash_arquivo(args.entrada), args.saida_colunar)
+
+    print(f"Base limpa salva em: {args.saida} e {args.saida_colunar}")
+    print(f"Linhas: {len(base_limpa)} | Tempo: {time.perf_counter() - inicio:.3f} s")
+    print(base_limpa['risco_obesidade'].value_counts(normalize=True).mul(100).round(2).to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Monitor de drift das entradas do modelo, com memória constante.
+
+O perfil de referência é construído a partir da base de treino (base_limpa): para as variáveis numéricas
+(idade, imc), as bordas dos quantis (DRIFT_BINS_NUMERICOS faixas) e a proporção de cada faixa; para as
+binárias e categóricas, a proporção de cada resposta.
+
+Cada linha que chega ao modelo (formulário do app, pontuação em lote/fluxo e servidor HTTP) atualiza
+contagens de tamanho fixo:
+    - numéricas: histograma sobre as bordas da referência (um esboço de quantis; mínimo e máximo observados);
+    - categóricas: contagem por resposta conhecida e um único balde para respostas fora da referência.
+
+O relatório (sob demanda) calcula, por variável, o PSI e a distância KS entre as distribuições
+acumuladas (KS apenas para as numéricas) e classifica o drift pelos limiares de PSI de config.py.
+
+Uso:
+    python -m obesidade.drift --construir
+    python -m obesidade.drift --entrada data/raw/novos_casos.csv
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import bisect
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import (
+    DRIFT_BINS_NUMERICOS, DRIFT_LIMIAR_MODERADO, DRIFT_LIMIAR_SIGNIFICATIVO, DRIFT_MIN_LINHAS, DRIFT_REFERENCIA_PATH,
+    FEATURES
+)
+
+# Variáveis contínuas (as demais features são tratadas como categorias)
+COLUNAS_NUMERICAS = ['idade', 'imc']
+
+# Balde das respostas fora da referência
+CATEGORIA_NOVA = '__nova__'
+
+# Suavização das proporções nulas no PSI
+EPSILON = 1e-4
+
+# Até este número de linhas, as contagens são atualizadas registro a registro (sem operações vetorizadas)
+LIMITE_REGISTROS = 16
+
+# Calcular o PSI
+def calcular_psi(esperado, observado):
+
+    """
+    Population Stability Index entre duas distribuições de proporções (mesmos baldes)
+    """
+
+    esperado = np.clip(np.asarray(esperado, dtype=float), EPSILON, None)
+    observado = np.clip(np.asarray(observado, dtype=float), EPSILON, None)
+
+    return float(np.sum((observado - esperado) * np.log(observado / esperado)))
+
+# Normalizar uma categoria
+def _texto_categoria(valor):
+
+    """
+    Texto da categoria de um valor; códigos inteiros que chegam como float (Parquet, blocos de CSV com NaN,
+    JSON 1.0) são tratados como inteiros, para que 1.0 corresponda a '1'
+    """
+
+    if isinstance(valor, (float, np.floating)) and np.isfinite(valor) and float(valor).is_integer():
+        return str(int(valor))
+
+    return str(valor)
+
+# Normalizar as categorias de uma coluna
+def _textos_categorias(valores):
+
+    """
+    Versão vetorizada de _texto_categoria para uma coluna (Series ou array)
+    """
+
+    valores = np.asarray(valores)
+
+    if valores.dtype.kind == 'f':
+        textos = valores.astype(str).astype(object)
+        inteiros = np.isfinite(valores) & (valores == np.round(valores))
+        textos[inteiros] = valores[inteiros].astype(np.int64).astype(str)
+        return textos
+
+    if valores.dtype.kind == 'O':
+        return np.array([_texto_categoria(valor) for valor in valores], dtype=object)
+
+    return valores.astype(str)
+
+# Calcular a distância KS
+def calcular_ks(esperado, observado):
+
+    """
+    Maior diferença absoluta entre as distribuições acumuladas (baldes ordenados)
+    """
+
+    return float(np.max(np.abs(np.cumsum(esperado) - np.cumsum(observado))))
+
+# Classificar o drift pelo PSI
+def classificar_psi(psi, linhas=None):
+    if linhas is not None and linhas < DRIFT_MIN_LINHAS:
+        return 'amostra insuficiente'
+    if psi >= DRIFT_LIMIAR_SIGNIFICATIVO:
+        return 'significativo'
+    if psi >= DRIFT_LIMIAR_MODERADO:
+        return 'moderado'
+    return 'estável'
+
+class PerfilReferencia:
+
+    """
+    Bordas e proporções de referência de cada feature (base de treino)
+    """
+
+    def __init__(self, bordas, proporcoes, categorias, linhas):
+        self.bordas = {coluna: np.asarray(valores, dtype=float) for coluna, valores in bordas.items()}
+        self.proporcoes = {coluna: np.asarray(valores, dtype=float) for coluna, valores in proporcoes.items()}
+        self.categorias = {coluna: list(valores) for coluna, valores in categorias.items()}
+        self.linhas = int(linhas)
+
+    @classmethod
+    def construir(cls, base, bins=DRIFT_BINS_NUMERICOS):
+
+        """
+        Calcula o perfil a partir de um DataFrame com as features do modelo
+        """
+
+        bordas, proporcoes, categorias = {}, {}, {}
+
+        for coluna in FEATURES:
+            valores = base[coluna]
+
+            if coluna in COLUNAS_NUMERICAS:
+                valores = valores.to_numpy(dtype=float)
+                internas = np.unique(np.quantile(valores, np.linspace(0, 1, bins + 1)[1:-1]))
+                bordas[coluna] = internas
+                contagens = np.bincount(np.searchsorted(internas, valores, side='right'), minlength=len(internas) + 1)
+            else:
+                frequencias = pd.Series(_textos_categorias(valores)).value_counts()
+                categorias[coluna] = sorted(frequencias.index)
+                contagens = np.append(frequencias.reindex(categorias[coluna]).to_numpy(), 0)
+
+            proporcoes[coluna] = contagens / contagens.sum()
+
+        return cls(bordas, proporcoes, categorias, len(base))
+
+    def como_dicionario(self):
+        return {
+            'linhas': self.linhas,
+            'bordas': {coluna: valores.tolist() for coluna, valores in self.bordas.items()},
+            'proporcoes': {coluna: valores.tolist() for coluna, valores in self.proporcoes.items()},
+            'categorias': self.categorias
+        }
+
+    @classmethod
+    def de_dicionario(cls, dados):
+        return cls(dados['bordas'], dados['proporcoes'], dados['categorias'], dados['linhas'])
+
+    def salvar(self, caminho=DRIFT_REFERENCIA_PATH):
+
+        """
+        Grava o perfil em JSON (escrita atômica)
+        """
+
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=caminho.parent)
+
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.como_dicionario(), arquivo, ensure_ascii=False, indent=2)
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho=DRIFT_REFERENCIA_PATH):
+        return cls.de_dicionario(json.loads(Path(caminho).read_text(encoding='utf-8')))
+
+class MonitorDrift:
+
+    """
+    Contagens de tamanho fixo por feature, atualizadas a cada linha pontuada (seguro entre threads)
+    """
+
+    def __init__(self, perfil):
+        self.perfil = perfil
+
+        self._lock = threading.Lock()
+        self._indices_categorias = {
+            coluna: pd.Index(categorias) for coluna, categorias in perfil.categorias.items()
+        }
+
+        # Estruturas em Python puro para o caminho registro a registro (formulário do app)
+        self._bordas_lista = {coluna: bordas.tolist() for coluna, bordas in perfil.bordas.items()}
+        self._codigos_categorias = {
+            coluna: {categoria: i for i, categoria in enumerate(categorias)} for coluna, categorias in perfil.categorias.items()
+        }
+
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.linhas = 0
+            self.contagens = {coluna: np.zeros(len(proporcoes), dtype=np.int64) for coluna, proporcoes in self.perfil.proporcoes.items()}
+            self.minimos = {coluna: np.inf for coluna in COLUNAS_NUMERICAS}
+            self.maximos = {coluna: -np.inf for coluna in COLUNAS_NUMERICAS}
+
+    def observar(self, df):
+
+        """
+        Soma as linhas do DataFrame (schema da base_limpa ou as features do formulário) às contagens
+        """
+
+        if len(df) == 0:
+            return
+
+        if len(df) <= LIMITE_REGISTROS:
+            # to_numpy(dtype=object) + zip é bem mais barato que to_dict('records') para poucas linhas
+            for linha in df.to_numpy(dtype=object):
+                self.observar_registro(dict(zip(df.columns, linha)))
+            return
+
+        # Baldes calculados fora do lock; apenas a soma das contagens é serializada
+        baldes = {}
+        extremos = {}
+        for coluna in FEATURES:
+            valores = df[coluna].to_numpy()
+
+            if coluna in COLUNAS_NUMERICAS:
+                valores = valores.astype(float)
+                bordas = self.perfil.bordas[coluna]
+                baldes[coluna] = np.bincount(np.searchsorted(bordas, valores, side='right'), minlength=len(bordas) + 1)
+                extremos[coluna] = (valores.min(), valores.max())
+            else:
+                codigos = self._indices_categorias[coluna].get_indexer(_textos_categorias(valores))
+                codigos[codigos < 0] = len(self._indices_categorias[coluna])
+                baldes[coluna] = np.bincount(codigos, minlength=len(self._indices_categorias[coluna]) + 1)
+
+        with self._lock:
+            self.linhas += len(df)
+            for coluna, contagem in baldes.items():
+                self.contagens[coluna] += contagem
+            for coluna, (minimo, maximo) in extremos.items():
+                self.minimos[coluna] = min(self.minimos[coluna], minimo)
+                self.maximos[coluna] = max(self.maximos[coluna], maximo)
+
+    def observar_registro(self, registro):
+
+        """
+        Soma um único registro (dicionário com as features) às contagens
+        """
+
+        baldes = []
+        for coluna, bordas in self._bordas_lista.items():
+            baldes.append((coluna, bisect.bisect_right(bordas, float(registro[coluna]))))
+        for coluna, codigos in self._codigos_categorias.items():
+            baldes.append((coluna, codigos.get(_texto_categoria(registro[coluna]), len(codigos))))
+
+        with self._lock:
+            self.linhas += 1
+            for coluna, balde in baldes:
+                self.contagens[coluna][balde] += 1
+            for coluna in COLUNAS_NUMERICAS:
+                valor = float(registro[coluna])
+                self.minimos[coluna] = min(self.minimos[coluna], valor)
+                self.maximos[coluna] = max(self.maximos[coluna], valor)
+
+    def quantis(self, coluna, probabilidades=(0.05, 0.25, 0.5, 0.75, 0.95)):
+
+        """
+        Quantis aproximados de uma feature numérica (interpolação linear dentro das faixas do histograma)
+        """
+
+        with self._lock:
+            contagens = self.contagens[coluna].copy()
+            minimo, maximo = self.minimos[coluna], self.maximos[coluna]
+
+        if contagens.sum() == 0:
+            return {p: None for p in probabilidades}
+
+        bordas = self.perfil.bordas[coluna]
+        limites = np.concatenate([[min(minimo, bordas[0])], bordas, [max(maximo, bordas[-1])]])
+        acumulado = np.concatenate([[0.0], np.cumsum(contagens) / contagens.sum()])
+
+        return {p: float(np.interp(p, acumulado, limites)) for p in probabilidades}
+
+    def relatorio(self):
+
+        """
+        PSI (todas as features), KS (numéricas), proporção de respostas novas e classificação por feature
+        (não classificada abaixo de DRIFT_MIN_LINHAS linhas)
+        """
+
+        with self._lock:
+            contagens = {coluna: valores.copy() for coluna, valores in self.contagens.items()}
+            linhas = self.linhas
+
+        registros = []
+        for coluna in FEATURES:
+            esperado = self.perfil.proporcoes[coluna]
+            observado = contagens[coluna] / linhas if linhas else np.zeros_like(esperado)
+            psi = calcular_psi(esperado, observado) if linhas else None
+
+            registros.append({
+                'variavel': coluna,
+                'tipo': 'numérica' if coluna in COLUNAS_NUMERICAS else 'categórica',
+                'linhas': linhas,
+                'psi': psi,
+                'ks': calcular_ks(esperado, observado) if linhas and coluna in COLUNAS_NUMERICAS else None,
+                'proporcao_nova': float(observado[-1]) if coluna not in COLUNAS_NUMERICAS and linhas else None,
+                'drift': classificar_psi(psi, linhas) if psi is not None else None
+            })
+
+        return pd.DataFrame(registros)
+
+# MONITOR DO PROCESSO
+_monitor = None
+_lock_monitor = threading.Lock()
+
+# Obter o monitor do processo
+def obter_monitor(caminho=DRIFT_REFERENCIA_PATH):
+
+    """
+    Cria (uma única vez por processo) o monitor com o perfil gravado em models/ ou, na ausência dele,
+    com o perfil calculado a partir da base limpa
+    """
+
+    global _monitor
+
+    with _lock_monitor:
+        if _monitor is None:
+            try:
+                perfil = PerfilReferencia.carregar(caminho)
+            except (OSError, KeyError, ValueError):
+                from obesidade.dataset import carregar_base
+                perfil = PerfilReferencia.construir(carregar_base(colunas=FEATURES))
+            _monitor = MonitorDrift(perfil)
+
+    return _monitor
+
+# Registrar linhas pontuadas no monitor do processo
+def observar(df):
+
+    """
+    Atualiza o monitor do processo; falhas do monitor nunca interrompem a predição
+    """
+
+    try:
+        obter_monitor().observar(df)
+    except Exception:
+        pass
+
+# Função principal
+def main(argv=None):
+    from obesidade.batch import ler_arquivo
+    from obesidade.dataset import carregar_base
+    from obesidade.features import preparar_entrada
+
+    parser = argparse.ArgumentParser(description="Perfil de referência e relatório de drift das entradas")
+    parser.add_argument('--construir', action='store_true', help="Gera o perfil de referência a partir da base limpa")
+    parser.add_argument('--entrada', default=None, help="Arquivo (schema da base_limpa.csv) comparado com a referência")
+    parser.add_argument('--referencia', default=str(DRIFT_REFERENCIA_PATH), help="Arquivo JSON do perfil de referência")
+    args = parser.parse_args(argv)
+
+    if args.construir:
+        perfil = PerfilReferencia.construir(carregar_base(colunas=FEATURES))
+        print(f"Perfil de referência ({perfil.linhas} linhas) salvo em: {perfil.salvar(args.referencia)}")
+
+    if args.entrada:
+        monitor = MonitorDrift(PerfilReferencia.carregar(args.referencia))
+        monitor.observar(preparar_entrada(ler_arquivo(args.entrada)))
+
+        with pd.option_context('display.width', 120, 'display.max_columns', None):
+            print(monitor.relatorio().round(4).to_string(index=False))
+
+        for coluna in COLUNAS_NUMERICAS:
+            quantis = monitor.quantis(coluna)
+            print(f"Quantis de {coluna}: " + ", ".join(f"p{int(p * 100)}={valor:.1f}" for p, valor in quantis.items()))
+
+if __name__ == "__main__":
+    main()
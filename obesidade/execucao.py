@@ -0,0 +1,119 @@
+"""
+Política de execução da inferência da floresta (300 árvores).
+
+O modelo foi treinado com n_jobs=-1, então cada predict/predict_proba de uma única linha despacha
+as 300 árvores para um pool de threads com todos os núcleos. Com várias sessões simultâneas, esse
+despacho consome mais CPU do que a própria travessia e disputa os núcleos entre as requisições.
+
+A política aplicada na carga do modelo:
+    - lotes pequenos (abaixo de INFERENCIA_LIMIAR_LOTE linhas): travessia em série (n_jobs=1) na própria thread;
+    - lotes grandes: linhas divididas em blocos, pontuados em um pool de threads compartilhado pelo
+      processo e limitado a INFERENCIA_MAX_THREADS (a travessia das árvores libera o GIL).
+
+Limiar e número de threads são configurados por processo (OBESIDADE_LIMIAR_LOTE e OBESIDADE_MAX_THREADS
+ou configurar_politica()). Não é necessário retreinar o modelo.
+"""
+
+# Importar biblioteca completa - padrão
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import INFERENCIA_LIMIAR_LOTE, INFERENCIA_MAX_THREADS
+
+class PoliticaInferencia:
+
+    """
+    Decide entre travessia em série e pool de threads limitado conforme o tamanho do lote
+    """
+
+    def __init__(self, limiar_lote=INFERENCIA_LIMIAR_LOTE, max_threads=INFERENCIA_MAX_THREADS):
+        self.limiar_lote = max(1, int(limiar_lote))
+        self.max_threads = max(1, int(max_threads))
+
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def aplicar(self, model):
+
+        """
+        Desliga o pool interno do classificador (n_jobs=1); o paralelismo passa a ser controlado pela política
+        """
+
+        classifier = model.named_steps.get('clf') if hasattr(model, 'named_steps') else model
+        if getattr(classifier, 'n_jobs', None) not in (None, 1):
+            classifier.set_params(n_jobs=1)
+
+        return model
+
+    def executar(self, funcao, X):
+
+        """
+        Executa funcao(X) em série (lote pequeno) ou em blocos de linhas no pool compartilhado (lote grande)
+        """
+
+        linhas = X.shape[0]
+        if linhas < self.limiar_lote or self.max_threads == 1:
+            return funcao(X)
+
+        limites = np.linspace(0, linhas, min(self.max_threads, linhas) + 1).astype(int)
+        blocos = [_fatiar(X, inicio, fim) for inicio, fim in zip(limites[:-1], limites[1:])]
+        resultados = list(self._executor().map(funcao, blocos))
+
+        return np.concatenate(resultados, axis=0)
+
+    def encerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='inferencia')
+            return self._pool
+
+# Fatiar linhas de um DataFrame ou array
+def _fatiar(X, inicio, fim):
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[inicio:fim]
+
+    return X[inicio:fim]
+
+# POLÍTICA DO PROCESSO
+_politica = PoliticaInferencia()
+
+# Obter a política do processo
+def obter_politica():
+    return _politica
+
+# Configurar a política do processo
+def configurar_politica(limiar_lote=None, max_threads=None):
+
+    """
+    Substitui a política do processo (valores omitidos mantêm a configuração atual)
+    """
+
+    global _politica
+
+    anterior = _politica
+    _politica = PoliticaInferencia(
+        anterior.limiar_lote if limiar_lote is None else limiar_lote,
+        anterior.max_threads if max_threads is None else max_threads
+    )
+    anterior.encerrar()
+
+    return _politica
+
+# Aplicar a política ao modelo carregado
+def aplicar_politica(model):
+    return _politica.aplicar(model)
+
+# Executar uma inferência conforme a política
+def executar_em_blocos(funcao, X):
+    return _politica.executar(funcao, X)
@@ -0,0 +1,85 @@
+"""
+Funções de preparação das features no mesmo formato usado pelo formulário do app.
+"""
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import FEATURES
+
+# Colunas inteiras do questionário (as demais são categorias em texto)
+COLUNAS_INTEIRAS = {
+    'idade', 'genero', 'b_fuma', 'b_come_alimentos_caloricos',
+    'b_monitora_calorias', 'b_historico_familiar', 'imc'
+}
+
+# Calcular o IMC
+def calcular_imc(peso, altura):
+
+    """
+    Calcula o IMC arredondado para cima (mesma regra do formulário e do notebook).
+    Aceita escalares ou vetores (Series/arrays).
+    """
+
+    return np.ceil(np.asarray(peso, dtype=float) / (np.asarray(altura, dtype=float) ** 2)).astype(int)
+
+# Preparar a entrada do modelo
+def preparar_entrada(df):
+
+    """
+    Recebe um DataFrame no schema da base_limpa.csv e retorna apenas as colunas esperadas pelo modelo.
+    Quando peso e altura estão presentes, o IMC é recalculado como no formulário.
+    """
+
+    df = df.copy()
+
+    if {'peso', 'altura'}.issubset(df.columns):
+        df['imc'] = calcular_imc(df['peso'], df['altura'])
+
+    faltantes = [coluna for coluna in FEATURES if coluna not in df.columns]
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes na entrada: {faltantes}")
+
+    return df[FEATURES]
+
+# Validar um registro avulso
+def validar_registro(registro):
+
+    """
+    Valida um dicionário com as 15 features do formulário (ou peso e altura no lugar do IMC)
+    e retorna um novo dicionário normalizado, na ordem de FEATURES
+    """
+
+    if not isinstance(registro, dict):
+        raise ValueError("Cada registro deve ser um objeto JSON com as features do formulário")
+
+    registro = dict(registro)
+    if 'imc' not in registro and {'peso', 'altura'}.issubset(registro):
+        registro['imc'] = int(calcular_imc(registro['peso'], registro['altura']))
+
+    faltantes = [coluna for coluna in FEATURES if coluna not in registro]
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes na entrada: {faltantes}")
+
+    try:
+        return {
+            coluna: _inteiro(registro[coluna]) if coluna in COLUNAS_INTEIRAS else str(registro[coluna])
+            for coluna in FEATURES
+        }
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("As colunas numéricas devem conter valores inteiros")
+
+# Converter um valor inteiro
+def _inteiro(valor):
+
+    """
+    Converte para int sem truncar: 25 e 25.0 são aceitos, 25.9 é recusado (ValueError)
+    """
+
+    inteiro = int(valor)
+    if not isinstance(valor, str) and inteiro != valor:
+        raise ValueError(f"Valor não inteiro: {valor!r}")
+
+    return inteiro
@@ -0,0 +1,158 @@
+"""
+Instrumentação por requisição: tempo de cada etapa (carga do modelo, montagem da entrada,
+pré-processamento, inferência, SHAP e renderização).
+
+Cada requisição abre um rastreamento; as etapas são registradas com `with etapa('nome'):` em qualquer
+ponto do código (o rastreamento atual fica em uma ContextVar, isolado por sessão/thread). Ao finalizar,
+o rastreamento é gravado como uma linha JSON em um arquivo rotativo (reports/metricas/requisicoes.jsonl).
+Sem rastreamento ativo, `etapa()` devolve um contexto nulo compartilhado (custo desprezível).
+"""
+
+# Importar biblioteca completa - padrão
+import contextvars
+import json
+import logging
+import logging.handlers
+import threading
+import time
+import uuid
+
+# Importar biblioteca completa - projeto
+from obesidade.config import METRICAS_BACKUPS, METRICAS_MAX_BYTES, METRICAS_PATH
+
+_rastreamento_atual = contextvars.ContextVar('rastreamento_atual', default=None)
+_logger = None
+_lock_logger = threading.Lock()
+
+class Rastreamento:
+
+    """
+    Etapas cronometradas de uma requisição
+    """
+
+    def __init__(self, **atributos):
+        self.id = uuid.uuid4().hex
+        self.inicio = time.time()
+        self.atributos = atributos
+        self.etapas = []
+
+    def registrar(self, nome, duracao_ms):
+        self.etapas.append((nome, duracao_ms))
+
+    def total_ms(self):
+        return sum(duracao for _, duracao in self.etapas)
+
+    def como_registro(self):
+
+        """
+        Representação em dicionário (uma linha do arquivo de métricas)
+        """
+
+        return {
+            'id': self.id,
+            'inicio': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.inicio)),
+            **self.atributos,
+            'etapas_ms': {nome: round(duracao, 3) for nome, duracao in self.etapas},
+            'total_ms': round(self.total_ms(), 3)
+        }
+
+class _Etapa:
+
+    """
+    Contexto que cronometra uma etapa e a registra no rastreamento
+    """
+
+    __slots__ = ('rastreamento', 'nome', 'inicio')
+
+    def __init__(self, rastreamento, nome):
+        self.rastreamento = rastreamento
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.rastreamento.registrar(self.nome, (time.perf_counter() - self.inicio) * 1000)
+        return False
+
+class _EtapaNula:
+
+    """
+    Contexto sem efeito, usado quando não há rastreamento ativo
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+_ETAPA_NULA = _EtapaNula()
+
+# Cronometrar uma etapa
+def etapa(nome):
+
+    """
+    Retorna um contexto que cronometra a etapa no rastreamento atual (ou um contexto nulo)
+    """
+
+    rastreamento = _rastreamento_atual.get()
+    if rastreamento is None:
+        return _ETAPA_NULA
+
+    return _Etapa(rastreamento, nome)
+
+# Iniciar o rastreamento de uma requisição
+def iniciar_rastreamento(ativo=True, **atributos):
+
+    """
+    Abre um novo rastreamento para a requisição atual (substituindo o anterior da mesma sessão)
+    """
+
+    rastreamento = Rastreamento(**atributos) if ativo else None
+    _rastreamento_atual.set(rastreamento)
+
+    return rastreamento
+
+# Finalizar o rastreamento
+def finalizar_rastreamento(rastreamento=None, caminho=METRICAS_PATH):
+
+    """
+    Grava o rastreamento no arquivo rotativo de métricas e o desativa
+    """
+
+    rastreamento = rastreamento or _rastreamento_atual.get()
+    _rastreamento_atual.set(None)
+
+    if rastreamento is None:
+        return None
+
+    try:
+        _obter_logger(caminho).info(json.dumps(rastreamento.como_registro(), ensure_ascii=False))
+    except OSError:
+        pass
+
+    return rastreamento
+
+# Logger do arquivo rotativo
+def _obter_logger(caminho):
+    global _logger
+
+    with _lock_logger:
+        if _logger is None:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+
+            handler = logging.handlers.RotatingFileHandler(
+                caminho, maxBytes=METRICAS_MAX_BYTES, backupCount=METRICAS_BACKUPS, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+
+            _logger = logging.getLogger('obesidade.metricas')
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+            _logger.addHandler(handler)
+
+    return _logger
@@ -0,0 +1,176 @@
+"""
+Metadados do modelo, calculados uma única vez por carga do artefato.
+
+Reúne o que antes era recalculado a cada predição: nomes das features transformadas
+(get_feature_names_out), rótulos em Português, importâncias globais já ordenadas e o valor esperado
+do SHAP (classe positiva, base do gráfico waterfall).
+Os metadados são gravados em JSON ao lado do modelo no cache de artefatos (metadados.json).
+"""
+
+# Importar biblioteca completa - padrão
+import json
+import os
+import tempfile
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+
+# Rótulos em Português das features transformadas pelo Pipeline
+ROTULOS_FEATURES = {
+    # --- Numéricas ---
+    'num__imc': 'Índice de Massa Corporal (IMC)',
+    'num__idade': 'Idade',
+
+    # --- Binárias ---
+    'bin__genero': 'Gênero',
+    'bin__b_historico_familiar': 'Histórico Familiar',
+    'bin__b_fuma': 'Hábito de Fumar',
+    'bin__b_come_alimentos_caloricos': 'Consumo de Calóricos',
+    'bin__b_monitora_calorias': 'Monitoramento de Calorias',
+
+    # --- Categorias: Comer entre Refeições ---
+    'cat__freq_come_fora_refeicao_no': 'Comer entre refeições (Nunca)',
+    'cat__freq_come_fora_refeicao_Sometimes': 'Comer entre refeições (Às vezes)',
+    'cat__freq_come_fora_refeicao_Frequently': 'Comer entre refeições (Frequentemente)',
+    'cat__freq_come_fora_refeicao_Always': 'Comer entre refeições (Sempre)',
+
+    # --- Categorias: Atividade Física ---
+    'cat__qtd_atv_fisicas_Sedentario': 'Sedentarismo',
+    'cat__qtd_atv_fisicas_Baixa_frequencia': 'Baixa Atividade Física',
+    'cat__qtd_atv_fisicas_Moderada_frequencia': 'Atividade Física Moderada',
+    'cat__qtd_atv_fisicas_Alta_frequencia': 'Alta Atividade Física',
+
+    # --- Categorias: Água ---
+    'cat__qtd_agua_Baixo_consumo': 'Baixo consumo de água',
+    'cat__qtd_agua_Consumo_adequado': 'Consumo de água (Adequado)',
+    'cat__qtd_agua_Alto_consumo': 'Alto consumo de água',
+
+    # --- Categorias: Transporte ---
+    'cat__meio_de_transporte_Automobile': 'Uso de Carro',
+    'cat__meio_de_transporte_Public_Transportation': 'Transporte Público',
+    'cat__meio_de_transporte_Motorbike': 'Uso de Moto',
+    'cat__meio_de_transporte_Bike': 'Uso de Bicicleta',
+    'cat__meio_de_transporte_Walking': 'Caminhada',
+
+    # --- Categorias: Refeições ---
+    'cat__qtd_refeicao_Tres_refeicoes_principais_por_dia': '3 Refeições principais/dia',
+    'cat__qtd_refeicao_Duas_refeicoes_principais_por_dia': '2 Refeições principais/dia',
+    'cat__qtd_refeicao_Uma_refeicao_principal_por_dia': '1 Refeição principal/dia',
+    'cat__qtd_refeicao_Quatro_ou_mais_refeicoes_principais_por_dia': '4+ Refeições principais/dia',
+
+    # --- Categorias: Vegetais ---
+    'cat__qtd_vegetais_Sempre': 'Consumo de Vegetais (Sempre)',
+    'cat__qtd_vegetais_As_vezes': 'Consumo de Vegetais (Às vezes)',
+    'cat__qtd_vegetais_Raramente': 'Consumo de Vegetais (Raramente)',
+
+    # --- Categorias: Telas/Internet ---
+    'cat__qtd_tmp_na_internet_Uso_baixo': 'Tempo em Telas (Baixo)',
+    'cat__qtd_tmp_na_internet_Uso_moderado': 'Tempo em Telas (Moderado)',
+    'cat__qtd_tmp_na_internet_Uso_intenso': 'Tempo em Telas (Intenso)',
+
+    # --- Categorias: Álcool ---
+    'cat__freq_alcool_no': 'Consumo de Álcool (Não)',
+    'cat__freq_alcool_Sometimes': 'Consumo de Álcool (Às vezes)',
+    'cat__freq_alcool_Frequently': 'Consumo de Álcool (Frequentemente)',
+    'cat__freq_alcool_Always': 'Consumo de Álcool (Sempre)'
+}
+
+# Traduzir um nome técnico
+def traduzir_nome(nome_tecnico):
+
+    """
+    Retorna o rótulo em Português; para nomes novos, limpa o nome técnico (fallback de segurança)
+    """
+
+    if nome_tecnico in ROTULOS_FEATURES:
+        return ROTULOS_FEATURES[nome_tecnico]
+
+    return nome_tecnico.replace('num__', '').replace('cat__', '').replace('bin__', '').replace('_', ' ').title()
+
+class MetadadosModelo:
+
+    """
+    Informações de esquema do modelo, com consultas em tempo constante
+    """
+
+    def __init__(self, nomes_tecnicos, importancias, valor_esperado, classes, sha256=None):
+        self.nomes_tecnicos = list(nomes_tecnicos)
+        self.importancias = np.asarray(importancias, dtype=np.float64)
+        self.valor_esperado = float(valor_esperado)
+        self.classes = list(classes)
+        self.sha256 = sha256
+
+        # Estruturas derivadas (não persistidas)
+        self.rotulos = [traduzir_nome(nome) for nome in self.nomes_tecnicos]
+        self.ordem_importancia = np.argsort(-self.importancias, kind='stable')
+
+    @classmethod
+    def construir(cls, model, explainer=None, sha256=None):
+
+        """
+        Extrai os metadados do Pipeline (preprocess + clf). O explainer do SHAP é criado se não for informado.
+        """
+
+        preprocessor = model.named_steps['preprocess']
+        classifier = model.named_steps['clf']
+
+        if explainer is None:
+            import shap
+            explainer = shap.TreeExplainer(classifier)
+
+        # Valor esperado da classe positiva (Risco de Obesidade = 1)
+        valor_esperado = np.ravel(explainer.expected_value)[-1]
+
+        return cls(
+            preprocessor.get_feature_names_out(),
+            classifier.feature_importances_,
+            valor_esperado,
+            [int(classe) for classe in classifier.classes_],
+            sha256
+        )
+
+    def principais_importancias(self, n=3):
+
+        """
+        Retorna as n features de maior importância global: lista de (nome técnico, rótulo, importância)
+        """
+
+        return [
+            (self.nomes_tecnicos[i], self.rotulos[i], float(self.importancias[i]))
+            for i in self.ordem_importancia[:n]
+        ]
+
+    def como_dicionario(self):
+        return {
+            'sha256': self.sha256,
+            'nomes_tecnicos': self.nomes_tecnicos,
+            'importancias': self.importancias.tolist(),
+            'valor_esperado': self.valor_esperado,
+            'classes': self.classes
+        }
+
+    @classmethod
+    def de_dicionario(cls, dados):
+        return cls(dados['nomes_tecnicos'], dados['importancias'], dados['valor_esperado'], dados['classes'], dados.get('sha256'))
+
+    def salvar(self, caminho):
+
+        """
+        Grava os metadados em JSON (escrita atômica)
+        """
+
+        caminho = Path(caminho)
+        descritor, temporario = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=caminho.parent)
+
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.como_dicionario(), arquivo, ensure_ascii=False, indent=2)
+
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho):
+        return cls.de_dicionario(json.loads(Path(caminho).read_text(encoding='utf-8')))
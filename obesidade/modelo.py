@@ -0,0 +1,117 @@
+"""
+Carregamento do modelo treinado, sem dependência do Streamlit.
+"""
+
+# Importar biblioteca completa - padrão
+import weakref
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import joblib
+
+# Importar biblioteca completa - projeto
+from obesidade.artefatos import (
+    carregar_metadados_cache, carregar_modelo_cache, carregar_motor_cache, diretorio_versao, hash_arquivo, resolver_versao
+)
+from obesidade.config import MODEL_FILENAME, MODEL_PATH
+from obesidade.execucao import aplicar_politica
+
+# Origem de cada modelo carregado: (diretório do cache ou None, SHA-256 do artefato). A entrada some junto com o modelo
+_origens = weakref.WeakKeyDictionary()
+
+# Carregar o modelo
+def carregar_modelo():
+
+    """
+    Carrega o modelo treinado (.joblib) pelo cache local endereçado por conteúdo (models/cache/).
+    O artefato vem da pasta models/ ou, na ausência dele, do GitHub (com timeout e verificação de hash).
+    A política de execução da inferência (obesidade.execucao) é aplicada ao modelo carregado.
+    """
+
+    # Tentativa pelo cache (local ou remoto)
+    try:
+        diretorio = resolver_versao()
+        if diretorio is not None:
+            model = aplicar_politica(carregar_modelo_cache(diretorio))
+            _origens[model] = (diretorio, Path(diretorio).name)
+            return model
+    except Exception:
+        pass
+
+    # Tentativa Local direta (ex.: sistema de arquivos somente leitura); o hash do arquivo identifica a versão
+    for caminho in (Path(MODEL_FILENAME), MODEL_PATH):
+        try:
+            model = aplicar_politica(joblib.load(caminho))
+        except FileNotFoundError:
+            continue
+        _origens[model] = (None, hash_arquivo(caminho))
+        return model
+
+    return None
+
+# Origem de um modelo
+def _origem(model):
+    try:
+        return _origens.get(model, (None, None))
+    except TypeError:
+        return (None, None)
+
+# Diretório do cache de um modelo
+def diretorio_modelo(model):
+
+    """
+    Retorna o diretório da versão do cache de onde o modelo foi carregado (None se ele não veio do cache)
+    """
+
+    return _origem(model)[0]
+
+# Hash de um modelo
+def sha256_modelo(model):
+
+    """
+    Retorna o SHA-256 do artefato de onde o modelo foi carregado, pelo cache ou diretamente do .joblib
+    (None se o modelo não foi carregado por carregar_modelo)
+    """
+
+    return _origem(model)[1]
+
+# Carregar o motor compilado
+def carregar_motor(model=None):
+
+    """
+    Carrega o MotorCompilado memory-mapped da versão do modelo informado (None se indisponível).
+    Sem modelo (ex.: processos que usam apenas o motor), usa a versão resolvida no cache.
+    """
+
+    try:
+        diretorio = diretorio_modelo(model) if model is not None else resolver_versao(permitir_download=False)
+        if diretorio is not None:
+            return carregar_motor_cache(diretorio)
+    except Exception:
+        pass
+
+    return None
+
+# Carregar os metadados do modelo
+def carregar_metadados(model, explainer=None, sha256=None):
+
+    """
+    Carrega os metadados (nomes, rótulos, importâncias, valor esperado do SHAP) da versão do cache do
+    próprio modelo (ou da versão sha256 informada) ou os calcula a partir do modelo carregado.
+    Fora do cache, o SHA-256 é o do arquivo carregado, para identificar a versão mesmo assim.
+    """
+
+    from obesidade.metadados import MetadadosModelo
+
+    sha256 = sha256 or sha256_modelo(model)
+
+    try:
+        diretorio = diretorio_modelo(model) or (diretorio_versao(sha256) if sha256 is not None else None)
+        if diretorio is not None and Path(diretorio).is_dir():
+            metadados = carregar_metadados_cache(diretorio, model)
+            if metadados is not None:
+                return metadados
+    except Exception:
+        pass
+
+    return MetadadosModelo.construir(model, explainer, sha256)
@@ -0,0 +1,367 @@
+"""
+Motor de inferência compilado para o Pipeline (ColumnTransformer + RandomForest).
+
+O pré-processamento e as 300 árvores são convertidos em vetores NumPy contíguos (feature, limiar,
+filhos e valores das folhas). A travessia é vetorizada sobre todas as árvores e linhas ao mesmo tempo
+(ou compilada com numba, quando disponível) e devolve classe e probabilidade em uma única passada,
+sem o overhead do Pipeline do sklearn. Lotes a partir de MOTOR_LIMIAR_LOTE linhas são pontuados pelo
+Pipeline, que tem vazão maior nesse regime.
+
+Uso (validação e comparação com o Pipeline original):
+    python -m obesidade.motor
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import threading
+import time
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import MOTOR_LIMIAR_LOTE
+from obesidade.execucao import executar_em_blocos
+
+# Nomes dos vetores que compõem o motor (usados também na persistência)
+VETORES = (
+    'escala', 'deslocamento',
+    'raizes', 'feature', 'limiar', 'esquerda', 'direita', 'valor_folha', 'classes'
+)
+
+class MotorCompilado:
+
+    """
+    Representação em vetores planos do pré-processamento e da floresta do Pipeline treinado
+    """
+
+    def __init__(self, colunas_numericas, colunas_binarias, colunas_categoricas, categorias, **vetores):
+        self.colunas_numericas = list(colunas_numericas)
+        self.colunas_binarias = list(colunas_binarias)
+        self.colunas_categoricas = list(colunas_categoricas)
+        self.categorias = [list(lista) for lista in categorias]
+
+        for nome in VETORES:
+            setattr(self, nome, vetores[nome])
+
+        # Posição inicial de cada variável categórica dentro do bloco one-hot
+        inicio_cat = len(self.colunas_numericas) + len(self.colunas_binarias)
+        tamanhos = [len(lista) for lista in self.categorias]
+        self._inicio_categorias = inicio_cat + np.concatenate([[0], np.cumsum(tamanhos)[:-1]]).astype(int)
+        self._n_features = inicio_cat + sum(tamanhos)
+        self._mapa_categorias = [
+            {categoria: i for i, categoria in enumerate(lista)} for lista in self.categorias
+        ]
+
+    # COMPILAÇÃO
+    @classmethod
+    def compilar(cls, model):
+
+        """
+        Compila o Pipeline treinado (passos 'preprocess' e 'clf') em vetores NumPy
+        """
+
+        preprocessor = model.named_steps['preprocess']
+        classifier = model.named_steps['clf']
+
+        # 1. Pré-processamento: MinMaxScaler + passthrough + OneHotEncoder (nesta ordem)
+        transformadores = {nome: (transformador, colunas) for nome, transformador, colunas in preprocessor.transformers_}
+        if set(transformadores) - {'remainder'} != {'num', 'bin', 'cat'}:
+            raise ValueError("Pré-processamento não suportado pelo motor compilado")
+
+        scaler = transformadores['num'][0].named_steps['scaler']
+        encoder = transformadores['cat'][0].named_steps['onehot']
+
+        # 2. Floresta: concatena todas as árvores em vetores únicos com deslocamento de índices
+        features, limiares, esquerdas, direitas, valores, raizes = [], [], [], [], [], []
+        deslocamento = 0
+
+        for estimador in classifier.estimators_:
+            arvore = estimador.tree_
+            indices = np.arange(arvore.node_count)
+            folha = arvore.children_left == -1
+
+            # Nas folhas os filhos apontam para o próprio nó (critério de parada da travessia)
+            esquerda = np.where(folha, indices, arvore.children_left) + deslocamento
+            direita = np.where(folha, indices, arvore.children_right) + deslocamento
+
+            # Mesma normalização do predict_proba de cada árvore do sklearn
+            valor = arvore.value[:, 0, :].astype(np.float64)
+            normalizador = valor.sum(axis=1, keepdims=True)
+            normalizador[normalizador == 0.0] = 1.0
+
+            features.append(np.where(folha, 0, arvore.feature))
+            limiares.append(arvore.threshold)
+            esquerdas.append(esquerda)
+            direitas.append(direita)
+            valores.append(valor / normalizador)
+            raizes.append(deslocamento)
+
+            deslocamento += arvore.node_count
+
+        return cls(
+            colunas_numericas=transformadores['num'][1],
+            colunas_binarias=transformadores['bin'][1],
+            colunas_categoricas=transformadores['cat'][1],
+            categorias=[[str(valor) for valor in lista] for lista in encoder.categories_],
+            escala=np.ascontiguousarray(scaler.scale_, dtype=np.float64),
+            deslocamento=np.ascontiguousarray(scaler.min_, dtype=np.float64),
+            raizes=np.array(raizes, dtype=np.int64),
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int64),
+            limiar=np.ascontiguousarray(np.concatenate(limiares), dtype=np.float64),
+            esquerda=np.ascontiguousarray(np.concatenate(esquerdas), dtype=np.int64),
+            direita=np.ascontiguousarray(np.concatenate(direitas), dtype=np.int64),
+            valor_folha=np.ascontiguousarray(np.concatenate(valores)),
+            classes=np.asarray(classifier.classes_)
+        )
+
+    # PRÉ-PROCESSAMENTO
+    def transformar(self, df):
+
+        """
+        Reproduz o ColumnTransformer para um DataFrame (ou lista de dicionários) com as 15 features
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            df = pd.DataFrame(list(df))
+
+        X = np.zeros((len(df), self._n_features), dtype=np.float64)
+        n_num = len(self.colunas_numericas)
+        n_bin = len(self.colunas_binarias)
+
+        X[:, :n_num] = df[self.colunas_numericas].to_numpy(dtype=np.float64) * self.escala + self.deslocamento
+        X[:, n_num:n_num + n_bin] = df[self.colunas_binarias].to_numpy(dtype=np.float64)
+
+        # One-hot: categorias desconhecidas ficam zeradas (handle_unknown='ignore')
+        linhas = np.arange(len(df))
+        for j, coluna in enumerate(self.colunas_categoricas):
+            codigos = pd.Categorical(df[coluna].astype(str), categories=self.categorias[j]).codes
+            conhecidas = codigos >= 0
+            X[linhas[conhecidas], self._inicio_categorias[j] + codigos[conhecidas]] = 1.0
+
+        return X
+
+    def transformar_registro(self, registro):
+
+        """
+        Caminho rápido para uma única linha (dicionário), sem construir DataFrame
+        """
+
+        x = np.zeros((1, self._n_features), dtype=np.float64)
+        n_num = len(self.colunas_numericas)
+        n_bin = len(self.colunas_binarias)
+
+        x[0, :n_num] = np.array([registro[c] for c in self.colunas_numericas], dtype=np.float64) * self.escala + self.deslocamento
+        x[0, n_num:n_num + n_bin] = [registro[c] for c in self.colunas_binarias]
+
+        for j, coluna in enumerate(self.colunas_categoricas):
+            codigo = self._mapa_categorias[j].get(str(registro[coluna]))
+            if codigo is not None:
+                x[0, self._inicio_categorias[j] + codigo] = 1.0
+
+        return x
+
+    # INFERÊNCIA
+    def prever_proba_transformado(self, X):
+
+        """
+        Percorre todas as árvores e retorna a média das probabilidades das folhas
+        """
+
+        # O sklearn compara as features em float32 com limiares em float64
+        X = np.ascontiguousarray(X, dtype=np.float32)
+
+        percorrer_numba = _obter_percorrer_numba()
+        if percorrer_numba is not None:
+            soma = np.zeros((X.shape[0], self.valor_folha.shape[1]), dtype=np.float64)
+            percorrer_numba(X, self.raizes, self.feature, self.limiar, self.esquerda, self.direita, self.valor_folha, soma)
+        else:
+            soma = self._percorrer_numpy(X)
+
+        return soma / len(self.raizes)
+
+    def aquecer(self):
+
+        """
+        Executa uma travessia de uma linha para compilar (ou ler do cache) a função do numba
+        antes da primeira requisição
+        """
+
+        self.prever_proba_transformado(np.zeros((1, self._n_features), dtype=np.float32))
+
+        return self
+
+    def _percorrer_numpy(self, X):
+
+        """
+        Travessia vetorizada de todas as (linha, árvore) ao mesmo tempo; os pares que já chegaram
+        a uma folha saem do conjunto ativo a cada nível
+        """
+
+        n_linhas, n_features = X.shape
+        n_arvores = len(self.raizes)
+        valores = X.astype(np.float64).ravel()
+
+        nos = np.tile(self.raizes, n_linhas)
+        ativos = np.arange(nos.size)
+        nos_ativos = nos.copy()
+        base_ativos = np.repeat(np.arange(n_linhas) * n_features, n_arvores)
+
+        while ativos.size:
+            vai_esquerda = valores[base_ativos + self.feature[nos_ativos]] <= self.limiar[nos_ativos]
+            proximos = np.where(vai_esquerda, self.esquerda[nos_ativos], self.direita[nos_ativos])
+            nos[ativos] = proximos
+
+            continua = proximos != nos_ativos
+            ativos = ativos[continua]
+            nos_ativos = proximos[continua]
+            base_ativos = base_ativos[continua]
+
+        return self.valor_folha[nos].reshape(n_linhas, n_arvores, -1).sum(axis=1)
+
+    def prever(self, df):
+
+        """
+        Retorna (classes, probabilidades) em uma única passada
+        """
+
+        if isinstance(df, pd.DataFrame) and len(df) == 1:
+            df = df.iloc[0].to_dict()
+
+        if isinstance(df, dict):
+            X = self.transformar_registro(df)
+        else:
+            X = self.transformar(df)
+
+        probabilidades = executar_em_blocos(self.prever_proba_transformado, X)
+        classes = np.asarray(self.classes).take(np.argmax(probabilidades, axis=1))
+
+        return classes, probabilidades
+
+# Travessia compilada (mesma ordem de acumulação das árvores do sklearn)
+def _percorrer(X, raizes, feature, limiar, esquerda, direita, valor_folha, soma):
+    for i in range(X.shape[0]):
+        for t in range(raizes.shape[0]):
+            no = raizes[t]
+            while esquerda[no] != no:
+                if np.float64(X[i, feature[no]]) <= limiar[no]:
+                    no = esquerda[no]
+                else:
+                    no = direita[no]
+            for c in range(valor_folha.shape[1]):
+                soma[i, c] += valor_folha[no, c]
+
+_percorrer_numba = None
+_numba_verificado = False
+_lock_numba = threading.Lock()
+
+# Obter a travessia compilada
+def _obter_percorrer_numba():
+
+    """
+    Compila a travessia com numba no primeiro uso (o numba já é instalado como dependência do shap).
+    A importação é adiada para não pesar na importação do módulo. Retorna None se o numba não estiver disponível.
+    A trava evita que threads concorrentes compilem a travessia mais de uma vez.
+    """
+
+    global _percorrer_numba, _numba_verificado
+
+    if not _numba_verificado:
+        with _lock_numba:
+            if not _numba_verificado:
+                try:
+                    from numba import njit
+                    _percorrer_numba = njit(cache=True, nogil=True)(_percorrer)
+                except ImportError:
+                    _percorrer_numba = None
+                _numba_verificado = True
+
+    return _percorrer_numba
+
+# Prever com ou sem o motor
+def prever(model, input_df, motor=None):
+
+    """
+    Retorna (classes, probabilidades) usando o motor compilado quando disponível, ou o Pipeline original.
+    Lotes a partir de MOTOR_LIMIAR_LOTE linhas vão para o Pipeline, quando ele estiver carregado.
+    """
+
+    if motor is not None and (model is None or len(input_df) < MOTOR_LIMIAR_LOTE):
+        return motor.prever(input_df)
+
+    # Uma única passada pelas árvores (o predict do Random Forest é o argmax do predict_proba)
+    probabilidades = executar_em_blocos(model.predict_proba, input_df)
+
+    return model.classes_.take(np.argmax(probabilidades, axis=1)), probabilidades
+
+# Comparar motor e Pipeline
+def comparar(model, motor, df, repeticoes=200):
+
+    """
+    Valida a equivalência das probabilidades e mede latência (linha única) e vazão (lote) dos dois caminhos
+    """
+
+    from obesidade.features import preparar_entrada
+
+    X = preparar_entrada(df)
+
+    # 1. Equivalência das probabilidades
+    _, proba_motor = motor.prever(X)
+    proba_pipeline = model.predict_proba(X)
+    diferenca = float(np.abs(proba_motor - proba_pipeline).max())
+
+    # 2. Latência por requisição (uma linha, classe + probabilidade)
+    def latencias(funcao):
+        tempos = []
+        for i in range(repeticoes):
+            linha = X.iloc[[i % len(X)]]
+            inicio = time.perf_counter()
+            funcao(linha)
+            tempos.append(time.perf_counter() - inicio)
+        return np.array(tempos) * 1000
+
+    lat_pipeline = latencias(lambda linha: prever(model, linha))
+    lat_motor = latencias(lambda linha: prever(model, linha, motor))
+
+    # 3. Vazão em lote
+    def vazao(funcao):
+        inicio = time.perf_counter()
+        funcao(X)
+        return len(X) / (time.perf_counter() - inicio)
+
+    return {
+        'diferenca_maxima_proba': diferenca,
+        'pipeline_p50_ms': float(np.percentile(lat_pipeline, 50)),
+        'pipeline_p99_ms': float(np.percentile(lat_pipeline, 99)),
+        'motor_p50_ms': float(np.percentile(lat_motor, 50)),
+        'motor_p99_ms': float(np.percentile(lat_motor, 99)),
+        'pipeline_linhas_por_segundo': vazao(lambda lote: prever(model, lote)),
+        'motor_linhas_por_segundo': vazao(motor.prever),
+        'roteado_linhas_por_segundo': vazao(lambda lote: prever(model, lote, motor))
+    }
+
+# Função principal
+def main(argv=None):
+    from obesidade.batch import ler_arquivo
+    from obesidade.dataset import carregar_base
+    from obesidade.modelo import carregar_modelo
+
+    parser = argparse.ArgumentParser(description="Valida e compara o motor compilado com o Pipeline original")
+    parser.add_argument('--entrada', default=None, help="Base no schema da base_limpa.csv (padrão: base limpa colunar)")
+    parser.add_argument('--repeticoes', type=int, default=200, help="Requisições de uma linha por caminho")
+    args = parser.parse_args(argv)
+
+    model = carregar_modelo()
+    if model is None:
+        raise SystemExit("ERRO: o modelo não foi carregado. Verifique a pasta models/")
+
+    motor = MotorCompilado.compilar(model)
+    base = ler_arquivo(args.entrada) if args.entrada else carregar_base()
+    resultado = comparar(model, motor, base, args.repeticoes)
+
+    for chave, valor in resultado.items():
+        print(f"{chave}: {valor:.6g}")
+
+if __name__ == "__main__":
+    main()
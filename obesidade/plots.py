@@ -0,0 +1,282 @@
+"""
+Gráfico Waterfall dos valores SHAP sem estado global do pyplot.
+
+O gráfico é montado diretamente a partir do vetor SHAP como especificação Vega-Lite (renderizada
+no navegador), evitando criar uma figura do matplotlib por requisição.
+
+Uso (teste de estabilidade de memória):
+    python -m obesidade.plots --repeticoes 2000 --modo vega
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Cores padrão do SHAP
+COR_AUMENTA = '#ff0051'
+COR_DIMINUI = '#008bfb'
+
+# Preparar os dados do Waterfall
+def dados_waterfall(valores, valor_base, nomes, max_display=10):
+
+    """
+    Ordena as contribuições por impacto e agrega as menores em "Outras N variáveis" (como no shap.plots.waterfall).
+    Retorna um DataFrame com início e fim de cada barra, na ordem de exibição.
+    """
+
+    valores = np.asarray(valores, dtype=float)
+    ordem = np.argsort(-np.abs(valores))
+
+    if len(valores) > max_display:
+        principais = ordem[:max_display - 1]
+        restantes = ordem[max_display - 1:]
+        rotulos = [nomes[i] for i in principais] + [f"Outras {len(restantes)} variáveis"]
+        contribuicoes = np.append(valores[principais], valores[restantes].sum())
+    else:
+        rotulos = [nomes[i] for i in ordem]
+        contribuicoes = valores[ordem]
+
+    # As barras são acumuladas de baixo (menor impacto) para cima, partindo do valor base
+    contribuicoes = contribuicoes[::-1]
+    rotulos = rotulos[::-1]
+    fim = valor_base + np.cumsum(contribuicoes)
+    inicio = fim - contribuicoes
+
+    return pd.DataFrame({
+        'variavel': rotulos,
+        'contribuicao': contribuicoes,
+        'inicio': inicio,
+        'fim': fim,
+        'efeito': np.where(contribuicoes >= 0, 'Aumenta o risco', 'Diminui o risco'),
+        'ordem': np.arange(len(rotulos))[::-1]
+    })
+
+# Gráfico Waterfall em Vega-Lite
+def especificacao_waterfall(valores, valor_base, nomes, max_display=10):
+
+    """
+    Monta a especificação Vega-Lite (gráfico vetorial renderizado no navegador) do Waterfall,
+    sem figura do matplotlib. Deve ser exibida com st.vega_lite_chart.
+    """
+
+    df = dados_waterfall(valores, valor_base, nomes, max_display)
+    df['texto'] = df['contribuicao'].map(lambda valor: f"{valor:+.2f}")
+    df['posicao_texto'] = np.maximum(df['inicio'], df['fim'])
+
+    valor_final = valor_base + float(np.sum(valores))
+    eixo_y = {'field': 'variavel', 'type': 'nominal', 'sort': {'field': 'ordem'}, 'title': None}
+
+    return {
+        'height': 35 * len(df),
+        'data': {'values': df.to_dict(orient='records')},
+        'layer': [
+            {
+                'mark': 'bar',
+                'encoding': {
+                    'y': eixo_y,
+                    'x': {'field': 'inicio', 'type': 'quantitative', 'title': 'Probabilidade de Risco', 'scale': {'zero': False}},
+                    'x2': {'field': 'fim'},
+                    'color': {
+                        'field': 'efeito',
+                        'type': 'nominal',
+                        'scale': {'domain': ['Aumenta o risco', 'Diminui o risco'], 'range': [COR_AUMENTA, COR_DIMINUI]},
+                        'legend': {'title': None, 'orient': 'bottom'}
+                    },
+                    'tooltip': [
+                        {'field': 'variavel', 'type': 'nominal', 'title': 'Variável'},
+                        {'field': 'contribuicao', 'type': 'quantitative', 'title': 'Contribuição', 'format': '+.3f'}
+                    ]
+                }
+            },
+            {
+                'mark': {'type': 'text', 'align': 'left', 'dx': 4},
+                'encoding': {
+                    'y': eixo_y,
+                    'x': {'field': 'posicao_texto', 'type': 'quantitative'},
+                    'text': {'field': 'texto', 'type': 'nominal'}
+                }
+            },
+            {
+                'data': {'values': [
+                    {'valor': valor_base, 'rotulo': f"E[f(x)] = {valor_base:.3f}"},
+                    {'valor': valor_final, 'rotulo': f"f(x) = {valor_final:.3f}"}
+                ]},
+                'mark': {'type': 'rule', 'strokeDash': [4, 4], 'color': 'gray'},
+                'encoding': {
+                    'x': {'field': 'valor', 'type': 'quantitative'},
+                    'tooltip': {'field': 'rotulo', 'type': 'nominal'}
+                }
+            }
+        ]
+    }
+
+# Curvas de risco da simulação de cenários em Vega-Lite
+def especificacao_cenarios(df, campo_x, titulo_x, campo_cor=None, titulo_cor=None, ordem_x=None, valor_atual=None):
+
+    """
+    Monta a especificação Vega-Lite das curvas de probabilidade de risco ao longo de uma variável
+    (eixo horizontal) e, opcionalmente, de uma segunda variável (uma curva por cor).
+    Variáveis categóricas usam ordem_x como ordem do eixo; numéricas recebem a linha do valor atual.
+    """
+
+    numerico = ordem_x is None
+    eixo_x = {'field': campo_x, 'type': 'quantitative' if numerico else 'ordinal', 'title': titulo_x}
+    if numerico:
+        eixo_x['scale'] = {'zero': False}
+    else:
+        eixo_x['sort'] = list(ordem_x)
+        eixo_x['axis'] = {'labelAngle': -30}
+
+    tooltip = [
+        {'field': campo_x, 'type': eixo_x['type'], 'title': titulo_x},
+        {'field': 'probabilidade_risco', 'type': 'quantitative', 'title': 'Probabilidade de Risco', 'format': '.1%'}
+    ]
+
+    encoding = {
+        'x': eixo_x,
+        'y': {
+            'field': 'probabilidade_risco', 'type': 'quantitative', 'title': 'Probabilidade de Risco',
+            'scale': {'domain': [0, 1]}, 'axis': {'format': '%'}
+        },
+        'tooltip': tooltip
+    }
+
+    if campo_cor is not None:
+        encoding['color'] = {'field': campo_cor, 'type': 'nominal', 'title': titulo_cor, 'legend': {'orient': 'bottom'}}
+        tooltip.insert(1, {'field': campo_cor, 'type': 'nominal', 'title': titulo_cor})
+    else:
+        encoding['color'] = {'value': COR_AUMENTA}
+
+    camadas = [
+        {'mark': {'type': 'line', 'point': not numerico}, 'encoding': encoding},
+        {
+            'data': {'values': [{'limiar': 0.5}]},
+            'mark': {'type': 'rule', 'strokeDash': [4, 4], 'color': 'gray'},
+            'encoding': {'y': {'field': 'limiar', 'type': 'quantitative'}}
+        }
+    ]
+
+    if numerico and valor_atual is not None:
+        camadas.append({
+            'data': {'values': [{'atual': float(valor_atual)}]},
+            'mark': {'type': 'rule', 'color': COR_DIMINUI},
+            'encoding': {
+                'x': {'field': 'atual', 'type': 'quantitative'},
+                'tooltip': {'field': 'atual', 'type': 'quantitative', 'title': 'Valor atual'}
+            }
+        })
+
+    return {
+        'height': 320,
+        'data': {'values': df.to_dict(orient='records')},
+        'layer': camadas
+    }
+
+# Gráfico Waterfall em matplotlib (sem pyplot global)
+def grafico_waterfall_matplotlib(valores, valor_base, nomes, dados=None, max_display=10):
+
+    """
+    Gera o Waterfall original do SHAP e retorna a figura já desvinculada do pyplot (sem acúmulo de figuras)
+    """
+
+    import matplotlib.pyplot as plt
+    import shap
+
+    explicacao = shap.Explanation(values=np.asarray(valores), base_values=valor_base, data=dados, feature_names=list(nomes))
+
+    # Ajustamos o tamanho da figura para ficar bem no layout wide
+    fig = plt.figure(figsize=(10, 6))
+    shap.plots.waterfall(explicacao, show=False, max_display=max_display)
+
+    # Remove a figura do gerenciador do pyplot: ela é liberada quando não houver mais referências
+    plt.close(fig)
+
+    return fig
+
+# Memória residente atual do processo
+def rss_atual_mb():
+
+    """
+    Retorna a memória residente (RSS) atual em MB (/proc no Linux). Nos demais sistemas Unix usa o pico
+    (ru_maxrss, em bytes no macOS e em KB nos demais); sem o módulo resource (Windows), retorna NaN.
+    """
+
+    try:
+        with open('/proc/self/statm', encoding='ascii') as arquivo:
+            paginas = int(arquivo.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+
+# Medir a memória ao longo de várias renderizações
+def medir_memoria(repeticoes=2000, modo='vega', n_features=37, intervalo=250):
+
+    """
+    Renderiza o Waterfall repetidas vezes com valores aleatórios e registra a memória residente
+    """
+
+    import matplotlib.pyplot as plt
+
+    rng = np.random.default_rng(0)
+    nomes = [f"variavel_{i}" for i in range(n_features)]
+    medicoes = []
+    inicio = time.perf_counter()
+
+    for i in range(1, repeticoes + 1):
+        valores = rng.normal(0, 0.05, n_features)
+
+        if modo == 'vega':
+            json.dumps(especificacao_waterfall(valores, 0.5, nomes))
+        else:
+            fig = grafico_waterfall_matplotlib(valores, 0.5, nomes)
+            fig.savefig(_DescartarSaida(), format='png')
+            del fig
+
+        if i % intervalo == 0:
+            gc.collect()
+            medicoes.append({
+                'renderizacoes': i,
+                'rss_mb': rss_atual_mb(),
+                'figuras_abertas': len(plt.get_fignums()),
+                'ms_por_grafico': (time.perf_counter() - inicio) * 1000 / i
+            })
+
+    return pd.DataFrame(medicoes)
+
+class _DescartarSaida:
+
+    """
+    Arquivo "nulo" para medir o custo de renderização sem gravar em disco
+    """
+
+    def write(self, dados):
+        return len(dados)
+
+# Função principal
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede a estabilidade de memória da renderização do Waterfall SHAP")
+    parser.add_argument('--repeticoes', type=int, default=2000, help="Quantidade de gráficos gerados")
+    parser.add_argument('--modo', choices=['vega', 'matplotlib'], default='vega', help="Caminho de renderização")
+    parser.add_argument('--intervalo', type=int, default=250, help="Renderizações entre cada medição")
+    args = parser.parse_args(argv)
+
+    print(medir_memoria(args.repeticoes, args.modo, intervalo=args.intervalo).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
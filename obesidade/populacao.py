@@ -0,0 +1,170 @@
+"""
+Índice populacional de SHAP calculado offline, para comparar o paciente com a base de referência.
+
+O job calcula, em paralelo e em blocos, os valores SHAP (classe positiva) e a probabilidade de risco de
+todas as linhas da base limpa com o mesmo shap.TreeExplainer do app. São gravadas apenas as colunas
+ordenadas (float32, NumPy comprimido), de modo que o app obtém o percentil do risco e de cada contribuição
+por busca binária (np.searchsorted), sem calcular SHAP da população a cada requisição.
+
+Uso:
+    python -m obesidade.populacao
+    python -m obesidade.populacao --n-jobs 4 --tamanho-bloco 250
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+
+# Importar biblioteca completa - projeto
+from obesidade.config import FEATURES, SHAP_POPULACAO_PATH
+
+# Calcular SHAP de um bloco (executado nos processos do pool)
+def _shap_bloco(explainer, bloco):
+    return explainer(bloco).values[:, :, 1].astype(np.float32)
+
+# Calcular SHAP da população
+def calcular_shap_populacao(model, base, n_jobs=-1, tamanho_bloco=250):
+
+    """
+    Retorna (valores SHAP da classe positiva [linhas x features transformadas], probabilidades, valor base).
+    Os blocos de linhas são distribuídos entre os núcleos (joblib).
+    """
+
+    import shap
+    from joblib import Parallel, delayed
+
+    from obesidade.features import preparar_entrada
+    from obesidade.motor import prever
+
+    X = preparar_entrada(base)
+    transformado = model.named_steps['preprocess'].transform(X)
+    explainer = shap.TreeExplainer(model.named_steps['clf'])
+
+    blocos = [transformado[inicio:inicio + tamanho_bloco] for inicio in range(0, len(transformado), tamanho_bloco)]
+    valores = Parallel(n_jobs=n_jobs)(delayed(_shap_bloco)(explainer, bloco) for bloco in blocos)
+
+    _, probabilidades = prever(model, X)
+    valor_base = float(np.ravel(explainer.expected_value)[-1])
+
+    return np.concatenate(valores), probabilidades[:, 1].astype(np.float32), valor_base
+
+# Gravar o índice
+def salvar_indice(caminho, valores, probabilidades, valor_base, nomes, modelo_sha256=None):
+
+    """
+    Ordena cada coluna e grava o índice em NumPy comprimido (escrita atômica)
+    """
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(prefix='.tmp-', suffix='.npz', dir=caminho.parent)
+
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            np.savez_compressed(
+                arquivo,
+                shap_ordenado=np.sort(valores, axis=0),
+                risco_ordenado=np.sort(probabilidades),
+                valor_base=np.float64(valor_base),
+                nomes=np.asarray(nomes, dtype=str),
+                modelo_sha256=np.asarray(modelo_sha256 or '')
+            )
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.unlink(temporario)
+
+    return caminho
+
+class IndicePopulacao:
+
+    """
+    Distribuições ordenadas do risco e das contribuições SHAP da população, com consulta por busca binária
+    """
+
+    def __init__(self, shap_ordenado, risco_ordenado, valor_base, nomes, modelo_sha256=None):
+        self.shap_ordenado = shap_ordenado
+        self.risco_ordenado = risco_ordenado
+        self.valor_base = float(valor_base)
+        self.nomes = list(nomes)
+        self.modelo_sha256 = modelo_sha256 or None
+
+        self.linhas = len(risco_ordenado)
+        self.medianas = shap_ordenado[self.linhas // 2]
+
+    @classmethod
+    def carregar(cls, caminho=SHAP_POPULACAO_PATH):
+        with np.load(caminho) as dados:
+            return cls(
+                dados['shap_ordenado'],
+                dados['risco_ordenado'],
+                dados['valor_base'],
+                dados['nomes'],
+                str(dados['modelo_sha256'])
+            )
+
+    def percentil_risco(self, probabilidade):
+
+        """
+        Percentual da população com probabilidade de risco menor ou igual à informada
+        """
+
+        posicao = np.searchsorted(self.risco_ordenado, np.float32(probabilidade), side='right')
+
+        return 100.0 * posicao / self.linhas
+
+    def percentis_contribuicoes(self, valores):
+
+        """
+        Percentil de cada contribuição SHAP do paciente na distribuição da respectiva feature
+        """
+
+        valores = np.asarray(valores, dtype=np.float32)
+        posicoes = np.array([
+            np.searchsorted(self.shap_ordenado[:, j], valores[j], side='right')
+            for j in range(len(valores))
+        ])
+
+        return 100.0 * posicoes / self.linhas
+
+# Função principal
+def main(argv=None):
+    from obesidade.artefatos import hash_arquivo
+    from obesidade.batch import ler_arquivo
+    from obesidade.config import MODEL_PATH
+    from obesidade.dataset import carregar_base
+    from obesidade.modelo import carregar_modelo
+
+    parser = argparse.ArgumentParser(description="Calcula o índice populacional de SHAP (offline)")
+    parser.add_argument('--entrada', default=None, help="Base no schema da base_limpa.csv (padrão: base limpa colunar)")
+    parser.add_argument('--saida', default=str(SHAP_POPULACAO_PATH), help="Arquivo .npz do índice")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Processos do cálculo do SHAP (-1 = todos os núcleos)")
+    parser.add_argument('--tamanho-bloco', type=int, default=250, help="Linhas por bloco enviado a cada processo")
+    args = parser.parse_args(argv)
+
+    model = carregar_modelo()
+    if model is None:
+        raise SystemExit("ERRO: o modelo não foi carregado. Verifique a pasta models/")
+
+    base = ler_arquivo(args.entrada) if args.entrada else carregar_base(colunas=FEATURES)
+
+    inicio = time.perf_counter()
+    valores, probabilidades, valor_base = calcular_shap_populacao(model, base, args.n_jobs, args.tamanho_bloco)
+    duracao = time.perf_counter() - inicio
+
+    nomes = model.named_steps['preprocess'].get_feature_names_out()
+    modelo_sha256 = hash_arquivo(MODEL_PATH) if MODEL_PATH.exists() else None
+    caminho = salvar_indice(args.saida, valores, probabilidades, valor_base, nomes, modelo_sha256)
+
+    print(f"Linhas: {len(valores)} | Features: {valores.shape[1]} | Tempo: {duracao:.1f} s")
+    print(f"Índice salvo em: {caminho} ({caminho.stat().st_size / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""
+Recarga do modelo sem reinício do app e pontuação sombra da versão candidata.
+
+Uma thread observa o artefato (.joblib) da pasta models/ (tamanho e data de modificação, a cada
+RECARGA_INTERVALO_S). Quando ele muda e permanece estável por um intervalo, a nova versão é registrada
+no cache de artefatos e carregada por completo em segundo plano (modelo, explicador do SHAP, metadados
+e motor aquecido), sem afetar as requisições em andamento. Cada versão reúne esses recursos em um único
+objeto (VersaoModelo), publicado por uma atribuição: a requisição usa do início ao fim a versão obtida
+no começo. Enquanto uma versão estiver referenciada (por uma requisição em andamento, por exemplo), os seus
+recursos continuam acessíveis a partir do modelo (versao_de), mesmo depois de outras trocas.
+
+No modo 'imediata' (RECARGA_MODO, padrão), a versão é promovida assim que fica pronta. No modo 'sombra',
+a nova versão fica como candidata: cada predição da versão ativa é repetida na candidata por uma thread de
+fundo (fila limitada a RECARGA_SOMBRA_MAX_PENDENTES), acumulando a concordância das classes, a diferença
+das probabilidades e a latência das duas versões, até a promoção manual (modo debug do app).
+
+Uso (comparação offline de um artefato candidato com o modelo atual, sobre a base limpa):
+    python -m obesidade.recarga --candidato novo_modelo.joblib --amostras 500
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+
+# Importar biblioteca completa - projeto
+from obesidade.artefatos import hash_arquivo
+from obesidade.config import (
+    MODEL_FILENAME, MODEL_PATH, RECARGA_INTERVALO_S, RECARGA_MODO, RECARGA_SOMBRA_JANELA, RECARGA_SOMBRA_MAX_PENDENTES
+)
+from obesidade.motor import prever
+
+class VersaoModelo:
+
+    """
+    Modelo e recursos derivados de um mesmo artefato, publicados e trocados juntos
+    """
+
+    def __init__(self, modelo, explicador=None, metadados=None, motor=None, sha256=None, origem=None, vizinhos=None):
+        self.modelo = modelo
+        self.explicador = explicador
+        self.metadados = metadados
+        self.motor = motor
+        self.vizinhos = vizinhos
+        self.sha256 = sha256 or getattr(metadados, 'sha256', None)
+        self.origem = origem
+
+        self.numero = None
+        self.carregada_em = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def descricao(self):
+        return {
+            'numero': self.numero,
+            'sha256': self.sha256,
+            'origem': self.origem,
+            'carregada_em': self.carregada_em,
+            'motor': self.motor is not None
+        }
+
+# Carregar uma versão completa a partir de um artefato
+def construir_versao(caminho):
+
+    """
+    Registra o artefato no cache (cópia, motor e metadados) e carrega o modelo, o explicador do SHAP,
+    os metadados, o motor, já aquecido, e o índice de casos semelhantes
+    """
+
+    import shap
+
+    from obesidade.artefatos import carregar_metadados_cache, carregar_modelo_cache, carregar_motor_cache, registrar_artefato
+    from obesidade.execucao import aplicar_politica
+    from obesidade.vizinhos import carregar_indice
+
+    diretorio = registrar_artefato(caminho)
+    modelo = aplicar_politica(carregar_modelo_cache(diretorio))
+    explicador = shap.TreeExplainer(modelo.named_steps['clf'])
+    metadados = carregar_metadados_cache(diretorio, modelo)
+
+    motor = carregar_motor_cache(diretorio)
+    if motor is not None:
+        motor.aquecer()
+
+    sha256 = Path(diretorio).name
+    try:
+        vizinhos = carregar_indice(modelo, sha256)
+    except (OSError, ValueError):
+        vizinhos = None
+
+    return VersaoModelo(modelo, explicador, metadados, motor, sha256, str(caminho), vizinhos)
+
+class ComparacaoSombra:
+
+    """
+    Concordância e latência da versão candidata em relação à ativa, nas mesmas entradas
+    """
+
+    def __init__(self, ativa, candidata, janela=RECARGA_SOMBRA_JANELA):
+        self.ativa = ativa.sha256 if ativa is not None else None
+        self.candidata = candidata.sha256
+
+        self.amostras = 0
+        self.concordantes = 0
+        self.soma_diferenca = 0.0
+        self.maior_diferenca = 0.0
+        self.erros = 0
+        self.descartadas = 0
+
+        self.latencias_ativa = deque(maxlen=janela)
+        self.latencias_candidata = deque(maxlen=janela)
+
+    def registrar(self, classe_ativa, probabilidade_ativa, classe_candidata, probabilidade_candidata,
+                  latencia_ativa_ms=None, latencia_candidata_ms=None):
+        diferenca = abs(float(probabilidade_candidata) - float(probabilidade_ativa))
+
+        self.amostras += 1
+        self.concordantes += int(int(classe_ativa) == int(classe_candidata))
+        self.soma_diferenca += diferenca
+        self.maior_diferenca = max(self.maior_diferenca, diferenca)
+
+        if latencia_ativa_ms is not None:
+            self.latencias_ativa.append(latencia_ativa_ms)
+        if latencia_candidata_ms is not None:
+            self.latencias_candidata.append(latencia_candidata_ms)
+
+    def resumo(self):
+        resumo = {
+            'ativa': self.ativa,
+            'candidata': self.candidata,
+            'amostras': self.amostras,
+            'concordancia': self.concordantes / self.amostras if self.amostras else None,
+            'diferenca_media_probabilidade': self.soma_diferenca / self.amostras if self.amostras else None,
+            'diferenca_maxima_probabilidade': self.maior_diferenca,
+            'erros': self.erros,
+            'descartadas': self.descartadas
+        }
+
+        for nome, latencias in (('ativa', self.latencias_ativa), ('candidata', self.latencias_candidata)):
+            for percentil in (50, 95):
+                resumo[f'latencia_{nome}_p{percentil}_ms'] = float(np.percentile(latencias, percentil)) if latencias else None
+
+        return resumo
+
+class GerenciadorVersoes:
+
+    """
+    Versão ativa, candidata e anterior do modelo, com observação do artefato e pontuação sombra
+    """
+
+    def __init__(self, caminho=None, intervalo=RECARGA_INTERVALO_S, modo=RECARGA_MODO,
+                 max_pendentes=RECARGA_SOMBRA_MAX_PENDENTES):
+        self.caminho = Path(caminho) if caminho else None
+        self.intervalo = float(intervalo)
+        self.modo = modo
+        self.max_pendentes = max(1, int(max_pendentes))
+
+        self.ativa = None
+        self.candidata = None
+        self.anterior = None
+        self.comparacao = None
+        self.historico = []
+        self.ultimo_erro = None
+
+        self._proximo_numero = 1
+        self._registro = weakref.WeakValueDictionary()  # id do modelo -> versão, enquanto a versão estiver em uso
+        self._estado_arquivo = None
+        self._verificado = False
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._pool = None
+        self._pendentes = 0
+
+    # Publicar uma versão
+    def publicar(self, versao):
+
+        """
+        Torna a versão ativa (troca atômica); a anterior continua disponível às requisições em andamento
+        """
+
+        with self._lock:
+            self._numerar(versao)
+            self.anterior, self.ativa = self.ativa, versao
+
+            if self.candidata is versao:
+                self.candidata = None
+                self.comparacao = None
+
+            self.historico.append({**versao.descricao(), 'publicada_em': time.strftime('%Y-%m-%dT%H:%M:%S')})
+
+        return versao
+
+    # Promover a candidata
+    def promover(self):
+        candidata = self.candidata
+        if candidata is None:
+            return None
+
+        return self.publicar(candidata)
+
+    # Descartar a candidata
+    def descartar_candidata(self):
+        with self._lock:
+            candidata, self.candidata, self.comparacao = self.candidata, None, None
+
+        return candidata
+
+    # Encontrar a versão de um modelo carregado
+    def versao_de(self, modelo):
+
+        """
+        Retorna a versão à qual o modelo pertence, ou None. Qualquer versão registrada é encontrada enquanto
+        estiver referenciada, e não apenas a ativa, a candidata e a anterior.
+        """
+
+        with self._lock:
+            versao = self._registro.get(id(modelo))
+
+        return versao if versao is not None and versao.modelo is modelo else None
+
+    # Verificar o artefato
+    def verificar(self):
+
+        """
+        Uma verificação do artefato: quando ele mudou e está estável desde a verificação anterior,
+        carrega a nova versão (promovida ou como candidata, conforme o modo). Retorna a versão carregada ou None.
+        """
+
+        caminho = self._caminho()
+        try:
+            estado = (caminho.stat().st_mtime_ns, caminho.stat().st_size)
+        except (AttributeError, OSError):
+            return None
+
+        # Espera o arquivo ficar estável por um intervalo (cópia ainda em andamento)
+        if estado != self._estado_arquivo:
+            self._estado_arquivo = estado
+            self._verificado = False
+            return None
+
+        if self._verificado:
+            return None
+        self._verificado = True
+
+        sha256 = hash_arquivo(caminho)
+        if any(versao is not None and versao.sha256 == sha256 for versao in (self.ativa, self.candidata)):
+            return None
+
+        try:
+            versao = construir_versao(caminho)
+        except Exception as erro:
+            self.ultimo_erro = f"{caminho}: {erro!r}"
+            return None
+
+        if self.modo == 'imediata' or self.ativa is None:
+            return self.publicar(versao)
+
+        with self._lock:
+            self._numerar(versao)
+            self.candidata = versao
+            self.comparacao = ComparacaoSombra(self.ativa, versao)
+
+        return versao
+
+    # Observar o artefato em segundo plano
+    def observar(self):
+
+        """
+        Inicia a thread de observação (apenas uma vez; intervalo 0 desativa)
+        """
+
+        with self._lock:
+            if self._thread is None and self.intervalo > 0:
+                self._thread = threading.Thread(target=self._laco, name='recarga-modelo', daemon=True)
+                self._thread.start()
+
+        return self
+
+    # Pontuar a candidata em segundo plano
+    def sombrear(self, input_df, classe, probabilidade, latencia_ms=None):
+
+        """
+        Repete a predição da versão ativa na candidata, fora do caminho da requisição.
+        Retorna False se não houver candidata ou se a fila da pontuação sombra estiver cheia.
+        """
+
+        with self._lock:
+            candidata, comparacao = self.candidata, self.comparacao
+            if candidata is None or comparacao is None:
+                return False
+
+            if self._pendentes >= self.max_pendentes:
+                comparacao.descartadas += 1
+                return False
+
+            self._pendentes += 1
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sombra')
+
+        self._pool.submit(self._pontuar_sombra, comparacao, candidata, input_df, classe, probabilidade, latencia_ms)
+
+        return True
+
+    def estado(self):
+        with self._lock:
+            return {
+                'modo': self.modo,
+                'ativa': self.ativa.descricao() if self.ativa is not None else None,
+                'candidata': self.candidata.descricao() if self.candidata is not None else None,
+                'anterior': self.anterior.descricao() if self.anterior is not None else None,
+                'comparacao': self.comparacao.resumo() if self.comparacao is not None else None,
+                'sombra_pendentes': self._pendentes,
+                'ultimo_erro': self.ultimo_erro,
+                'historico': list(self.historico)
+            }
+
+    def encerrar(self):
+        self._parar.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _pontuar_sombra(self, comparacao, candidata, input_df, classe, probabilidade, latencia_ms):
+        try:
+            inicio = time.perf_counter()
+            classes, probabilidades = prever(candidata.modelo, input_df, candidata.motor)
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+
+            with self._lock:
+                comparacao.registrar(classe, probabilidade, classes[0], probabilidades[0][1], latencia_ms, duracao_ms)
+        except Exception:
+            with self._lock:
+                comparacao.erros += 1
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+
+    def _laco(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as erro:
+                self.ultimo_erro = repr(erro)
+
+    def _caminho(self):
+
+        """
+        Artefato observado: o informado ou o mesmo usado na carga (diretório atual ou models/)
+        """
+
+        if self.caminho is not None:
+            return self.caminho
+
+        for caminho in (Path(MODEL_FILENAME), MODEL_PATH):
+            if caminho.exists():
+                return caminho
+
+        return None
+
+    def _numerar(self, versao):
+
+        """
+        Numera a versão e a registra pelo modelo (o registro não mantém a versão viva)
+        """
+
+        if versao.numero is None:
+            versao.numero = self._proximo_numero
+            self._proximo_numero += 1
+
+        self._registro[id(versao.modelo)] = versao
+
+# Comparar duas versões offline
+def comparar_versoes(ativa, candidata, df, amostras=200):
+
+    """
+    Pontua df com as duas versões: concordância e diferença das probabilidades no lote completo e
+    latência por requisição (uma linha por vez) nas primeiras linhas
+    """
+
+    classes_ativa, probabilidades_ativa = prever(ativa.modelo, df, ativa.motor)
+    classes_candidata, probabilidades_candidata = prever(candidata.modelo, df, candidata.motor)
+    diferencas = np.abs(probabilidades_candidata[:, 1] - probabilidades_ativa[:, 1])
+
+    comparacao = ComparacaoSombra(ativa, candidata)
+    for i in range(min(amostras, len(df))):
+        linha = df.iloc[[i]]
+
+        inicio = time.perf_counter()
+        classe_ativa, probabilidade_ativa = prever(ativa.modelo, linha, ativa.motor)
+        latencia_ativa = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        classe_candidata, probabilidade_candidata = prever(candidata.modelo, linha, candidata.motor)
+        latencia_candidata = (time.perf_counter() - inicio) * 1000
+
+        comparacao.registrar(
+            classe_ativa[0], probabilidade_ativa[0][1], classe_candidata[0], probabilidade_candidata[0][1],
+            latencia_ativa, latencia_candidata
+        )
+
+    return {
+        'linhas': len(df),
+        'concordancia_lote': float(np.mean(classes_ativa == classes_candidata)),
+        'diferenca_media_probabilidade_lote': float(diferencas.mean()),
+        'diferenca_maxima_probabilidade_lote': float(diferencas.max()),
+        **comparacao.resumo()
+    }
+
+# Função principal
+def main(argv=None):
+    from obesidade.dataset import carregar_base
+    from obesidade.features import preparar_entrada
+
+    parser = argparse.ArgumentParser(description="Compara um artefato candidato com o modelo atual (concordância e latência)")
+    parser.add_argument('--candidato', required=True, help="Arquivo .joblib da versão candidata")
+    parser.add_argument('--atual', default=None, help="Arquivo .joblib da versão atual (padrão: o de models/)")
+    parser.add_argument('--amostras', type=int, default=200, help="Requisições de uma linha usadas na latência")
+    args = parser.parse_args(argv)
+
+    atual = Path(args.atual) if args.atual else GerenciadorVersoes()._caminho()
+    if atual is None:
+        raise SystemExit("ERRO: modelo atual não encontrado. Informe --atual")
+
+    inicio = time.perf_counter()
+    ativa = construir_versao(atual)
+    candidata = construir_versao(args.candidato)
+    print(f"Versões carregadas em {time.perf_counter() - inicio:.2f} s")
+    print(f"  atual:     {ativa.sha256[:12]} ({atual})")
+    print(f"  candidata: {candidata.sha256[:12]} ({args.candidato})")
+
+    resultado = comparar_versoes(ativa, candidata, preparar_entrada(carregar_base()), args.amostras)
+    for nome, valor in resultado.items():
+        if nome in ('ativa', 'candidata'):
+            continue
+        print(f"  {nome:<38} {valor:.4f}" if isinstance(valor, float) else f"  {nome:<38} {valor}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Servidor HTTP (JSON) de inferência, independente do Streamlit, com micro-batching.
+
+Requisições concorrentes são agrupadas em lotes (até --max-lote registros ou --espera-ms de espera)
+e cada lote é pontuado em uma única chamada vetorizada por um pool de processos. Os processos
+compartilham os vetores do modelo via memory-mapping (cache de artefatos em models/cache/). Cada predição
+é registrada na auditoria (obesidade/auditoria.py) por uma fila gravada em segundo plano.
+
+Endpoints:
+    POST /predict  -> um registro (objeto JSON) ou lista de registros com as features do formulário
+    GET  /metrics  -> profundidade da fila, lotes e percentis de latência
+    GET  /drift    -> PSI/KS das entradas pontuadas em relação à base de treino
+    GET  /health   -> estado do servidor
+
+Uso:
+    python -m obesidade.servidor --porta 8000 --workers 2 --max-lote 64 --espera-ms 5
+    curl -X POST localhost:8000/predict -d '{"idade": 25, "genero": 1, ...}'
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.auditoria import obter_auditoria
+from obesidade.drift import obter_monitor
+from obesidade.features import validar_registro
+
+# ESTADO DE CADA PROCESSO DO POOL
+_model = None
+_motor = None
+
+# Inicializar o processo do pool
+def _inicializar_worker(diretorio=None):
+
+    """
+    Carrega o motor memory-mapped (ou o Pipeline, na ausência dele) uma única vez por processo.
+    O diretório é a versão do cache resolvida pelo servidor: todos os processos, inclusive os criados
+    depois (sob demanda ou ao recriar o pool), servem o mesmo modelo registrado na auditoria.
+    """
+
+    global _model, _motor
+
+    if diretorio is None:
+        from obesidade.modelo import carregar_modelo
+
+        _model = carregar_modelo()
+        return
+
+    from obesidade.artefatos import carregar_modelo_cache, carregar_motor_cache
+    from obesidade.execucao import aplicar_politica
+
+    _motor = carregar_motor_cache(diretorio)
+    if _motor is None:
+        _model = aplicar_politica(carregar_modelo_cache(diretorio))
+
+# Pontuar um lote no processo do pool
+def _pontuar_lote(registros):
+
+    """
+    Pontua uma lista de registros validados em uma única chamada vetorizada
+    """
+
+    from obesidade.motor import prever
+
+    classes, probabilidades = prever(_model, pd.DataFrame(registros), _motor)
+
+    return [
+        {'risco_previsto': int(classe), 'probabilidade_risco': float(probabilidade[1])}
+        for classe, probabilidade in zip(classes, probabilidades)
+    ]
+
+class MicroLote:
+
+    """
+    Agrupa registros de requisições concorrentes em lotes e os envia ao pool de processos.
+    Se o pool quebrar (um processo encerrado pelo sistema, por falta de memória, por exemplo), os lotes afetados
+    falham e um novo pool é criado com criar_executor, sem interromper o servidor.
+    """
+
+    def __init__(self, executor, max_lote=64, espera_ms=5.0, janela_metricas=10000, criar_executor=None):
+        self.executor = executor
+        self.criar_executor = criar_executor
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+
+        self._fila = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencias = deque(maxlen=janela_metricas)
+        self._tamanhos = deque(maxlen=janela_metricas)
+        self._em_processamento = 0
+        self._requisicoes = 0
+        self._erros = 0
+        self._pools_recriados = 0
+
+        self._thread = threading.Thread(target=self._laco, name='micro-lote', daemon=True)
+        self._thread.start()
+
+    def enviar(self, registros):
+
+        """
+        Enfileira os registros e retorna um Future por registro
+        """
+
+        futuros = []
+        for registro in registros:
+            futuro = Future()
+            self._fila.put((registro, futuro, time.perf_counter()))
+            futuros.append(futuro)
+
+        return futuros
+
+    def _laco(self):
+        while True:
+            lote = [self._fila.get()]
+            limite = time.perf_counter() + self.espera
+
+            # Aguarda mais registros até encher o lote ou estourar a espera máxima
+            while len(lote) < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                self._em_processamento += 1
+                self._tamanhos.append(len(lote))
+
+            # Uma falha no envio (pool quebrado ou encerrado) falha apenas este lote; o laço continua
+            executor = self.executor
+            try:
+                tarefa = executor.submit(_pontuar_lote, [registro for registro, _, _ in lote])
+            except Exception as erro:
+                tarefa = Future()
+                tarefa.set_exception(erro)
+
+            tarefa.add_done_callback(lambda tarefa, lote=lote, executor=executor: self._concluir(lote, tarefa, executor))
+
+    def _concluir(self, lote, tarefa, executor=None):
+        agora = time.perf_counter()
+
+        try:
+            resultados = tarefa.result()
+        except Exception as erro:
+            resultados = None
+            for _, futuro, _ in lote:
+                futuro.set_exception(erro)
+
+            if isinstance(erro, BrokenProcessPool):
+                self._recriar_executor(executor)
+
+        with self._lock:
+            self._em_processamento -= 1
+            self._requisicoes += len(lote)
+            if resultados is None:
+                self._erros += len(lote)
+            for _, _, inicio in lote:
+                self._latencias.append((agora - inicio) * 1000)
+
+        if resultados is not None:
+            for (_, futuro, _), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
+
+    def _recriar_executor(self, quebrado):
+
+        """
+        Substitui o pool quebrado por um novo (uma única vez por pool, mesmo com vários lotes afetados)
+        """
+
+        if self.criar_executor is None:
+            return
+
+        with self._lock:
+            if self.executor is not quebrado:
+                return
+            self.executor = self.criar_executor()
+            self._pools_recriados += 1
+
+        quebrado.shutdown(wait=False, cancel_futures=True)
+
+    def encerrar(self):
+        self.executor.shutdown(wait=True)
+
+    def metricas(self):
+
+        """
+        Retorna profundidade da fila, lotes em processamento e percentis de latência (ms)
+        """
+
+        with self._lock:
+            latencias = np.array(self._latencias)
+            tamanhos = np.array(self._tamanhos)
+            metricas = {
+                'fila': self._fila.qsize(),
+                'lotes_em_processamento': self._em_processamento,
+                'registros_pontuados': self._requisicoes,
+                'erros': self._erros,
+                'pools_recriados': self._pools_recriados,
+                'tamanho_medio_lote': float(tamanhos.mean()) if tamanhos.size else 0.0
+            }
+
+        for percentil in (50, 95, 99):
+            metricas[f'latencia_p{percentil}_ms'] = float(np.percentile(latencias, percentil)) if latencias.size else 0.0
+
+        return metricas
+
+# Criar o handler HTTP
+def criar_handler(micro_lote, timeout=30, modelo_sha256=None):
+
+    """
+    Cria a classe de handler HTTP ligada ao micro-lote informado (modelo_sha256 identifica a versão na auditoria)
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._responder(200, micro_lote.metricas())
+            elif self.path == '/drift':
+                relatorio = obter_monitor().relatorio().to_json(orient='records', force_ascii=False)
+                self._responder(200, json.loads(relatorio))
+            elif self.path == '/health':
+                self._responder(200, {'status': 'ok'})
+            else:
+                self._responder(404, {'erro': 'Rota não encontrada'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._responder(404, {'erro': 'Rota não encontrada'})
+                return
+
+            try:
+                tamanho = int(self.headers.get('Content-Length', 0))
+                corpo = json.loads(self.rfile.read(tamanho) or b'null')
+                unico = isinstance(corpo, dict)
+                registros = [validar_registro(registro) for registro in ([corpo] if unico else corpo)]
+            except (TypeError, ValueError) as erro:
+                self._responder(400, {'erro': str(erro)})
+                return
+
+            try:
+                resultados = [futuro.result(timeout=timeout) for futuro in micro_lote.enviar(registros)]
+            except Exception as erro:
+                self._responder(500, {'erro': f"Falha na predição: {erro}"})
+                return
+
+            # Monitor de drift (contagens no processo principal, registro a registro); falhas do monitor
+            # nunca transformam uma predição bem-sucedida em erro
+            try:
+                monitor = obter_monitor()
+                for registro in registros:
+                    monitor.observar_registro(registro)
+            except Exception:
+                pass
+
+            # Auditoria (fila gravada em segundo plano; não atrasa a resposta)
+            auditoria = obter_auditoria()
+            for registro, resultado in zip(registros, resultados):
+                auditoria.registrar_predicao(
+                    registro, resultado['risco_previsto'], resultado['probabilidade_risco'], modelo_sha256, origem='servidor'
+                )
+
+            self._responder(200, resultados[0] if unico else resultados)
+
+        def log_message(self, formato, *args):
+            pass
+
+    return Handler
+
+class ServidorHTTP(ThreadingHTTPServer):
+
+    """
+    Servidor HTTP com uma thread por conexão e fila de conexões maior que o padrão (5)
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+# Iniciar o servidor
+def criar_servidor(porta=8000, host='127.0.0.1', workers=None, max_lote=64, espera_ms=5.0):
+
+    """
+    Cria o servidor HTTP, o pool de processos e o micro-lote. Retorna (servidor, micro_lote)
+    """
+
+    workers = workers or max(1, (os.cpu_count() or 1))
+
+    # Garante o cache de artefatos antes de iniciar os processos (evita corrida na primeira carga);
+    # a versão resolvida aqui é a que os processos carregam e a que a auditoria registra
+    from obesidade.artefatos import resolver_versao
+    versao = resolver_versao()
+
+    def criar_executor():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker, initargs=(versao,))
+
+    micro_lote = MicroLote(criar_executor(), max_lote=max_lote, espera_ms=espera_ms, criar_executor=criar_executor)
+    servidor = ServidorHTTP((host, porta), criar_handler(micro_lote, modelo_sha256=versao.name if versao is not None else None))
+
+    return servidor, micro_lote
+
+# Função principal
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP de inferência com micro-batching")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço de escuta")
+    parser.add_argument('--porta', type=int, default=8000, help="Porta HTTP")
+    parser.add_argument('--workers', type=int, default=None, help="Processos do pool (padrão: núcleos da máquina)")
+    parser.add_argument('--max-lote', type=int, default=64, help="Máximo de registros por lote")
+    parser.add_argument('--espera-ms', type=float, default=5.0, help="Espera máxima para completar um lote (ms)")
+    args = parser.parse_args(argv)
+
+    servidor, micro_lote = criar_servidor(args.porta, args.host, args.workers, args.max_lote, args.espera_ms)
+    print(f"Servidor de inferência em http://{args.host}:{args.porta} (POST /predict, GET /metrics, GET /drift)")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        micro_lote.encerrar()
+        obter_auditoria().encerrar()
+
+if __name__ == "__main__":
+    main()
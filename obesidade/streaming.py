@@ -0,0 +1,224 @@
+"""
+Pontuação em fluxo (streaming) com memória limitada para arquivos maiores que a RAM.
+
+A entrada é lida em blocos de tamanho fixo, cada bloco é pontuado e gravado no CSV de saída
+antes da leitura do próximo. Um arquivo de checkpoint permite retomar a partir do último bloco concluído:
+em um CSV, a leitura recomeça direto na posição (em bytes) salva após esse bloco. O checkpoint guarda o
+tamanho e a data de modificação da entrada, e um arquivo substituído no mesmo caminho é pontuado do início.
+
+Uso:
+    python -m obesidade.streaming populacao.csv reports/populacao_pontuada.csv --tamanho-bloco 100000
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import io
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.batch import criar_explicador, pontuar_bloco
+from obesidade.modelo import carregar_modelo
+
+# Ler a entrada em blocos
+def ler_blocos(caminho, tamanho_bloco, pular_blocos=0, posicao=0):
+
+    """
+    Gera (bloco, posição) com blocos (DataFrames) de tamanho fixo de um arquivo CSV, Parquet ou Arrow IPC,
+    pulando os blocos já concluídos. No CSV, a leitura começa na posição informada (bytes) e a posição
+    gerada é a do fim do bloco; nos demais formatos, os blocos são pulados pelo número e a posição é None.
+    """
+
+    caminho = Path(caminho)
+
+    if caminho.suffix.lower() in ('.arrow', '.feather'):
+        import pyarrow as pa
+
+        # Memory-mapped: apenas as páginas do bloco atual são lidas do disco
+        tabela = pa.ipc.open_file(pa.memory_map(str(caminho), 'r')).read_all()
+        for inicio in range(pular_blocos * tamanho_bloco, tabela.num_rows, tamanho_bloco):
+            yield tabela.slice(inicio, tamanho_bloco).to_pandas(), None
+        return
+
+    if caminho.suffix.lower() == '.parquet':
+        import pyarrow.parquet as pq
+
+        arquivo = pq.ParquetFile(caminho)
+        for indice, lote in enumerate(arquivo.iter_batches(batch_size=tamanho_bloco)):
+            if indice >= pular_blocos:
+                yield lote.to_pandas(), None
+        return
+
+    yield from ler_blocos_csv(caminho, tamanho_bloco, posicao)
+
+# Ler um CSV em blocos a partir de uma posição
+def ler_blocos_csv(caminho, tamanho_bloco, posicao=0):
+
+    """
+    Lê o CSV por linhas no arquivo binário: a retomada começa direto na posição salva (seek), sem percorrer
+    nem guardar as linhas já processadas, e o cabeçalho é repassado como nomes das colunas.
+    Supõe um registro por linha (sem quebras de linha entre aspas), como no schema da base_limpa.csv.
+    """
+
+    with open(caminho, 'rb') as arquivo:
+        colunas = pd.read_csv(io.BytesIO(arquivo.readline()), nrows=0).columns.tolist()
+        if posicao:
+            arquivo.seek(posicao)
+
+        while True:
+            linhas = list(itertools.islice(arquivo, tamanho_bloco))
+            if not linhas:
+                return
+
+            bloco = pd.read_csv(io.BytesIO(b''.join(linhas)), header=None, names=colunas)
+            if len(bloco):
+                yield bloco, arquivo.tell()
+
+# Pontuar os blocos
+def pontuar_blocos(model, blocos, top_k=0):
+
+    """
+    Gera (bloco pontuado, latência em segundos, posição na entrada) para cada (bloco, posição) de entrada
+    """
+
+    explainer = criar_explicador(model) if top_k > 0 else None
+
+    for bloco, posicao in blocos:
+        inicio = time.perf_counter()
+        pontuacoes = pontuar_bloco(model, bloco, explainer, top_k)
+        yield pd.concat([bloco, pontuacoes], axis=1), time.perf_counter() - inicio, posicao
+
+# Identificar o arquivo de entrada
+def assinatura_entrada(caminho):
+
+    """
+    Tamanho e data de modificação da entrada (sem ler o conteúdo)
+    """
+
+    estado = Path(caminho).stat()
+
+    return {'tamanho': estado.st_size, 'modificado_ns': estado.st_mtime_ns}
+
+# Ler o checkpoint
+def ler_checkpoint(caminho_checkpoint, entrada, tamanho_bloco):
+
+    """
+    Retorna o checkpoint salvo, ou um checkpoint vazio se não existir ou for de outra execução
+    (outro caminho, tamanho de bloco ou conteúdo da entrada)
+    """
+
+    vazio = {
+        'entrada': str(entrada),
+        'assinatura_entrada': assinatura_entrada(entrada),
+        'tamanho_bloco': tamanho_bloco,
+        'blocos_concluidos': 0,
+        'linhas': 0,
+        'posicao_entrada': 0,
+        'bytes_escritos': 0
+    }
+
+    if not caminho_checkpoint.exists():
+        return vazio
+
+    checkpoint = json.loads(caminho_checkpoint.read_text(encoding='utf-8'))
+    if any(checkpoint.get(campo) != vazio[campo] for campo in ('entrada', 'assinatura_entrada', 'tamanho_bloco')):
+        return vazio
+
+    return checkpoint
+
+# Salvar o checkpoint
+def salvar_checkpoint(caminho_checkpoint, checkpoint):
+
+    """
+    Grava o checkpoint de forma atômica (arquivo temporário + rename)
+    """
+
+    temporario = caminho_checkpoint.with_suffix('.tmp')
+    temporario.write_text(json.dumps(checkpoint), encoding='utf-8')
+    os.replace(temporario, caminho_checkpoint)
+
+# Executar o streaming completo
+def pontuar_em_fluxo(model, entrada, saida, tamanho_bloco=100000, top_k=0, reiniciar=False, ao_concluir_bloco=None):
+
+    """
+    Pontua o arquivo de entrada bloco a bloco, gravando incrementalmente no CSV de saída.
+    Retorna o checkpoint final com as estatísticas da execução.
+    """
+
+    saida = Path(saida)
+    if saida.suffix.lower() != '.csv':
+        raise ValueError("A saída do modo streaming deve ser um arquivo .csv")
+
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    caminho_checkpoint = saida.with_name(saida.name + '.checkpoint.json')
+
+    if reiniciar or not saida.exists():
+        caminho_checkpoint.unlink(missing_ok=True)
+
+    checkpoint = ler_checkpoint(caminho_checkpoint, entrada, tamanho_bloco)
+    latencias = []
+
+    # Descarta qualquer escrita parcial posterior ao último bloco concluído
+    modo = 'r+b' if checkpoint['bytes_escritos'] > 0 else 'wb'
+
+    with open(saida, modo) as arquivo:
+        arquivo.truncate(checkpoint['bytes_escritos'])
+        arquivo.seek(checkpoint['bytes_escritos'])
+
+        blocos = ler_blocos(entrada, tamanho_bloco, checkpoint['blocos_concluidos'], checkpoint['posicao_entrada'])
+
+        for bloco, latencia, posicao in pontuar_blocos(model, blocos, top_k):
+            escrever_cabecalho = checkpoint['blocos_concluidos'] == 0
+            arquivo.write(bloco.to_csv(index=False, header=escrever_cabecalho).encode('utf-8'))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+            checkpoint['blocos_concluidos'] += 1
+            checkpoint['linhas'] += len(bloco)
+            checkpoint['posicao_entrada'] = posicao
+            checkpoint['bytes_escritos'] = arquivo.tell()
+            salvar_checkpoint(caminho_checkpoint, checkpoint)
+
+            latencias.append(latencia)
+            if ao_concluir_bloco is not None:
+                ao_concluir_bloco(checkpoint['blocos_concluidos'], len(bloco), latencia)
+
+    checkpoint['latencias_segundos'] = latencias
+
+    return checkpoint
+
+# Função principal
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação em fluxo (memória limitada) do modelo de risco de obesidade")
+    parser.add_argument('entrada', help="Arquivo CSV/Parquet/Arrow no schema da base_limpa.csv")
+    parser.add_argument('saida', help="Arquivo CSV de saída (gravado incrementalmente)")
+    parser.add_argument('--tamanho-bloco', type=int, default=100000, help="Linhas por bloco")
+    parser.add_argument('--top-k', type=int, default=0, help="Quantidade de contribuições SHAP por linha (0 = desligado)")
+    parser.add_argument('--reiniciar', action='store_true', help="Ignora o checkpoint e recomeça do início")
+    args = parser.parse_args(argv)
+
+    model = carregar_modelo()
+    if model is None:
+        raise SystemExit("ERRO: o modelo não foi carregado. Verifique a pasta models/")
+
+    def exibir_bloco(numero, linhas, latencia):
+        print(f"Bloco {numero}: {linhas} linhas em {latencia * 1000:.1f} ms ({linhas / latencia:.0f} linhas/s)")
+
+    inicio = time.perf_counter()
+    checkpoint = pontuar_em_fluxo(
+        model, args.entrada, args.saida, args.tamanho_bloco, args.top_k, args.reiniciar, exibir_bloco
+    )
+    duracao = time.perf_counter() - inicio
+
+    print(f"Blocos concluídos: {checkpoint['blocos_concluidos']} ({checkpoint['linhas']} linhas no total)")
+    print(f"Tempo desta execução: {duracao:.2f} s")
+    print(f"Arquivo salvo em: {args.saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Execução em segundo plano das explicações SHAP do app.
+
+O TreeExplainer sobre as 300 árvores é a parte mais lenta de uma requisição. As explicações são
+enviadas a um pool de threads único por processo (EXPLICACAO_MAX_WORKERS) e a sessão apenas consulta
+a tarefa periodicamente, sem esperar por ela, exibindo a probabilidade imediatamente:
+    - respostas idênticas de sessões simultâneas compartilham a mesma tarefa (chave do cache de resultados);
+    - acima de EXPLICACAO_MAX_PENDENTES tarefas pendentes, novas explicações são recusadas (contrapressão);
+    - a sessão abandona a tarefa após EXPLICACAO_TIMEOUT_S; a tarefa só é cancelada quando a última
+      sessão que aguarda por ela a abandona e ela ainda está na fila.
+"""
+
+# Importar biblioteca completa - padrão
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Importar biblioteca completa - projeto
+from obesidade.config import EXPLICACAO_MAX_PENDENTES, EXPLICACAO_MAX_WORKERS
+
+class Tarefa:
+
+    """
+    Cálculo enviado ao pool, com os instantes de envio, início e fim (tempo de fila e de execução)
+    e o número de sessões que aguardam o resultado
+    """
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.futuro = None
+        self.aguardando = 0
+
+        self.enviada = time.perf_counter()
+        self.iniciada = None
+        self.concluida = None
+
+    def executar(self, funcao, *args):
+        self.iniciada = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            self.concluida = time.perf_counter()
+
+    def pronta(self):
+        return self.futuro.done()
+
+    def resultado(self):
+        return self.futuro.result()
+
+    def ao_concluir(self, funcao):
+
+        """
+        Chama funcao(resultado) na conclusão sem erro (imediatamente, se a tarefa já terminou)
+        """
+
+        def _callback(futuro):
+            if not futuro.cancelled() and futuro.exception() is None:
+                funcao(futuro.result())
+
+        self.futuro.add_done_callback(_callback)
+
+    def tempos_ms(self):
+
+        """
+        Tempo de fila e de execução (ms) de uma tarefa concluída
+        """
+
+        if self.iniciada is None or self.concluida is None:
+            return {}
+
+        return {
+            'fila': (self.iniciada - self.enviada) * 1000,
+            'execucao': (self.concluida - self.iniciada) * 1000
+        }
+
+class GerenciadorTarefas:
+
+    """
+    Pool de threads limitado e compartilhado, com deduplicação por chave e limite de tarefas pendentes
+    """
+
+    def __init__(self, max_workers=EXPLICACAO_MAX_WORKERS, max_pendentes=EXPLICACAO_MAX_PENDENTES):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pendentes = max(1, int(max_pendentes))
+
+        self._pool = None
+        self._pendentes = {}
+        # Reentrante: o cancelamento em abandonar() executa _finalizar() na mesma thread
+        self._lock = threading.RLock()
+
+        self.enviadas = 0
+        self.compartilhadas = 0
+        self.recusadas = 0
+        self.canceladas = 0
+
+    def submeter(self, chave, funcao, *args, ao_concluir=None):
+
+        """
+        Envia funcao(*args) ao pool e retorna a Tarefa (ou a tarefa pendente de mesma chave).
+        ao_concluir(resultado) é chamado na thread do pool quando o cálculo termina sem erro.
+        Quem recebe a tarefa passa a aguardá-la e deve chamar abandonar() se desistir do resultado.
+        Retorna None se o limite de tarefas pendentes foi atingido.
+        """
+
+        with self._lock:
+            tarefa = self._pendentes.get(chave)
+            if tarefa is not None:
+                tarefa.aguardando += 1
+                self.compartilhadas += 1
+                return tarefa
+
+            if len(self._pendentes) >= self.max_pendentes:
+                self.recusadas += 1
+                return None
+
+            tarefa = Tarefa(chave)
+            tarefa.aguardando = 1
+            self._pendentes[chave] = tarefa
+            self.enviadas += 1
+
+            tarefa.futuro = self._executor().submit(tarefa.executar, funcao, *args)
+
+        tarefa.futuro.add_done_callback(lambda futuro: self._finalizar(tarefa, ao_concluir))
+
+        return tarefa
+
+    def abandonar(self, tarefa):
+
+        """
+        Registra que uma sessão desistiu da tarefa. Apenas quando a última sessão desiste, a tarefa é
+        cancelada, e somente se ainda estiver na fila (uma tarefa em execução termina e guarda o resultado).
+        Retorna True se a tarefa foi cancelada.
+        """
+
+        with self._lock:
+            tarefa.aguardando = max(0, tarefa.aguardando - 1)
+            if tarefa.aguardando > 0 or not tarefa.futuro.cancel():
+                return False
+
+            self.canceladas += 1
+            return True
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'pendentes': len(self._pendentes),
+                'enviadas': self.enviadas,
+                'compartilhadas': self.compartilhadas,
+                'recusadas': self.recusadas,
+                'canceladas': self.canceladas,
+                'max_workers': self.max_workers,
+                'max_pendentes': self.max_pendentes
+            }
+
+    def encerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _finalizar(self, tarefa, ao_concluir):
+        with self._lock:
+            if self._pendentes.get(tarefa.chave) is tarefa:
+                del self._pendentes[tarefa.chave]
+
+        if ao_concluir is not None and not tarefa.futuro.cancelled() and tarefa.futuro.exception() is None:
+            ao_concluir(tarefa.futuro.result())
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='explicacao')
+        return self._pool
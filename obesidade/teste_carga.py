@@ -0,0 +1,498 @@
+"""
+Teste de carga do app Streamlit com sessões simultâneas.
+
+Cada sessão virtual executa o app.py real sem navegador (streamlit.testing.AppTest) em uma thread
+própria do processo, compartilhando os recursos de @st.cache_resource como as sessões de um servidor.
+A sessão preenche o formulário de get_user_input_features() com linhas sorteadas da base limpa,
+clica em "Realizar Predição" e repete até o fim do estágio. Os estágios aumentam o número de sessões
+simultâneas (--sessoes 1 2 4 8) e registram, por estágio:
+    - vazão (predições/s), percentis de latência da predição e tempo de abertura da página;
+    - erros (exceções, mensagens de erro técnico, tempo limite e resultado ausente);
+    - memória residente (RSS) do processo: início, pico, fim e custo aproximado por sessão;
+    - figuras do matplotlib ainda abertas (vazamento de gráficos);
+    - taxa de acerto do cache de resultados do processo.
+Como as linhas sorteadas se repetem, o cache de resultados responderia à maior parte das predições após
+o início. Por padrão ele fica desligado durante os estágios (--cache desligado), e cada predição passa
+pelo modelo, pelo SHAP e pela renderização; --cache limpo o esvazia no início de cada estágio e
+--cache mantido o preserva entre os estágios.
+A rampa é interrompida no primeiro estágio que exceder o limite de latência p95 ou de taxa de erros.
+O relatório é salvo em JSON (reports/teste_carga/). A auditoria das predições do teste é gravada em um
+banco próprio, ao lado do relatório.
+
+Uso:
+    python -m obesidade.teste_carga --sessoes 1 2 4 8 --duracao 20
+    python -m obesidade.teste_carga --sessoes 4 --duracao 60 --pausa-ms 500 --slo-p95-ms 2000
+    python -m obesidade.teste_carga --sessoes 1 2 4 --cache mantido
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import contextlib
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import PROJ_ROOT, REPORTS_DIR
+from obesidade.plots import rss_atual_mb
+
+TESTE_CARGA_DIR = REPORTS_DIR / 'teste_carga'
+
+# Respostas binárias dos botões de opção
+SIM_NAO = {1: 'Sim', 0: 'Não'}
+FREQUENCIA = {'no': 'Não', 'Sometimes': 'Às vezes', 'Frequently': 'Frequentemente', 'Always': 'Sempre'}
+
+# Campos do formulário: (tipo do widget, rótulo, coluna da base, conversão do valor da base para a opção).
+# Espelham get_user_input_features() do app.py; validar_formulario() interrompe o teste se divergirem.
+FORMULARIO = [
+    ('number_input', 'Idade', 'idade', lambda valor: int(min(max(valor, 10), 100))),
+    ('number_input', 'Altura (m)', 'altura', lambda valor: round(float(min(max(valor, 1.0), 2.5)), 2)),
+    ('number_input', 'Peso (kg)', 'peso', lambda valor: round(float(min(max(valor, 30.0), 200.0)), 1)),
+    ('selectbox', 'Gênero', 'genero', {1: 'Feminino', 0: 'Masculino'}),
+    ('radio', 'Possui histórico familiar de sobrepeso?', 'b_historico_familiar', SIM_NAO),
+    ('radio', 'Você fuma?', 'b_fuma', SIM_NAO),
+    ('radio', 'Consome alimentos calóricos frequentemente?', 'b_come_alimentos_caloricos', SIM_NAO),
+    ('radio', 'Costuma monitorar as calorias ingeridas?', 'b_monitora_calorias', SIM_NAO),
+    ('selectbox', 'Quantas refeições principais faz por dia?', 'qtd_refeicao', {
+        'Uma_refeicao_principal_por_dia': '1',
+        'Duas_refeicoes_principais_por_dia': '2',
+        'Tres_refeicoes_principais_por_dia': '3',
+        'Quatro_ou_mais_refeicoes_principais_por_dia': '4+'
+    }),
+    ('selectbox', 'Frequência de consumo de vegetais?', 'qtd_vegetais', {'Raramente': 'Raramente', 'As_vezes': 'Às vezes', 'Sempre': 'Sempre'}),
+    ('selectbox', 'Consumo diário de água?', 'qtd_agua', {'Baixo_consumo': '< 1 Litro', 'Consumo_adequado': '1-2 Litros', 'Alto_consumo': '> 2 Litros'}),
+    ('selectbox', 'Costuma comer entre as refeições?', 'freq_come_fora_refeicao', FREQUENCIA),
+    ('selectbox', 'Consome bebidas alcoólicas?', 'freq_alcool', FREQUENCIA),
+    ('selectbox', 'Frequência de atividade física?', 'qtd_atv_fisicas', {
+        'Sedentario': 'Sedentário', 'Baixa_frequencia': 'Baixa', 'Moderada_frequencia': 'Moderada', 'Alta_frequencia': 'Alta'
+    }),
+    ('selectbox', 'Tempo diário em dispositivos eletrônicos?', 'qtd_tmp_na_internet', {
+        'Uso_baixo': 'Baixo (0-2h)', 'Uso_moderado': 'Moderado (3-5h)', 'Uso_intenso': 'Intenso (>5h)'
+    }),
+    ('selectbox', 'Meio de transporte principal?', 'meio_de_transporte', {
+        'Public_Transportation': 'Transporte Público', 'Walking': 'Caminhada', 'Automobile': 'Carro', 'Bike': 'Bicicleta', 'Motorbike': 'Moto'
+    })
+]
+
+# Mensagens do app que indicam falha (o alerta de alto risco também usa st.error)
+MENSAGENS_ERRO = ('Ocorreu um erro técnico', 'O modelo de Inteligência Artificial não foi carregado')
+
+# Avisos de explicação não mais aguardada (tempo limite) ou recusada (pool cheio): degradação, não erro.
+# Sem navegador, a consulta periódica (run_every) não roda, e apenas a recusa aparece no teste.
+AVISOS_EXPLICACAO = ('⏱️', '⏳')
+
+# Contar as figuras abertas do matplotlib
+def figuras_abertas():
+    if 'matplotlib.pyplot' not in sys.modules:
+        return 0
+
+    return len(sys.modules['matplotlib.pyplot'].get_fignums())
+
+# Sortear as linhas usadas no formulário
+def sortear_linhas(linhas=500, semente=42):
+
+    """
+    Sorteia linhas da base limpa (com reposição, se a base for menor) nas colunas do formulário
+    """
+
+    from obesidade.dataset import carregar_base
+
+    colunas = [coluna for _, _, coluna, _ in FORMULARIO]
+    base = carregar_base(colunas=colunas)
+
+    return base.sample(n=linhas, replace=linhas > len(base), random_state=semente).to_dict('records')
+
+# Localizar um widget do formulário
+def localizar_widget(at, tipo, rotulo):
+
+    """
+    Retorna o widget do tipo e rótulo informados, ou None se a página não o exibir
+    """
+
+    return next((widget for widget in getattr(at, tipo) if widget.label == rotulo), None)
+
+# Validar o formulário do teste contra a página
+def validar_formulario(at):
+
+    """
+    Confere se cada campo de FORMULARIO existe na página aberta, com todas as opções usadas no teste.
+    Retorna a lista de divergências (vazia se o formulário do app não mudou).
+    """
+
+    divergencias = []
+    for tipo, rotulo, _, conversao in FORMULARIO:
+        widget = localizar_widget(at, tipo, rotulo)
+        if widget is None:
+            divergencias.append(f"{tipo} '{rotulo}' não encontrado na página")
+        elif not callable(conversao):
+            ausentes = sorted(set(conversao.values()) - set(widget.options))
+            if ausentes:
+                divergencias.append(f"{tipo} '{rotulo}' sem as opções: {', '.join(ausentes)}")
+
+    return divergencias
+
+# Preencher o formulário de uma sessão
+def preencher_formulario(at, linha):
+
+    """
+    Converte a linha da base nas opções dos widgets e atribui os valores (sem executar o app)
+    """
+
+    for tipo, rotulo, coluna, conversao in FORMULARIO:
+        valor = linha[coluna]
+        valor = valor.item() if hasattr(valor, 'item') else valor
+        opcao = conversao(valor) if callable(conversao) else conversao[valor]
+
+        widget = localizar_widget(at, tipo, rotulo)
+        if widget is None:
+            raise LookupError(f"{tipo} '{rotulo}' não encontrado na página (FORMULARIO diverge do app.py)")
+        widget.set_value(opcao)
+
+# Verificar o resultado de uma predição
+def verificar_resultado(at):
+
+    """
+    Retorna a descrição do erro da execução, ou None se a página exibiu a probabilidade sem falhas
+    """
+
+    if len(at.exception):
+        return f"exceção: {at.exception[0].message}"
+
+    for erro in at.error:
+        if str(erro.value).lstrip('⚠️ *').startswith(MENSAGENS_ERRO):
+            return f"erro: {erro.value}"
+
+    if not any(metrica.label == 'Probabilidade de Risco' for metrica in at.metric):
+        return "probabilidade ausente"
+
+    return None
+
+# Permitir execuções simultâneas do AppTest
+@contextlib.contextmanager
+def sessoes_simultaneas():
+
+    """
+    O AppTest foi feito para uma sessão por vez: cada execução substitui e depois restaura estados globais
+    do Streamlit, o que quebra as sessões que estiverem executando ao mesmo tempo. Durante o teste:
+        - o modo de teste (global.appTest) fica ligado, em vez de ligado e desligado a cada execução;
+        - o Runtime simulado da última execução permanece ativo (a restauração para None é ignorada),
+          compartilhado pelas sessões como o Runtime de um servidor;
+        - o app.py é compilado uma única vez, como no servidor (o AppTest recompila o script a cada
+          execução, e a compilação simultânea em threads falha no Python 3.11).
+    """
+
+    from unittest.mock import patch
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import patch_config_options
+
+    class _MetaRuntimePersistente(type(Runtime)):
+        def __setattr__(cls, nome, valor):
+            if nome == '_instance':
+                if valor is not None:
+                    Runtime._instance = valor
+                return
+            super().__setattr__(nome, valor)
+
+    class _RuntimePersistente(Runtime, metaclass=_MetaRuntimePersistente):
+        pass
+
+    with patch_config_options({'global.appTest': True}), \
+            patch('streamlit.testing.v1.app_test.Runtime', _RuntimePersistente), \
+            patch('streamlit.testing.v1.local_script_runner.ScriptCache', return_value=ScriptCache()):
+        yield
+
+class SessaoVirtual:
+
+    """
+    Uma sessão do app (AppTest) que repete predições com linhas sorteadas até o fim do estágio
+    """
+
+    def __init__(self, indice, app, linhas, timeout=120, pausa_ms=0.0, semente=42):
+        self.indice = indice
+        self.app = str(app)
+        self.linhas = linhas
+        self.timeout = timeout
+        self.pausa = pausa_ms / 1000
+        self.rng = np.random.default_rng(semente + indice)
+
+        self.at = None
+        self.abertura_ms = None
+        self.latencias_ms = []
+        self.erros = []
+        self.avisos = 0
+
+    def abrir(self):
+
+        """
+        Primeira execução da página (formulário, sem predição)
+        """
+
+        from streamlit.testing.v1 import AppTest
+
+        self.at = None
+        inicio = time.perf_counter()
+        try:
+            self.at = AppTest.from_file(self.app, default_timeout=self.timeout).run()
+            self.abertura_ms = (time.perf_counter() - inicio) * 1000
+        except Exception as erro:
+            self.erros.append(f"abertura: {erro!r}")
+
+    def executar(self, fim):
+        if self.at is None:
+            return
+
+        while time.perf_counter() < fim:
+            linha = self.linhas[self.rng.integers(len(self.linhas))]
+
+            inicio = time.perf_counter()
+            reabrir = False
+            try:
+                preencher_formulario(self.at, linha)
+                self.at.button[0].click().run()
+                erro = verificar_resultado(self.at)
+            except Exception as excecao:
+                erro = f"{type(excecao).__name__}: {excecao}"
+                reabrir = True
+            self.latencias_ms.append((time.perf_counter() - inicio) * 1000)
+
+            if erro is not None:
+                self.erros.append(erro)
+            elif any(str(aviso.value).startswith(AVISOS_EXPLICACAO) for aviso in self.at.warning):
+                self.avisos += 1
+
+            # Após uma falha da execução, a sessão é reaberta (como um usuário recarregando a página)
+            if reabrir:
+                self.abrir()
+                if self.at is None:
+                    break
+
+            if self.pausa:
+                time.sleep(self.pausa)
+
+# Preparar o cache de resultados para um estágio
+@contextlib.contextmanager
+def cache_do_estagio(modo='desligado'):
+
+    """
+    Desliga ('desligado', nenhum item é guardado), esvazia ('limpo') ou preserva ('mantido') o cache de
+    resultados do processo durante o estágio. Retorna um dicionário preenchido, na saída, com os acertos
+    e as falhas do estágio.
+    """
+
+    from obesidade.cache import obter_cache
+
+    cache = obter_cache()
+    max_itens = cache.max_itens
+    if modo in ('desligado', 'limpo'):
+        cache.limpar()
+    if modo == 'desligado':
+        cache.max_itens = 0
+
+    antes = cache.estatisticas()
+    uso = {}
+    try:
+        yield uso
+    finally:
+        cache.max_itens = max_itens
+        depois = cache.estatisticas()
+        acertos = depois['acertos'] - antes['acertos']
+        consultas = acertos + depois['falhas'] - antes['falhas']
+        uso.update({'cache': modo, 'cache_acertos': acertos, 'cache_taxa_acerto': acertos / consultas if consultas else 0.0})
+
+# Executar um estágio da rampa
+def executar_estagio(sessoes, app, linhas, duracao=20.0, timeout=120, pausa_ms=0.0, semente=42, intervalo_memoria=0.1,
+                     modo_cache='desligado'):
+
+    """
+    Abre as sessões simultaneamente, mede o RSS com todas abertas e então executa predições
+    por `duracao` segundos, com o cache de resultados no modo informado. Retorna as métricas do estágio.
+    """
+
+    virtuais = [SessaoVirtual(i, app, linhas, timeout, pausa_ms, semente) for i in range(sessoes)]
+
+    # Amostragem do pico de memória durante o estágio
+    rss_inicio = rss_atual_mb()
+    pico = [rss_inicio]
+    parar = threading.Event()
+
+    def amostrar():
+        while not parar.wait(intervalo_memoria):
+            pico[0] = max(pico[0], rss_atual_mb())
+
+    amostrador = threading.Thread(target=amostrar, name='teste-carga-memoria', daemon=True)
+    amostrador.start()
+
+    # 1. Abertura simultânea das páginas
+    threads = [threading.Thread(target=virtual.abrir, name=f'sessao-{virtual.indice}') for virtual in virtuais]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rss_sessoes = rss_atual_mb()
+
+    # 2. Predições até o fim do estágio
+    with cache_do_estagio(modo_cache) as uso_cache:
+        inicio = time.perf_counter()
+        fim = inicio + duracao
+        threads = [threading.Thread(target=virtual.executar, args=(fim,), name=f'sessao-{virtual.indice}') for virtual in virtuais]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        tempo_total = time.perf_counter() - inicio
+
+    parar.set()
+    amostrador.join()
+
+    latencias = np.array([latencia for virtual in virtuais for latencia in virtual.latencias_ms])
+    aberturas = np.array([virtual.abertura_ms for virtual in virtuais if virtual.abertura_ms is not None])
+    erros = [erro for virtual in virtuais for erro in virtual.erros]
+    requisicoes = len(latencias)
+
+    metricas = {
+        'sessoes': sessoes,
+        'requisicoes': requisicoes,
+        'erros': len(erros),
+        'taxa_erro': len(erros) / max(requisicoes, 1),
+        'explicacoes_degradadas': sum(virtual.avisos for virtual in virtuais),
+        'duracao_s': tempo_total,
+        'vazao_rps': requisicoes / tempo_total if tempo_total > 0 else 0.0,
+        'abertura_p50_ms': float(np.percentile(aberturas, 50)) if aberturas.size else None,
+        **uso_cache
+    }
+    for percentil in (50, 90, 95, 99):
+        metricas[f'p{percentil}_ms'] = float(np.percentile(latencias, percentil)) if latencias.size else None
+    metricas['max_ms'] = float(latencias.max()) if latencias.size else None
+
+    rss_fim = rss_atual_mb()
+    metricas.update({
+        'rss_inicio_mb': rss_inicio,
+        'rss_pico_mb': max(pico[0], rss_fim),
+        'rss_fim_mb': rss_fim,
+        'rss_por_sessao_mb': (rss_sessoes - rss_inicio) / sessoes,
+        'figuras_matplotlib': figuras_abertas(),
+        'exemplos_erro': sorted(set(erros))[:5]
+    })
+
+    return metricas
+
+# Executar a rampa de sessões
+def executar_rampa(niveis, app, linhas, duracao=20.0, timeout=120, pausa_ms=0.0, semente=42, slo_p95_ms=3000.0,
+                   max_taxa_erro=0.01, modo_cache='desligado'):
+
+    """
+    Executa os estágios em ordem crescente de sessões; interrompe após o primeiro estágio acima do limite
+    de latência p95 ou da taxa de erros. Retorna (estágios, maior nível dentro dos limites).
+    """
+
+    estagios = []
+    capacidade = None
+
+    for sessoes in sorted(set(niveis)):
+        print(f"Estágio: {sessoes} sessão(ões) por {duracao:.0f} s...")
+        metricas = executar_estagio(sessoes, app, linhas, duracao, timeout, pausa_ms, semente, modo_cache=modo_cache)
+
+        metricas['dentro_limite'] = (
+            metricas['p95_ms'] is not None and metricas['p95_ms'] <= slo_p95_ms and metricas['taxa_erro'] <= max_taxa_erro
+        )
+        estagios.append(metricas)
+
+        print(f"  {metricas['requisicoes']} predições | {metricas['vazao_rps']:.2f}/s | "
+              f"p95 {metricas['p95_ms'] or 0:.0f} ms | erros {metricas['taxa_erro']:.1%} | cache {metricas['cache_taxa_acerto']:.0%} | "
+              f"RSS {metricas['rss_fim_mb']:.0f} MB")
+
+        if not metricas['dentro_limite']:
+            break
+        capacidade = sessoes
+
+    return estagios, capacidade
+
+# Função principal
+def main(argv=None):
+    from streamlit import logger
+
+    from obesidade.auditoria import obter_auditoria
+    from obesidade.benchmark import coletar_metadados
+
+    parser = argparse.ArgumentParser(description="Teste de carga do app Streamlit com sessões simultâneas")
+    parser.add_argument('--sessoes', type=int, nargs='+', default=[1, 2, 4, 8], help="Sessões simultâneas de cada estágio")
+    parser.add_argument('--duracao', type=float, default=20.0, help="Duração de cada estágio (s)")
+    parser.add_argument('--pausa-ms', type=float, default=0.0, help="Pausa entre predições da mesma sessão (ms)")
+    parser.add_argument('--linhas', type=int, default=500, help="Linhas sorteadas da base limpa para o formulário")
+    parser.add_argument('--semente', type=int, default=42, help="Semente do sorteio das linhas")
+    parser.add_argument('--slo-p95-ms', type=float, default=3000.0, help="Latência p95 máxima de um estágio (ms)")
+    parser.add_argument('--max-taxa-erro', type=float, default=0.01, help="Taxa de erros máxima de um estágio")
+    parser.add_argument('--cache', choices=['desligado', 'limpo', 'mantido'], default='desligado',
+                        help="Cache de resultados durante cada estágio (padrão: desligado, toda predição aciona o modelo)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Tempo limite de uma execução do app (s)")
+    parser.add_argument('--app', default=str(PROJ_ROOT / 'app.py'), help="Script do app")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON do relatório (padrão: reports/teste_carga/<data>.json)")
+    args = parser.parse_args(argv)
+
+    # Avisos de contexto das threads de sessão (esperados sem servidor)
+    logger.set_log_level('error')
+
+    saida = Path(args.saida) if args.saida else TESTE_CARGA_DIR / f"teste_carga_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+
+    # Auditoria das predições do teste em um banco próprio (não mistura com as predições reais)
+    obter_auditoria(saida.with_suffix('.auditoria.sqlite3'))
+
+    linhas = sortear_linhas(args.linhas, args.semente)
+
+    with sessoes_simultaneas():
+
+        # Inicialização do processo (aquecimento, caches) antes dos estágios
+        inicio = time.perf_counter()
+        rss_antes = rss_atual_mb()
+        aquecimento = SessaoVirtual(-1, args.app, linhas, args.timeout)
+        aquecimento.abrir()
+        if aquecimento.at is None:
+            raise SystemExit(f"ERRO: o app não abriu: {aquecimento.erros}")
+        divergencias = validar_formulario(aquecimento.at)
+        if divergencias:
+            raise SystemExit(
+                "ERRO: o formulário do teste (FORMULARIO) diverge do app.py:\n  - " + "\n  - ".join(divergencias)
+            )
+        preencher_formulario(aquecimento.at, linhas[0])
+        aquecimento.at.button[0].click().run()
+        inicializacao_s = time.perf_counter() - inicio
+        print(f"Inicialização: {inicializacao_s:.1f} s (RSS {rss_antes:.0f} -> {rss_atual_mb():.0f} MB)")
+
+        estagios, capacidade = executar_rampa(
+            args.sessoes, args.app, linhas, args.duracao, args.timeout, args.pausa_ms, args.semente,
+            args.slo_p95_ms, args.max_taxa_erro, args.cache
+        )
+
+    relatorio = {
+        'metadados': coletar_metadados(),
+        'parametros': vars(args),
+        'inicializacao_s': inicializacao_s,
+        'capacidade_sessoes': capacidade,
+        'estagios': estagios
+    }
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    colunas = [
+        'sessoes', 'requisicoes', 'vazao_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'taxa_erro', 'cache_taxa_acerto', 'rss_pico_mb',
+        'rss_por_sessao_mb'
+    ]
+    print()
+    print(pd.DataFrame(estagios)[colunas].to_string(index=False, float_format=lambda valor: f"{valor:.2f}"))
+    if capacidade is None:
+        print(f"\nNenhum estágio dentro dos limites (p95 <= {args.slo_p95_ms:.0f} ms, erros <= {args.max_taxa_erro:.1%})")
+    else:
+        print(f"\nMaior nível dentro dos limites: {capacidade} sessão(ões) simultânea(s)")
+    print(f"Relatório salvo em: {saida}")
+
+if __name__ == "__main__":
+    main()
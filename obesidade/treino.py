@@ -0,0 +1,231 @@
+"""
+Pipeline de treino por linha de comando (substitui o treino do notebook tech_challenge_codigo.ipynb).
+
+Etapas (com tempo de parede registrado em reports/treino/):
+    1. leitura da base limpa colunar (obesidade.dataset), regenerada apenas quando o Obesity.csv muda;
+    2. divisão treino/teste estratificada (70/30, mesma semente do notebook);
+    3. validação cruzada e busca de hiperparâmetros com folds e candidatos em paralelo entre os núcleos,
+       reaproveitando o ajuste do pré-processamento e a saída do SMOTE em cache (joblib.Memory);
+    4. ajuste final, avaliação no teste e exportação do ImbPipeline (preprocess + smote + clf) no mesmo
+       formato consumido por load_model().
+
+Uso:
+    python -m obesidade.treino
+    python -m obesidade.treino --grade '{"clf__max_depth": [null, 10], "clf__min_samples_leaf": [1, 2]}' --folds 5
+    python -m obesidade.treino --exportar
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import json
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import joblib
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.config import INTERIM_DATA_DIR, MODEL_PATH, RAW_DATA_DIR, REPORTS_DIR
+from obesidade.dataset import carregar_base
+from obesidade.instrumentacao import etapa, iniciar_rastreamento
+
+SEED = 1561651  # semente de aleatoriedade para reprodutibilidade (a mesma do notebook)
+
+CACHE_TREINO_DIR = INTERIM_DATA_DIR / 'cache_treino'
+TREINO_DIR = REPORTS_DIR / 'treino'
+
+# Colunas por tipo (mesmas listas do notebook)
+COLUNAS_NUMERICAS = ['idade', 'imc']
+COLUNAS_BINARIAS = ['genero', 'b_fuma', 'b_come_alimentos_caloricos', 'b_monitora_calorias', 'b_historico_familiar']
+COLUNAS_CATEGORICAS = [
+    'qtd_refeicao', 'qtd_vegetais', 'qtd_agua', 'qtd_atv_fisicas',
+    'qtd_tmp_na_internet', 'freq_come_fora_refeicao', 'freq_alcool', 'meio_de_transporte'
+]
+
+# Configuração do notebook é sempre um dos candidatos
+GRADE_PADRAO = {
+    'clf__n_estimators': [300],
+    'clf__max_depth': [None, 10, 20],
+    'clf__min_samples_leaf': [1, 2]
+}
+
+METRICAS = {
+    'acuracia': 'accuracy',
+    'precisao': 'precision',
+    'recall': 'recall',
+    'f1': 'f1',
+    'auc_roc': 'roc_auc'
+}
+
+# Montar o Pipeline
+def criar_pipeline(memoria=None, n_jobs=-1):
+
+    """
+    ImbPipeline do notebook: ColumnTransformer (MinMax + passthrough + OneHot) -> SMOTE -> Random Forest.
+    Com memoria, o ajuste do pré-processamento e a saída do SMOTE são reaproveitados entre execuções.
+    """
+
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline as ImbPipeline
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+    preprocessador = ColumnTransformer(transformers=[
+        ('num', Pipeline(steps=[('scaler', MinMaxScaler())]), COLUNAS_NUMERICAS),
+        ('bin', 'passthrough', COLUNAS_BINARIAS),
+        ('cat', Pipeline(steps=[('onehot', OneHotEncoder(handle_unknown='ignore'))]), COLUNAS_CATEGORICAS)
+    ])
+
+    return ImbPipeline(steps=[
+        ('preprocess', preprocessador),
+        ('smote', SMOTE(random_state=SEED)),
+        ('clf', RandomForestClassifier(n_estimators=300, random_state=SEED, class_weight='balanced', n_jobs=n_jobs))
+    ], memory=memoria)
+
+# Preparar a base de modelagem
+def preparar_base(caminho_bruto):
+
+    """
+    Lê a base limpa tipada (regenerada pelo hash do arquivo bruto) e separa X e y
+    """
+
+    base_limpa = carregar_base(caminho_bruto)
+    base_modelo = base_limpa.drop(['peso', 'altura', 'nivel_de_obesidade'], axis=1)
+
+    return base_modelo.drop('risco_obesidade', axis=1), base_modelo['risco_obesidade']
+
+# Avaliar no conjunto de teste
+def avaliar(modelo, X_teste, y_teste):
+
+    """
+    Acurácia, precisão, recall, F1 e AUC-ROC no teste (mesmas métricas do notebook)
+    """
+
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    y_pred = modelo.predict(X_teste)
+    y_proba = modelo.predict_proba(X_teste)[:, 1]
+
+    return {
+        'acuracia': accuracy_score(y_teste, y_pred),
+        'precisao': precision_score(y_teste, y_pred),
+        'recall': recall_score(y_teste, y_pred),
+        'f1': f1_score(y_teste, y_pred),
+        'auc_roc': roc_auc_score(y_teste, y_proba)
+    }
+
+# Treinar o modelo
+def treinar(caminho_bruto=RAW_DATA_DIR / 'Obesity.csv', grade=None, folds=5, metrica='f1', n_jobs=-1, cache=CACHE_TREINO_DIR):
+
+    """
+    Executa o pipeline completo e retorna (modelo final, relatório com métricas e tempos por etapa)
+    """
+
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+
+    memoria = joblib.Memory(location=str(cache) if cache else None, verbose=0)
+    rastreamento = iniciar_rastreamento(tipo='treino')
+
+    try:
+        # 1. Dados
+        with etapa('carregar_base'):
+            X, y = preparar_base(caminho_bruto)
+
+        with etapa('divisao_treino_teste'):
+            X_treino, X_teste, y_treino, y_teste = train_test_split(X, y, test_size=0.3, stratify=y, random_state=SEED)
+
+        # 2. Validação cruzada + busca (folds e candidatos em paralelo; a floresta de cada ajuste usa 1 núcleo)
+        with etapa('validacao_cruzada_busca'):
+            busca = GridSearchCV(
+                criar_pipeline(memoria, n_jobs=1),
+                param_grid=grade or GRADE_PADRAO,
+                scoring=METRICAS,
+                refit=False,
+                cv=StratifiedKFold(n_splits=folds, shuffle=True, random_state=SEED),
+                n_jobs=n_jobs
+            )
+            busca.fit(X_treino, y_treino)
+
+        resultados_cv = pd.DataFrame(busca.cv_results_)
+        melhor = resultados_cv.loc[resultados_cv[f'rank_test_{metrica}'].idxmin()]
+        melhores_parametros = melhor['params']
+
+        # 3. Ajuste final com todos os núcleos (mesmo formato do artefato do notebook)
+        with etapa('ajuste_final'):
+            modelo = criar_pipeline(memoria, n_jobs=-1).set_params(**melhores_parametros)
+            modelo.fit(X_treino, y_treino)
+            modelo.set_params(memory=None)
+
+        with etapa('avaliacao_teste'):
+            metricas_teste = avaliar(modelo, X_teste, y_teste)
+    finally:
+        iniciar_rastreamento(ativo=False)
+
+    colunas_cv = ['params'] + [f'mean_test_{nome}' for nome in METRICAS] + ['mean_fit_time']
+    relatorio = {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'linhas': {'treino': len(X_treino), 'teste': len(X_teste)},
+        'folds': folds,
+        'metrica_selecao': metrica,
+        'melhores_parametros': melhores_parametros,
+        'metricas_teste': metricas_teste,
+        'validacao_cruzada': resultados_cv[colunas_cv].to_dict(orient='records'),
+        'tempos_s': {nome: duracao / 1000 for nome, duracao in rastreamento.etapas}
+    }
+
+    return modelo, relatorio
+
+# Função principal
+def main(argv=None):
+    from obesidade.artefatos import hash_arquivo
+
+    parser = argparse.ArgumentParser(description="Treina o modelo de risco de obesidade a partir do Obesity.csv")
+    parser.add_argument('--entrada', default=str(RAW_DATA_DIR / 'Obesity.csv'), help="Base bruta (Obesity.csv)")
+    parser.add_argument('--grade', default=None, help="Grade de hiperparâmetros em JSON (padrão: GRADE_PADRAO)")
+    parser.add_argument('--folds', type=int, default=5, help="Folds da validação cruzada")
+    parser.add_argument('--metrica', default='f1', choices=list(METRICAS), help="Métrica de seleção do melhor candidato")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Processos da validação cruzada (-1 = todos os núcleos)")
+    parser.add_argument('--sem-cache', action='store_true', help="Não reaproveita o pré-processamento e o SMOTE em cache")
+    parser.add_argument('--exportar', action='store_true', help="Salva o modelo em models/ (substitui o artefato atual)")
+    parser.add_argument('--saida', default=str(MODEL_PATH), help="Caminho do .joblib exportado")
+    args = parser.parse_args(argv)
+
+    modelo, relatorio = treinar(
+        args.entrada,
+        json.loads(args.grade) if args.grade else None,
+        args.folds,
+        args.metrica,
+        args.n_jobs,
+        None if args.sem_cache else CACHE_TREINO_DIR
+    )
+
+    print(f"Melhores parâmetros ({args.metrica}): {relatorio['melhores_parametros']}")
+    print("\nMétricas no teste:")
+    for nome, valor in relatorio['metricas_teste'].items():
+        print(f"  {nome}: {valor:.3f}")
+
+    print("\nTempo por etapa (s):")
+    for nome, duracao in relatorio['tempos_s'].items():
+        print(f"  {nome}: {duracao:.2f}")
+
+    # Exportação (mesmo formato do joblib.dump do notebook)
+    if args.exportar:
+        saida = Path(args.saida)
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(modelo, saida)
+        relatorio['modelo_sha256'] = hash_arquivo(saida)
+        print(f"\nModelo salvo com sucesso em: {saida}")
+        print(f"SHA-256: {relatorio['modelo_sha256']} (atualize MODEL_SHA256 em obesidade/config.py ao publicar)")
+    else:
+        print("\nO modelo não foi salvo (use --exportar)")
+
+    TREINO_DIR.mkdir(parents=True, exist_ok=True)
+    caminho_relatorio = TREINO_DIR / f"treino_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    caminho_relatorio.write_text(json.dumps(relatorio, indent=2, default=str), encoding='utf-8')
+    print(f"Relatório salvo em: {caminho_relatorio}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Índice de vizinhos mais próximos para buscar casos históricos semelhantes ao paciente.
+
+Os casos rotulados (schema da base_limpa.csv) são transformados pelo 'preprocess' do modelo e indexados
+em KDTrees (sklearn.neighbors), uma por segmento. Novas linhas rotuladas entram como um novo segmento,
+sem reconstruir os existentes; segmentos vizinhos de tamanho parecido são fundidos (método logarítmico),
+de modo que o índice mantém O(log n) segmentos e a consulta combina o top-k de cada um.
+
+O índice é construído uma vez por artefato e persistido na versão do cache do modelo:
+    models/cache/<sha256>/vizinhos/
+        - manifesto.json        : hash do modelo, segmentos e próximo identificador
+        - segmento_<id>.joblib  : KDTree e casos (colunas de exibição) do segmento
+
+Uso:
+    python -m obesidade.vizinhos
+    python -m obesidade.vizinhos --adicionar novos_casos.csv
+"""
+
+# Importar biblioteca completa - padrão
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Importar biblioteca completa - terceiro
+import numpy as np
+import pandas as pd
+
+# Importar biblioteca completa - projeto
+from obesidade.features import preparar_entrada
+
+# Colunas dos casos exibidas junto aos vizinhos
+COLUNAS_CASO = ['idade', 'genero', 'altura', 'peso', 'imc', 'nivel_de_obesidade', 'risco_obesidade']
+
+# Níveis de obesidade em Português (exibição dos casos)
+ROTULOS_NIVEL = {
+    'Insufficient_Weight': 'Abaixo do peso',
+    'Normal_Weight': 'Peso normal',
+    'Overweight_Level_I': 'Sobrepeso I',
+    'Overweight_Level_II': 'Sobrepeso II',
+    'Obesity_Type_I': 'Obesidade I',
+    'Obesity_Type_II': 'Obesidade II',
+    'Obesity_Type_III': 'Obesidade III'
+}
+
+TAMANHO_FOLHA = 40
+
+# Transformar casos para o espaço do modelo
+def transformar(model, df):
+
+    """
+    Aplica o 'preprocess' do Pipeline (mesmo espaço de features da Random Forest)
+    """
+
+    return np.asarray(model.named_steps['preprocess'].transform(preparar_entrada(df)), dtype=np.float64)
+
+class Segmento:
+
+    """
+    KDTree imutável de um conjunto de casos, com as colunas de exibição na mesma ordem
+    """
+
+    def __init__(self, identificador, arvore, casos):
+        self.identificador = identificador
+        self.arvore = arvore
+        self.casos = casos.reset_index(drop=True)
+
+        # Colunas como vetores NumPy (a consulta copia poucas linhas sem o custo de indexação do pandas)
+        self.colunas = {coluna: self.casos[coluna].to_numpy() for coluna in self.casos.columns}
+
+    @property
+    def linhas(self):
+        return len(self.casos)
+
+    @classmethod
+    def construir(cls, identificador, X, casos):
+        from sklearn.neighbors import KDTree
+
+        return cls(identificador, KDTree(X, leaf_size=TAMANHO_FOLHA), casos)
+
+    @property
+    def dados(self):
+        return np.asarray(self.arvore.data)
+
+    @property
+    def nome_arquivo(self):
+        return f'segmento_{self.identificador:06d}.joblib'
+
+class IndiceVizinhos:
+
+    """
+    Conjunto de segmentos consultados em conjunto (top-k global a partir do top-k de cada segmento)
+    """
+
+    def __init__(self, segmentos=None, modelo_sha256=None, proximo_id=0):
+        self.segmentos = list(segmentos or [])
+        self.modelo_sha256 = modelo_sha256
+        self.proximo_id = proximo_id
+
+        # Assinatura do manifesto gravado ou lido (detecta casos adicionados por outro processo)
+        self.assinatura = None
+
+    @property
+    def linhas(self):
+        return sum(segmento.linhas for segmento in self.segmentos)
+
+    # Adicionar casos rotulados
+    def adicionar(self, model, df):
+
+        """
+        Indexa novas linhas rotuladas em um segmento próprio e funde os segmentos finais enquanto
+        o penúltimo não for maior que o dobro do último. Os casos precisam do rótulo e das colunas de exibição.
+        """
+
+        ausentes = [coluna for coluna in COLUNAS_CASO if coluna not in df.columns]
+        if ausentes:
+            raise ValueError(f"Colunas ausentes nos casos: {', '.join(ausentes)}")
+
+        casos = df[COLUNAS_CASO]
+        self.segmentos.append(Segmento.construir(self.proximo_id, transformar(model, df), casos))
+        self.proximo_id += 1
+
+        while len(self.segmentos) > 1 and self.segmentos[-2].linhas <= 2 * self.segmentos[-1].linhas:
+            ultimo = self.segmentos.pop()
+            penultimo = self.segmentos.pop()
+            self.segmentos.append(Segmento.construir(
+                self.proximo_id,
+                np.vstack([penultimo.dados, ultimo.dados]),
+                pd.concat([penultimo.casos, ultimo.casos], ignore_index=True)
+            ))
+            self.proximo_id += 1
+
+        return self
+
+    # Consultar vizinhos já no espaço transformado
+    def consultar_transformado(self, x, k=5):
+
+        """
+        Retorna os k casos mais próximos de um vetor transformado, com a coluna 'distancia'
+        """
+
+        x = np.asarray(x, dtype=np.float64).reshape(1, -1)
+        candidatos = []
+
+        for posicao, segmento in enumerate(self.segmentos):
+            d, i = segmento.arvore.query(x, k=min(k, segmento.linhas))
+            candidatos.extend(zip(d[0], [posicao] * len(i[0]), i[0]))
+
+        if not candidatos:
+            return pd.DataFrame(columns=COLUNAS_CASO + ['distancia'])
+
+        # Apenas os k vencedores são copiados dos casos (cada um a partir das colunas do próprio segmento)
+        candidatos = sorted(candidatos, key=lambda candidato: candidato[0])[:k]
+        resultado = {coluna: [] for coluna in COLUNAS_CASO}
+        for _, posicao, linha in candidatos:
+            colunas = self.segmentos[posicao].colunas
+            for coluna in COLUNAS_CASO:
+                valores = colunas.get(coluna)
+                resultado[coluna].append(valores[linha] if valores is not None else None)
+        resultado['distancia'] = [distancia for distancia, _, _ in candidatos]
+
+        return pd.DataFrame(resultado)
+
+    # Consultar vizinhos de um paciente
+    def consultar(self, model, input_df, k=5):
+        return self.consultar_transformado(transformar(model, input_df.iloc[[0]])[0], k)
+
+    # Gravar o índice
+    def salvar(self, diretorio):
+
+        """
+        Grava apenas os segmentos novos, atualiza o manifesto (escrita atômica) e remove os segmentos fundidos
+        """
+
+        import joblib
+
+        diretorio = Path(diretorio)
+        diretorio.mkdir(parents=True, exist_ok=True)
+
+        for segmento in self.segmentos:
+            caminho = diretorio / segmento.nome_arquivo
+            if not caminho.exists():
+                descritor, temporario = tempfile.mkstemp(prefix='.tmp-', suffix='.joblib', dir=diretorio)
+                os.close(descritor)
+                joblib.dump({'arvore': segmento.arvore, 'casos': segmento.casos}, temporario)
+                os.chmod(temporario, 0o644)
+                os.replace(temporario, caminho)
+
+        manifesto = {
+            'modelo_sha256': self.modelo_sha256,
+            'proximo_id': self.proximo_id,
+            'segmentos': [segmento.nome_arquivo for segmento in self.segmentos],
+            'linhas': self.linhas
+        }
+        descritor, temporario = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=diretorio)
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, indent=2)
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, diretorio / 'manifesto.json')
+        self.assinatura = assinatura_indice(diretorio)
+
+        for caminho in diretorio.glob('segmento_*.joblib'):
+            if caminho.name not in manifesto['segmentos']:
+                caminho.unlink()
+
+        return diretorio
+
+    @classmethod
+    def carregar(cls, diretorio):
+        import joblib
+
+        diretorio = Path(diretorio)
+        assinatura = assinatura_indice(diretorio)
+        manifesto = json.loads((diretorio / 'manifesto.json').read_text(encoding='utf-8'))
+
+        segmentos = []
+        for nome in manifesto['segmentos']:
+            conteudo = joblib.load(diretorio / nome)
+            segmentos.append(Segmento(int(nome[len('segmento_'):-len('.joblib')]), conteudo['arvore'], conteudo['casos']))
+
+        indice = cls(segmentos, manifesto['modelo_sha256'], manifesto['proximo_id'])
+        indice.assinatura = assinatura
+
+        return indice
+
+# Assinatura do manifesto do índice
+def assinatura_indice(diretorio):
+
+    """
+    Retorna (mtime_ns, tamanho) do manifesto, ou None se ele não existir
+    """
+
+    try:
+        estado = (Path(diretorio) / 'manifesto.json').stat()
+    except OSError:
+        return None
+
+    return (estado.st_mtime_ns, estado.st_size)
+
+# Diretório do índice de uma versão do modelo
+def diretorio_indice(sha256):
+    from obesidade.artefatos import diretorio_versao
+
+    return diretorio_versao(sha256) / 'vizinhos'
+
+# Carregar ou construir o índice do modelo
+def carregar_indice(model, sha256=None, base=None):
+
+    """
+    Carrega o índice persistido na versão do cache do modelo ou o constrói a partir da base limpa
+    (e o grava, se houver permissão). Sem hash do modelo, o índice fica apenas em memória.
+    """
+
+    diretorio = diretorio_indice(sha256) if sha256 else None
+
+    if diretorio is not None and (diretorio / 'manifesto.json').exists():
+        try:
+            indice = IndiceVizinhos.carregar(diretorio)
+            if indice.modelo_sha256 == sha256:
+                return indice
+        except (OSError, KeyError, ValueError):
+            pass
+
+    if base is None:
+        from obesidade.dataset import carregar_base
+        base = carregar_base()
+
+    indice = IndiceVizinhos(modelo_sha256=sha256).adicionar(model, base)
+
+    if diretorio is not None:
+        try:
+            indice.salvar(diretorio)
+        except OSError:
+            pass
+
+    return indice
+
+# Recarregar o índice regravado
+def atualizar_indice(indice, sha256):
+
+    """
+    Recarrega o índice persistido quando o manifesto mudou desde a última leitura (ex.: casos adicionados
+    por python -m obesidade.vizinhos --adicionar); caso contrário, ou se a leitura falhar, devolve o mesmo índice
+    """
+
+    if indice is None or not sha256:
+        return indice
+
+    diretorio = diretorio_indice(sha256)
+    assinatura = assinatura_indice(diretorio)
+    if assinatura is None or assinatura == indice.assinatura:
+        return indice
+
+    try:
+        novo = IndiceVizinhos.carregar(diretorio)
+    except (OSError, KeyError, ValueError):
+        return indice
+
+    if novo.modelo_sha256 != sha256:
+        indice.assinatura = assinatura
+        return indice
+
+    return novo
+
+# Função principal
+def main(argv=None):
+    from obesidade.artefatos import resolver_versao
+    from obesidade.batch import ler_arquivo
+    from obesidade.modelo import carregar_modelo
+
+    parser = argparse.ArgumentParser(description="Constrói e consulta o índice de casos semelhantes")
+    parser.add_argument('--adicionar', default=None, help="Arquivo com novos casos rotulados (schema da base_limpa.csv)")
+    parser.add_argument('--k', type=int, default=5, help="Vizinhos por consulta")
+    parser.add_argument('--consultas', type=int, default=200, help="Consultas para medir a latência")
+    args = parser.parse_args(argv)
+
+    model = carregar_modelo()
+    if model is None:
+        raise SystemExit("ERRO: o modelo não foi carregado. Verifique a pasta models/")
+
+    versao = resolver_versao(permitir_download=False)
+    sha256 = versao.name if versao is not None else None
+
+    inicio = time.perf_counter()
+    indice = carregar_indice(model, sha256)
+    print(f"Índice: {indice.linhas} casos em {len(indice.segmentos)} segmento(s) ({time.perf_counter() - inicio:.2f} s)")
+
+    if args.adicionar:
+        novos = ler_arquivo(args.adicionar)
+        inicio = time.perf_counter()
+        try:
+            indice.adicionar(model, novos)
+        except ValueError as erro:
+            raise SystemExit(f"ERRO: {erro}")
+        print(f"Adicionados {len(novos)} casos em {time.perf_counter() - inicio:.2f} s "
+              f"({indice.linhas} casos em {len(indice.segmentos)} segmento(s))")
+        if sha256:
+            print(f"Índice salvo em: {indice.salvar(diretorio_indice(sha256))}")
+
+    # Latência das consultas (vetores já transformados, como no app)
+    amostra = indice.segmentos[0].dados[:args.consultas]
+    tempos = []
+    for x in amostra:
+        inicio = time.perf_counter()
+        indice.consultar_transformado(x, args.k)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    print(f"Consulta top-{args.k}: p50 {np.percentile(tempos, 50):.2f} ms | p99 {np.percentile(tempos, 99):.2f} ms")
+
+if __name__ == "__main__":
+    main()